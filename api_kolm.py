@@ -4,14 +4,67 @@ import streamlit as st
 from datetime import datetime, timedelta, date
 import re
 import pandas as pd
+import numpy as np
 import io
 import json
 import time
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from collections import Counter
-from requests.adapters import HTTPAdapter
-import ssl
+
+# Cliente HTTP compartilhado (pool keep-alive por host)
+from http_client import http_get
+# Busca de status do Kolmeya com divisão automática de janelas
+from kolmeya_fetch import buscar_status_kolmeya, KOLMEYA_STATUS_URL, CAMPOS_PROJETADOS_STATUS
+# Armazenamento local incremental dos status do Kolmeya
+from kolmeya_store import sincronizar_status_kolmeya, identificar_conta
+# Acessos do Kolmeya paginados e buscados em paralelo
+from kolmeya_acessos import buscar_acessos_kolmeya, total_acessos_kolmeya, KOLMEYA_ACESSOS_URL, LIMITE_ACESSOS_API
+# Consultas da página principal disparadas em paralelo
+from carregamento_paralelo import (
+    CarregamentoParalelo, PRAZO_PAINEL_SALDO, PRAZO_PAINEL_STATUS, PRAZO_PAINEL_ACESSOS, PRAZO_PAINEL_FACTA
+)
+# Consulta concorrente e limitada por taxa ao FACTA
+from facta_lookup import consultar_cpfs_facta_concorrente
+# Cache local de propostas FACTA por CPF
+from facta_cache import consultar_propostas_com_cache
+# Perfil da base (uma passada por upload) usado por todos os extratores
+from perfil_base import obter_perfil_base, chave_base
+# Leitura da base em uma passada (codificação, separador e cabeçalho detectados; só as colunas usadas)
+from leitura_base import resumo_leitura
+# Bases lidas e perfiladas guardadas em disco pelo hash do conteúdo
+from cache_bases import carregar_base
+# Conversão de datas em coluna com formato inferido e fuso de São Paulo
+from datas_vetorizadas import datas_do_campo, limites_periodo, mascara_intervalo, filtrar_por_mascara
+# Logs com nível, amostragem e resumo por execução (DASHBOARD_LOG_NIVEL)
+from log_dashboard import obter_logger, Amostra, ResumoExecucao
+# Centros de custo do Kolmeya: tabela canônica e filtro das mensagens
+from centros_custo import filtrar_por_centro_custo
+# Status do período em memória, separado por centro de custo
+from status_por_centro import obter_status_particionado
+# Mensagens e acessos do Kolmeya em colunas (CPF/telefone int64, status e centro de custo categóricos)
+from registros_kolmeya import RegistrosKolmeya, CAMPOS_ACESSO
+# Cache em disco por (conta, endpoint, dia) dos acessos: dias fechados nunca são baixados de novo
+from cache_dias import carregar_por_dia
+# Saldo do Kolmeya em memória, atualizado em segundo plano
+from saldo_kolmeya import obter_provedor_saldo, consultar_saldo_kolmeya
+# Disjuntores por endpoint e estado de saúde guardado das APIs
+from disjuntor import saude_cacheada, endpoints_indisponiveis
+# Consultas iguais de sessões diferentes divididas em uma única chamada
+from coalescencia import Coalescedor, chave_requisicao
+# CPFs normalizados e validados em vetores NumPy (limpar_cpf/validar_cpf são os casos de um valor)
+import cpf_vetorizado
+# Conjuntos de CPFs e telefones em vetores int64 ordenados (textos só para exibir e exportar)
+from conjuntos_ids import ConjuntoIds, como_conjunto, sobreposicao, unir
+# Índice de CPFs/telefones por fonte (base, Kolmeya, FACTA, canais) consultado pelos painéis
+from indice_identidades import obter_indice_identidades
+
+logger_kolmeya = obter_logger('kolmeya')
+logger_base = obter_logger('base')
+logger_facta = obter_logger('facta')
+
+# Acessos do Kolmeya compartilhados entre as sessões (mesmo período e centro de custo)
+coalescedor_acessos = Coalescedor('acessos_kolmeya')
 
 # Importar gerenciador de banco de dados
 try:
@@ -107,17 +160,6 @@ def get_facta_token():
 # Configurações
 CUSTO_POR_ENVIO = 0.08  # R$ 0,08 por SMS
 
-# Constantes para os centros de custo do Kolmeya
-TENANT_SEGMENT_ID_FGTS = "FGTS"  # FGTS conforme registro
-TENANT_SEGMENT_ID_CLT = "Crédito CLT"   # CRÉDITO CLT conforme registro
-TENANT_SEGMENT_ID_NOVO = "Novo"  # NOVO conforme registro
-
-class TLSAdapter(HTTPAdapter):
-    def init_poolmanager(self, *args, **kwargs):
-        ctx = ssl.create_default_context()  # Usa o contexto seguro padrão recomendado
-        kwargs['ssl_context'] = ctx
-        return super(TLSAdapter, self).init_poolmanager(*args, **kwargs)
-
 def get_week_range(now):
     start_of_week = now - timedelta(days=now.weekday())  # Segunda-feira
     start_at = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -143,151 +185,25 @@ def limpar_telefone(telefone):
     return ""
 
 def limpar_cpf(cpf):
-    """Limpa e valida CPF, preservando zeros à esquerda quando necessário."""
-    if not cpf:
-        return ""
-    
-    # Converter para string
-    cpf_str = str(cpf).strip()
-    
-    # Debug para CPFs problemáticos
-    debug_info = f"CPF original: '{cpf}' (tipo: {type(cpf)})"
-    
-    # Verificar se é notação científica (ex: 1.20225E+17)
-    if 'E' in cpf_str.upper() or 'e' in cpf_str:
-        try:
-            # Converter notação científica para número inteiro
-            numero = float(cpf_str)
-            cpf_str = str(int(numero))
-            debug_info += f" -> Notação científica convertida: '{cpf_str}'"
-        except (ValueError, OverflowError) as e:
-            debug_info += f" -> Erro na conversão: {e}"
-            return ""
-    
-    # Remove caracteres não numéricos
-    cpf_limpo = re.sub(r'\D', '', cpf_str)
-    debug_info += f" -> Apenas números: '{cpf_limpo}'"
-    
-    # Se tem exatamente 11 dígitos, retorna como está
-    if len(cpf_limpo) == 11:
-        debug_info += f" -> CPF válido (11 dígitos): '{cpf_limpo}'"
-        return cpf_limpo
-    
-    # Se tem menos de 11 dígitos, adiciona zeros à esquerda
-    if len(cpf_limpo) < 11:
-        cpf_final = cpf_limpo.zfill(11)
-        debug_info += f" -> CPF com zeros à esquerda: '{cpf_final}'"
-        return cpf_final
-    
-    # Se tem mais de 11 dígitos, pega os 11 últimos
-    if len(cpf_limpo) > 11:
-        cpf_final = cpf_limpo[-11:]
-        debug_info += f" -> CPF truncado (11 últimos): '{cpf_final}'"
-        return cpf_final
-    
-    # Se chegou aqui, algo deu errado
-    debug_info += f" -> CPF inválido (comprimento: {len(cpf_limpo)})"
-    return ""
+    """Limpa e valida CPF, preservando zeros à esquerda quando necessário (ver cpf_vetorizado.py)."""
+    return cpf_vetorizado.limpar_cpf(cpf)
 
 def validar_cpf(cpf):
     """Valida se um CPF é válido (algoritmo de validação)."""
-    if not cpf or len(cpf) != 11:
-        return False
-    
-    # Verifica se todos os dígitos são iguais (CPF inválido)
-    if cpf == cpf[0] * 11:
-        return False
-    
-    # Calcula os dígitos verificadores
-    soma = 0
-    for i in range(9):
-        soma += int(cpf[i]) * (10 - i)
-    
-    resto = soma % 11
-    digito1 = 0 if resto < 2 else 11 - resto
-    
-    soma = 0
-    for i in range(10):
-        soma += int(cpf[i]) * (11 - i)
-    
-    resto = soma % 11
-    digito2 = 0 if resto < 2 else 11 - resto
-    
-    return cpf[-2:] == f"{digito1}{digito2}"
+    return cpf_vetorizado.validar_cpf(cpf)
 
 
 
 def extrair_telefones_da_base(df, data_ini=None, data_fim=None):
     """Extrai e limpa todos os números de telefone da base carregada, opcionalmente filtrados por data."""
-    telefones = set()
-    
-    # Procura por colunas que podem conter telefones
-    colunas_telefone = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['telefone', 'phone', 'celular', 'mobile', 'tel', 'ddd']):
-            colunas_telefone.append(col)
-    
-    # Se não encontrar colunas específicas, usa todas as colunas
-    if not colunas_telefone:
-        colunas_telefone = df.columns.tolist()
-    
-    # Procura por colunas de data
-    colunas_data = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['data', 'date', 'criacao', 'created', 'timestamp']):
-            colunas_data.append(col)
-    
-    for idx, row in df.iterrows():
-        # Verifica se está no período de data (se especificado)
-        if data_ini and data_fim and colunas_data:
-            data_valida = False
-            for col in colunas_data:
-                try:
-                    data_str = str(row[col])
-                    if pd.notna(data_str) and data_str.strip():
-                        # Tenta diferentes formatos de data
-                        data_criacao = None
-                        
-                        # Formato: DD/MM/YYYY HH:MM
-                        if len(data_str) >= 16 and '/' in data_str:
-                            data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M')
-                        # Formato: DD/MM/YYYY
-                        elif len(data_str) == 10 and '/' in data_str:
-                            data_criacao = datetime.strptime(data_str, '%d/%m/%Y')
-                        # Formato: YYYY-MM-DD HH:MM:SS
-                        elif len(data_str) >= 19:
-                            data_criacao = datetime.strptime(data_str[:19], '%Y-%m-%d %H:%M:%S')
-                        # Formato: YYYY-MM-DD
-                        elif len(data_str) == 10:
-                            data_criacao = datetime.strptime(data_str, '%Y-%m-%d')
-                        
-                        if data_criacao:
-                            data_ini_dt = datetime.combine(data_ini, datetime.min.time())
-                            data_fim_dt = datetime.combine(data_fim, datetime.max.time())
-                            if data_ini_dt <= data_criacao <= data_fim_dt:
-                                data_valida = True
-                                break
-                except (ValueError, TypeError):
-                    continue
-            
-            # Se não está no período, pula este registro
-            if not data_valida:
-                continue
-        
-        # Extrai telefones das colunas
-        for col in colunas_telefone:
-            valor = row[col] if col in row else None
-            if valor is not None:
-                telefone_limpo = limpar_telefone(valor)
-                if telefone_limpo and len(telefone_limpo) == 11:
-                    telefones.add(telefone_limpo)
-    
-    return telefones
+    # Filtro sobre o perfil da base (calculado uma vez por upload, ver perfil_base.py)
+    return obter_perfil_base(df).telefones_no_periodo(data_ini, data_fim)
 
 def extrair_telefones_kolmeya(messages):
     """Extrai e limpa todos os números de telefone das mensagens do Kolmeya."""
+    if isinstance(messages, RegistrosKolmeya):
+        return messages.telefones()
+    
     telefones = set()
     
     for msg in messages:
@@ -299,261 +215,94 @@ def extrair_telefones_kolmeya(messages):
                 if telefone_limpo and len(telefone_limpo) == 11:
                     telefones.add(telefone_limpo)
     
-    return telefones
+    return ConjuntoIds.de_textos(telefones)
 
 def extrair_cpfs_kolmeya(messages):
     """Extrai e limpa todos os CPFs das mensagens do Kolmeya."""
     cpfs = set()
-    
-    print(f"🔍 DEBUG - Extraindo CPFs do Kolmeya de {len(messages) if messages else 0} mensagens")
-    
-    # Debug: Mostrar estrutura das primeiras mensagens
-    if messages and len(messages) > 0:
-        print(f"🔍 DEBUG - Estrutura da primeira mensagem:")
-        primeira_msg = messages[0]
-        if isinstance(primeira_msg, dict):
-            print(f"   📋 Campos disponíveis: {list(primeira_msg.keys())}")
-            print(f"   🆔 CPF: {primeira_msg.get('cpf', 'N/A')}")
-            print(f"   📱 Telefone: {primeira_msg.get('telefone', 'N/A')}")
-            print(f"   🏢 Centro de custo: {primeira_msg.get('centro_custo', 'N/A')}")
-            print(f"   📅 Enviada em: {primeira_msg.get('enviada_em', 'N/A')}")
-        
-        # Mostrar alguns exemplos de CPFs encontrados
-        print(f"🔍 DEBUG - Exemplos de CPFs nas mensagens:")
-        for i, msg in enumerate(messages[:10]):  # Primeiras 10 mensagens
-            if isinstance(msg, dict):
-                cpf = msg.get('cpf')
-                telefone = msg.get('telefone', 'N/A')
-                print(f"   Mensagem {i+1}: CPF={cpf}, Telefone={telefone}")
-    
+    amostra = Amostra(logger_kolmeya)
     cpfs_validos = 0
     cpfs_invalidos = 0
     mensagens_sem_cpf = 0
     
-    for i, msg in enumerate(messages):
-        if isinstance(msg, dict):
+    with ResumoExecucao(logger_kolmeya, 'extrair_cpfs_kolmeya') as resumo:
+        if isinstance(messages, RegistrosKolmeya):
+            # Registros em colunas: CPFs já limpos na conversão
+            cpfs = messages.cpfs()
+            resumo.contar('mensagens', len(messages))
+            for chave, valor in messages.contagem_cpfs().items():
+                resumo.contar(chave, valor)
+            resumo.contar('cpfs_unicos', len(cpfs))
+            return cpfs
+        
+        for msg in messages or []:
+            if not isinstance(msg, dict):
+                continue
             # Campo 'cpf' da nova API
             cpf = msg.get('cpf')
             
-            # CORREÇÃO: Aceitar CPFs mesmo que não passem na validação rigorosa
             if cpf and cpf != 0:  # CPF 0 é inválido
-                valor_str = str(cpf).strip()
+                cpf_limpo = limpar_cpf(str(cpf).strip())
                 
-                # Limpar CPF
-                cpf_limpo = limpar_cpf(valor_str)
-                
-                # Verificar se tem pelo menos 11 dígitos
+                # CPFs com 11 dígitos são aceitos mesmo sem passar na validação rigorosa
                 if cpf_limpo and len(cpf_limpo) == 11:
-                    # Tentar validar, mas aceitar mesmo se não passar na validação rigorosa
-                    if validar_cpf(cpf_limpo):
-                        cpfs.add(cpf_limpo)
-                        cpfs_validos += 1
-                        if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                            print(f"   ✅ CPF extraído (válido): {cpf_limpo}")
-                    else:
-                        # CPF tem 11 dígitos mas não passa na validação - aceitar mesmo assim
-                        cpfs.add(cpf_limpo)
-                        cpfs_validos += 1
-                        if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                            print(f"   ⚠️ CPF extraído (aceito): {cpf_limpo} (não passou na validação rigorosa)")
+                    cpfs.add(cpf_limpo)
+                    cpfs_validos += 1
+                    amostra.registrar("CPF extraído: %s (telefone %s)", cpf_limpo, msg.get('telefone'))
                 else:
                     cpfs_invalidos += 1
-                    if cpfs_invalidos <= 3:  # Mostrar apenas os primeiros 3 para debug
-                        print(f"   ❌ CPF inválido (formato): {cpf} -> {cpf_limpo}")
+                    amostra.registrar("CPF inválido (formato): %s -> %s", cpf, cpf_limpo)
             else:
                 mensagens_sem_cpf += 1
-                if mensagens_sem_cpf <= 3:  # Mostrar apenas os primeiros 3 para debug
-                    print(f"   ⚠️ Mensagem sem CPF válido: {msg.get('telefone', 'N/A')} - CPF: {cpf}")
+                amostra.registrar("Mensagem sem CPF: telefone %s", msg.get('telefone'))
         
-        # Mostrar progresso a cada 1000 mensagens processadas
-        if (i + 1) % 1000 == 0:
-            print(f"   📊 Progresso: {i + 1}/{len(messages)} mensagens processadas")
-    
-    print(f"🔍 DEBUG - Resumo da extração de CPFs das mensagens:")
-    print(f"   📊 Total de mensagens processadas: {len(messages)}")
-    print(f"   ✅ CPFs válidos extraídos: {cpfs_validos}")
-    print(f"   ❌ CPFs inválidos encontrados: {cpfs_invalidos}")
-    print(f"   ⚠️ Mensagens sem CPF: {mensagens_sem_cpf}")
-    print(f"   📋 CPFs únicos finais: {len(cpfs)}")
-    
-    if cpfs:
-        print(f"   📋 Primeiros 5 CPFs de mensagens: {list(cpfs)[:5]}")
-        if len(cpfs) > 5:
-            print(f"   📋 Últimos 5 CPFs de mensagens: {list(cpfs)[-5:]}")
+        resumo.contar('mensagens', len(messages) if messages else 0)
+        resumo.contar('cpfs_validos', cpfs_validos)
+        resumo.contar('cpfs_invalidos', cpfs_invalidos)
+        resumo.contar('sem_cpf', mensagens_sem_cpf)
+        resumo.contar('cpfs_unicos', len(cpfs))
     
-    return cpfs
+    return ConjuntoIds.de_textos(cpfs)
 
 def extrair_cpfs_da_base(df, data_ini=None, data_fim=None):
     """Extrai e limpa todos os CPFs da base carregada, opcionalmente filtrados por data."""
-    cpfs = set()
-    
-    # Procura por colunas que podem conter CPFs
-    colunas_cpf = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['cpf', 'document', 'documento', 'cnpj']):
-            colunas_cpf.append(col)
-    
-    # Se não encontrar colunas específicas, usa todas as colunas
-    if not colunas_cpf:
-        colunas_cpf = df.columns.tolist()
-    
-    # Procura por colunas de data
-    colunas_data = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['data', 'date', 'criacao', 'created', 'timestamp']):
-            colunas_data.append(col)
-    
-    print(f"🔍 DEBUG - Extraindo CPFs da base:")
-    print(f"   📊 DataFrame shape: {df.shape if df is not None else 'None'}")
-    print(f"   📋 Colunas CPF encontradas: {colunas_cpf}")
-    print(f"   📅 Filtro de data: {data_ini} a {data_fim}")
+    logger_base.debug("Extraindo CPFs da base: shape %s, período %s a %s",
+                      df.shape if df is not None else None, data_ini, data_fim)
     
-    cpfs_validos = 0
-    cpfs_invalidos = 0
-    registros_sem_cpf = 0
-    
-    for idx, row in df.iterrows():
-        # Verifica se está no período de data (se especificado)
-        if data_ini and data_fim and colunas_data:
-            data_valida = False
-            for col in colunas_data:
-                try:
-                    data_str = str(row[col])
-                    if pd.notna(data_str) and data_str.strip():
-                        # Tenta diferentes formatos de data
-                        data_criacao = None
-                        
-                        # Formato: DD/MM/YYYY HH:MM
-                        if len(data_str) >= 16 and '/' in data_str:
-                            data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M')
-                        # Formato: DD/MM/YYYY
-                        elif len(data_str) == 10 and '/' in data_str:
-                            data_criacao = datetime.strptime(data_str, '%d/%m/%Y')
-                        # Formato: YYYY-MM-DD HH:MM:SS
-                        elif len(data_str) >= 19:
-                            data_criacao = datetime.strptime(data_str[:19], '%Y-%m-%d %H:%M:%S')
-                        # Formato: YYYY-MM-DD
-                        elif len(data_str) == 10:
-                            data_criacao = datetime.strptime(data_str, '%Y-%m-%d')
-                        
-                        if data_criacao:
-                            data_ini_dt = datetime.combine(data_ini, datetime.min.time())
-                            data_fim_dt = datetime.combine(data_fim, datetime.max.time())
-                            if data_ini_dt <= data_criacao <= data_fim_dt:
-                                data_valida = True
-                                break
-                except (ValueError, TypeError):
-                    continue
-            
-            # Se não está no período, pula este registro
-            if not data_valida:
-                continue
-        
-        # Extrai CPFs das colunas
-        cpf_encontrado = False
-        for col in colunas_cpf:
-            valor = row[col] if col in row else None
-            if valor is not None:
-                valor_str = str(valor).strip()
-                
-                # CORREÇÃO: Usar a mesma lógica da função extrair_cpfs_kolmeya
-                if valor_str and valor_str != '0':  # CPF 0 é inválido
-                    # Limpar CPF
-                    cpf_limpo = limpar_cpf(valor_str)
-                    
-                    # Verificar se tem pelo menos 11 dígitos
-                    if cpf_limpo and len(cpf_limpo) == 11:
-                        # Tentar validar, mas aceitar mesmo se não passar na validação rigorosa
-                        if validar_cpf(cpf_limpo):
-                            cpfs.add(cpf_limpo)
-                            cpfs_validos += 1
-                            cpf_encontrado = True
-                            if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                                print(f"   ✅ CPF extraído da base (válido): {cpf_limpo} (coluna: {col})")
-                            break
-                        else:
-                            # CPF tem 11 dígitos mas não passa na validação - aceitar mesmo assim
-                            cpfs.add(cpf_limpo)
-                            cpfs_validos += 1
-                            cpf_encontrado = True
-                            if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                                print(f"   ⚠️ CPF extraído da base (aceito): {cpf_limpo} (coluna: {col}) (não passou na validação rigorosa)")
-                            break
-                    else:
-                        cpfs_invalidos += 1
-                        if cpfs_invalidos <= 3:  # Mostrar apenas os primeiros 3 para debug
-                            print(f"   ❌ CPF inválido da base (formato): {valor_str} -> {cpf_limpo} (coluna: {col})")
-        
-        if not cpf_encontrado:
-            registros_sem_cpf += 1
-            if registros_sem_cpf <= 3:  # Mostrar apenas os primeiros 3 para debug
-                print(f"   ⚠️ Registro sem CPF válido: linha {idx + 1}")
-    
-    print(f"🔍 DEBUG - Resumo da extração de CPFs da base:")
-    print(f"   📊 Total de registros processados: {len(df)}")
-    print(f"   ✅ CPFs válidos extraídos: {cpfs_validos}")
-    print(f"   ❌ CPFs inválidos encontrados: {cpfs_invalidos}")
-    print(f"   ⚠️ Registros sem CPF: {registros_sem_cpf}")
-    print(f"   📋 CPFs únicos finais: {len(cpfs)}")
-    
-    if cpfs:
-        print(f"   📋 Primeiros 5 CPFs da base: {list(cpfs)[:5]}")
-        if len(cpfs) > 5:
-            print(f"   📋 Últimos 5 CPFs da base: {list(cpfs)[-5:]}")
+    with ResumoExecucao(logger_base, 'extrair_cpfs_da_base') as resumo:
+        # Filtro sobre o perfil da base (calculado uma vez por upload, ver perfil_base.py)
+        with resumo.etapa('perfil'):
+            cpfs, estatisticas = obter_perfil_base(df).cpfs_no_periodo(data_ini, data_fim)
+        for chave, valor in estatisticas.items():
+            resumo.contar(chave, valor)
+        resumo.contar('cpfs_unicos', len(cpfs))
     
     return cpfs
 
-def comparar_telefones(telefones_base, telefones_kolmeya):
-    """Compara telefones da base com telefones do Kolmeya."""
-    telefones_base_set = set(telefones_base)
-    telefones_kolmeya_set = set(telefones_kolmeya)
-    
-    # Telefones que estão na base E foram enviados pelo Kolmeya
-    telefones_enviados = telefones_base_set.intersection(telefones_kolmeya_set)
-    
-    # Telefones que estão na base mas NÃO foram enviados pelo Kolmeya
-    telefones_nao_enviados = telefones_base_set - telefones_kolmeya_set
-    
-    # Telefones que foram enviados pelo Kolmeya mas NÃO estão na base
-    telefones_extra = telefones_kolmeya_set - telefones_base_set
-    
+def _comparar_conjuntos(base, kolmeya):
+    """Sobreposição base x Kolmeya no formato dos painéis de comparação (ver conjuntos_ids.py)."""
+    resultado = sobreposicao(base, kolmeya)
     return {
-        'enviados': telefones_enviados,
-        'nao_enviados': telefones_nao_enviados,
-        'extra': telefones_extra,
-        'total_base': len(telefones_base_set),
-        'total_kolmeya': len(telefones_kolmeya_set),
-        'total_enviados': len(telefones_enviados),
-        'total_nao_enviados': len(telefones_nao_enviados),
-        'total_extra': len(telefones_extra)
+        # Na base E enviados pelo Kolmeya
+        'enviados': resultado['em_ambos'],
+        # Na base mas NÃO enviados pelo Kolmeya
+        'nao_enviados': resultado['apenas_a'],
+        # Enviados pelo Kolmeya mas NÃO estão na base
+        'extra': resultado['apenas_b'],
+        'total_base': resultado['total_a'],
+        'total_kolmeya': resultado['total_b'],
+        'total_enviados': resultado['total_em_ambos'],
+        'total_nao_enviados': len(resultado['apenas_a']),
+        'total_extra': len(resultado['apenas_b'])
     }
 
+def comparar_telefones(telefones_base, telefones_kolmeya):
+    """Compara telefones da base com telefones do Kolmeya."""
+    return _comparar_conjuntos(telefones_base, telefones_kolmeya)
+
 def comparar_cpfs(cpfs_base, cpfs_kolmeya):
     """Compara CPFs da base com CPFs do Kolmeya."""
-    cpfs_base_set = set(cpfs_base)
-    cpfs_kolmeya_set = set(cpfs_kolmeya)
-    
-    # CPFs que estão na base E foram enviados pelo Kolmeya
-    cpfs_enviados = cpfs_base_set.intersection(cpfs_kolmeya_set)
-    
-    # CPFs que estão na base mas NÃO foram enviados pelo Kolmeya
-    cpfs_nao_enviados = cpfs_base_set - cpfs_kolmeya_set
-    
-    # CPFs que foram enviados pelo Kolmeya mas NÃO estão na base
-    cpfs_extra = cpfs_kolmeya_set - cpfs_base_set
-    
-    return {
-        'enviados': cpfs_enviados,
-        'nao_enviados': cpfs_nao_enviados,
-        'extra': cpfs_extra,
-        'total_base': len(cpfs_base_set),
-        'total_kolmeya': len(cpfs_kolmeya_set),
-        'total_enviados': len(cpfs_enviados),
-        'total_nao_enviados': len(cpfs_nao_enviados),
-        'total_extra': len(cpfs_extra)
-    }
+    return _comparar_conjuntos(cpfs_base, cpfs_kolmeya)
 
 def comparar_telefones_e_cpfs(telefones_base, telefones_kolmeya, cpfs_base, cpfs_kolmeya):
     """Compara telefones e CPFs da base com os do Kolmeya."""
@@ -563,19 +312,14 @@ def comparar_telefones_e_cpfs(telefones_base, telefones_kolmeya, cpfs_base, cpfs
     # Comparação de CPFs
     resultado_cpfs = comparar_cpfs(cpfs_base, cpfs_kolmeya)
     
-    # Encontrar registros que têm tanto telefone quanto CPF iguais
-    registros_completos = set()
-    
-    # Para cada telefone enviado, verificar se o CPF também foi enviado
-    for telefone in resultado_telefones['enviados']:
-        # Aqui você pode implementar uma lógica mais complexa se necessário
-        # Por enquanto, vamos considerar que se telefone e CPF foram enviados, é um registro completo
-        pass
+    # Registros com telefone e CPF iguais exigem a ligação telefone-CPF de cada linha,
+    # que os conjuntos não guardam; por enquanto nenhum é contado
+    registros_completos = 0
     
     return {
         'telefones': resultado_telefones,
         'cpfs': resultado_cpfs,
-        'registros_completos': len(registros_completos)
+        'registros_completos': registros_completos
     }
 
 
@@ -599,75 +343,37 @@ def formatar_real(valor):
         # Se não conseguir converter, retorna o valor original
         return str(valor)
 
-def obter_saldo_kolmeya(token=None):
-    """Retorna saldo real do Kolmeya via API."""
-    if token is None:
-        token = get_kolmeya_token()
-    
-    if not token:
-        print("❌ Token do Kolmeya não encontrado para consulta de saldo")
-        return 0.0
-    
-    # Verificar se o token tem formato válido
-    if len(token) < 10:
-        print("❌ Token do Kolmeya parece inválido (muito curto)")
-        return 0.0
-    
-    try:
-        # Endpoint correto da API Kolmeya para saldo
-        url = "https://kolmeya.com.br/api/v1/sms/balance"
-        
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        
-        print(f"🔍 Consultando saldo Kolmeya:")
-        print(f"   🌐 URL: {url}")
-        print(f"   🔑 Token: {token[:10]}..." if token else "   🔑 Token: Não fornecido")
-        
-        # Usar método POST conforme documentação da API
-        resp = requests.post(url, headers=headers, timeout=15)
-        print(f"   📊 Status Code: {resp.status_code}")
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            print(f"   📄 Resposta: {data}")
-            
-            # Campo 'balance' conforme documentação da API
-            if 'balance' in data:
-                saldo = data.get("balance")
-                saldo_float = float(saldo) if saldo is not None else 0.0
-                print(f"   ✅ Saldo encontrado: R$ {saldo_float:,.2f}")
-                return saldo_float
-            else:
-                print(f"   ⚠️ Campo 'balance' não encontrado. Campos disponíveis: {list(data.keys())}")
-                return 0.0
-        elif resp.status_code == 401:
-            print(f"   ❌ Erro 401: Token inválido ou expirado")
-            return 0.0
-        elif resp.status_code == 403:
-            print(f"   ❌ Erro 403: Acesso negado")
-            return 0.0
-        else:
-            print(f"   ❌ Erro HTTP {resp.status_code}: {resp.text}")
-            return 0.0
-            
-    except requests.exceptions.Timeout:
-        print("   ❌ Timeout na requisição de saldo")
-        return 0.0
-    except requests.exceptions.RequestException as e:
-        print(f"   ❌ Erro na requisição de saldo: {e}")
-        return 0.0
-    except Exception as e:
-        print(f"   ❌ Erro inesperado ao consultar saldo: {e}")
-        return 0.0
+def formatar_idade(segundos):
+    """Idade de um valor em texto curto (ex.: 'há 45s', 'há 3 min')."""
+    if segundos is None:
+        return ""
+    if segundos < 60:
+        return f"há {int(segundos)}s"
+    if segundos < 3600:
+        return f"há {int(segundos // 60)} min"
+    return f"há {int(segundos // 3600)} h"
+
+def buscar_status_dias(inicio, fim, token):
+    """Status de SMS dos dias [inicio, fim] em colunas, lidos do armazenamento local (kolmeya_store.py)."""
+    messages = sincronizar_status_kolmeya(inicio.strftime('%Y-%m-%d 00:00'), fim.strftime('%Y-%m-%d 23:59'), token,
+                                          timeout=60, campos=CAMPOS_PROJETADOS_STATUS)
+    return RegistrosKolmeya.de_mensagens(messages)
+
+def buscar_status_desde(desde, data_fim, token):
+    """
+    Status de SMS enviados de desde (inclusive) até o fim de data_fim, em colunas.
+
+    Usado pela atualização automática: o armazenamento local só busca na API a cauda
+    após a última enviada_em guardada, e só as mensagens a partir de desde são lidas.
+    """
+    messages = sincronizar_status_kolmeya(desde.strftime('%Y-%m-%d %H:%M'), data_fim.strftime('%Y-%m-%d 23:59'),
+                                          token, timeout=60, campos=CAMPOS_PROJETADOS_STATUS)
+    return RegistrosKolmeya.de_mensagens(messages)
 
 def obter_dados_sms_com_filtro(data_ini, data_fim, tenant_segment_id=None):
-    """Consulta o endpoint Kolmeya para status de SMS."""
+    """Consulta o endpoint Kolmeya para status de SMS (mensagens em colunas, ver registros_kolmeya.py)."""
     if data_ini is None or data_fim is None:
-        return [], 0
+        return RegistrosKolmeya.vazio(), 0
     
     # Formatar datas para o formato esperado pela API
     start_at = data_ini.strftime('%Y-%m-%d 00:00')
@@ -691,12 +397,29 @@ def obter_dados_sms_com_filtro(data_ini, data_fim, tenant_segment_id=None):
     print(f"   🕐 Horário atual (BR): {agora_brasil.strftime('%Y-%m-%d %H:%M')}")
     print(f"   🌍 Fuso horário: UTC-3 (Brasil)")
     
-    # LIMPEZA DO CACHE: Forçar nova consulta sempre
-    print(f"🔄 Forçando nova consulta (cache limpo)")
+    # O armazenamento local (kolmeya_store.py) é a única fonte do status: dias fechados não são
+    # consultados de novo e o dia atual só busca a cauda após a última enviada_em
+    print(f"💾 Montando o período a partir do armazenamento local")
     
-    # Consulta real à API
+    # Consulta real à API: o período é baixado uma vez (todos os centros de custo) e
+    # trocar o centro de custo só escolhe outra partição em memória
     try:
-        messages = consultar_status_sms_kolmeya(start_at, end_at, token=None, tenant_segment_id=tenant_segment_id)
+        token = get_kolmeya_token()
+        if not token:
+            print("❌ Token do Kolmeya não encontrado")
+            return RegistrosKolmeya.vazio(), 0
+        inclui_hoje = data_fim == agora_brasil.date()
+        # Período com o dia de hoje: a atualização automática só acrescenta as mensagens novas
+        status_periodo = obter_status_particionado(
+            (token, data_ini, data_fim),
+            lambda: buscar_status_dias(data_ini, data_fim, token),
+            inclui_hoje=inclui_hoje,
+            buscar_desde=(lambda desde: buscar_status_desde(desde, data_fim, token)) if inclui_hoje else None
+        )
+        messages = status_periodo.mensagens(tenant_segment_id)
+        if tenant_segment_id:
+            logger_kolmeya.info("Centro de custo %r: %d de %d mensagens do período",
+                                tenant_segment_id, len(messages), len(status_periodo.mensagens()))
         
         if messages:
             print(f"✅ API retornou {len(messages)} mensagens")
@@ -716,16 +439,21 @@ def obter_dados_sms_com_filtro(data_ini, data_fim, tenant_segment_id=None):
             return messages, total_acessos
         else:
             print("⚠️ API não retornou mensagens")
-            return [], 0
+            return RegistrosKolmeya.vazio(), 0
             
     except Exception as e:
         print(f"❌ Erro na consulta: {e}")
         import traceback
         traceback.print_exc()
-        return [], 0
+        return RegistrosKolmeya.vazio(), 0
 
-def consultar_status_sms_kolmeya(start_at, end_at, limit=30000, token=None, tenant_segment_id=None):
-    """Consulta o status das mensagens SMS enviadas via Kolmeya."""
+def consultar_status_sms_kolmeya(start_at, end_at, limit=30000, token=None, tenant_segment_id=None, usar_cache=True):
+    """
+    Consulta o status das mensagens SMS enviadas via Kolmeya.
+    
+    Com usar_cache=True as mensagens vêm do armazenamento local (kolmeya_store.py),
+    que só busca na API os dias ainda não fechados.
+    """
     if token is None:
         token = get_kolmeya_token()
     
@@ -749,131 +477,53 @@ def consultar_status_sms_kolmeya(start_at, end_at, limit=30000, token=None, tena
         print(f"❌ Erro ao converter datas: {e}")
         return []
     
-    url = "https://kolmeya.com.br/api/v1/sms/reports/statuses"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    
-    body = {
-        "start_at": start_at,
-        "end_at": end_at,
-        "limit": min(limit, 30000)  # Máximo permitido pela API
-    }
-    
     print(f"🔍 DEBUG - Consultando API Kolmeya:")
-    print(f"   🌐 URL: {url}")
+    print(f"   🌐 URL: {KOLMEYA_STATUS_URL}")
     print(f"   📅 Período: {start_at} a {end_at}")
     print(f"   🏢 Centro de custo: {tenant_segment_id}")
-    print(f"   📋 Request body: {body}")
     
     try:
-        resp = requests.post(url, headers=headers, json=body, timeout=60)  # Aumentado timeout
+        # Janelas divididas automaticamente quando atingem o limite de 30.000 por requisição;
+        # só os campos usados pelo dashboard são mantidos (decodificação em fluxo com ijson)
+        if usar_cache:
+            messages = sincronizar_status_kolmeya(start_at, end_at, token, limite=limit, timeout=60,
+                                                  campos=CAMPOS_PROJETADOS_STATUS)
+        else:
+            messages = buscar_status_kolmeya(start_at, end_at, token, limite=limit, timeout=60,
+                                             campos=CAMPOS_PROJETADOS_STATUS)
         
-        print(f"   📊 Status Code: {resp.status_code}")
+        print(f"✅ Resposta recebida: {len(messages)} mensagens")
         
-        if resp.status_code == 200:
-            data = resp.json()
-            messages = data.get("messages", [])
+        # Debug detalhado da resposta
+        if messages and len(messages) > 0:
+            print(f"🔍 DEBUG - Detalhes da resposta da API:")
+            print(f"   📅 Período consultado: {start_at} a {end_at}")
+            print(f"   📊 Total de mensagens retornadas: {len(messages)}")
+            print(f"   📅 Primeira mensagem - enviada_em: {messages[0].get('enviada_em', 'N/A')}")
+            print(f"   📅 Última mensagem - enviada_em: {messages[-1].get('enviada_em', 'N/A')}")
+            print(f"   🏢 Centro de custo da primeira: {messages[0].get('centro_custo', 'N/A')}")
+            print(f"   📋 Status da primeira: {messages[0].get('status', 'N/A')}")
             
-            print(f"✅ Resposta recebida: {len(messages)} mensagens")
-            
-            # Debug detalhado da resposta
-            if messages and len(messages) > 0:
-                print(f"🔍 DEBUG - Detalhes da resposta da API:")
-                print(f"   📅 Período consultado: {start_at} a {end_at}")
-                print(f"   📊 Total de mensagens retornadas: {len(messages)}")
-                print(f"   📅 Primeira mensagem - enviada_em: {messages[0].get('enviada_em', 'N/A')}")
-                print(f"   📅 Última mensagem - enviada_em: {messages[-1].get('enviada_em', 'N/A')}")
-                print(f"   🏢 Centro de custo da primeira: {messages[0].get('centro_custo', 'N/A')}")
-                print(f"   📋 Status da primeira: {messages[0].get('status', 'N/A')}")
-                
-                # Verificar distribuição de datas das mensagens
-                datas_mensagens = []
-                for msg in messages[:10]:  # Primeiras 10 mensagens
-                    if 'enviada_em' in msg:
-                        datas_mensagens.append(msg['enviada_em'])
-                
-                print(f"   📅 Exemplos de datas das mensagens: {datas_mensagens[:5]}")
-            else:
-                print(f"⚠️ DEBUG - Nenhuma mensagem retornada para o período: {start_at} a {end_at}")
-                print(f"   📋 Response completo: {data}")
-            
-            # Filtrar por centro de custo se especificado
-            if tenant_segment_id and messages:
-                messages_filtradas = []
-                
-                print(f"🔍 DEBUG - Aplicando filtro por centro de custo: {tenant_segment_id}")
-                
-                for msg in messages:
-                    if isinstance(msg, dict):
-                        # Tentar diferentes campos que podem conter o centro de custo
-                        centro_custo_msg = None
-                        
-                        # Lista de campos possíveis para centro de custo
-                        campos_possiveis = [
-                            'centro_custo', 'tenant_segment_id', 'cost_center', 'segment',
-                            'campaign_id', 'campaign_name', 'template_id', 'template_name',
-                            'sender_id', 'sender_name', 'account_id', 'account_name',
-                            'group_id', 'group_name', 'tag', 'tags', 'category'
-                        ]
-                        
-                        for campo in campos_possiveis:
-                            if campo in msg:
-                                valor = msg.get(campo, '')
-                                # Se encontrou um valor, tentar usar para filtragem
-                                if not centro_custo_msg and valor:
-                                    centro_custo_msg = str(valor)
-                        
-                        # Se encontrou algum campo, verificar se corresponde ao filtro
-                        if centro_custo_msg:
-                            # CORREÇÃO: Mapeamento mais abrangente de centros de custo
-                            mapeamento_centros = {
-                                # FGTS
-                                8103: ["FGTS", "8103", "fgts", "Fgts", "FGTS", "fgts", "Fgts", 8103, "FGTS", "fgts"],
-                                "FGTS": ["FGTS", "8103", "fgts", "Fgts", "FGTS", "fgts", "Fgts", 8103, "FGTS", "fgts"],
-                                "fgts": ["FGTS", "8103", "fgts", "Fgts", "FGTS", "fgts", "Fgts", 8103, "FGTS", "fgts"],
-                                
-                                # Novo/INSS
-                                8105: ["Novo", "8105", "NOVO", "novo", "INSS", "inss", "Inss", 8105, "Novo", "novo"],
-                                "Novo": ["Novo", "8105", "NOVO", "novo", "INSS", "inss", "Inss", 8105, "Novo", "novo"],
-                                "novo": ["Novo", "8105", "NOVO", "novo", "INSS", "inss", "Inss", 8105, "Novo", "novo"],
-                                
-                                # CLT
-                                8208: ["Crédito CLT", "8208", "CLT", "clt", "Crédito", "CREDITO", "credito", "CLT", "clt", 8208],
-                                "CLT": ["Crédito CLT", "8208", "CLT", "clt", "Crédito", "CREDITO", "credito", "CLT", "clt", 8208],
-                                "clt": ["Crédito CLT", "8208", "CLT", "clt", "Crédito", "CREDITO", "credito", "CLT", "clt", 8208]
-                            }
-                            
-                            # Obter valores aceitos para o centro de custo
-                            valores_aceitos = mapeamento_centros.get(tenant_segment_id, [tenant_segment_id])
-                            
-                            # Debug para os primeiros registros
-                            if len(messages_filtradas) < 3:
-                                print(f"   🔍 DEBUG - Mensagem centro_custo: '{centro_custo_msg}' vs filtro: '{tenant_segment_id}'")
-                                print(f"   🔍 DEBUG - Valores aceitos: {valores_aceitos}")
-                            
-                            # Verificar se o valor encontrado corresponde ao filtro
-                            if centro_custo_msg in valores_aceitos:
-                                messages_filtradas.append(msg)
-                                if len(messages_filtradas) <= 3:
-                                    print(f"   ✅ Mensagem aceita pelo filtro: centro_custo='{centro_custo_msg}'")
-                            else:
-                                if len(messages_filtradas) < 3:
-                                    print(f"   ❌ Mensagem rejeitada pelo filtro: centro_custo='{centro_custo_msg}'")
-                        else:
-                            # Se não encontrou centro de custo, incluir a mensagem (não filtrar)
-                            messages_filtradas.append(msg)
-                            if len(messages_filtradas) <= 3:
-                                print(f"   ⚠️ Mensagem sem centro de custo incluída (sem filtro)")
-                
-                print(f"🔍 DEBUG - Após filtro por centro de custo '{tenant_segment_id}': {len(messages_filtradas)} mensagens")
-                return messages_filtradas
+            # Verificar distribuição de datas das mensagens
+            datas_mensagens = []
+            for msg in messages[:10]:  # Primeiras 10 mensagens
+                if 'enviada_em' in msg:
+                    datas_mensagens.append(msg['enviada_em'])
             
-            # Se não há filtro, retornar todas as mensagens
-            print(f"🔍 DEBUG - Sem filtro de centro de custo, retornando todas as {len(messages)} mensagens")
-            return messages
+            print(f"   📅 Exemplos de datas das mensagens: {datas_mensagens[:5]}")
+        else:
+            print(f"⚠️ DEBUG - Nenhuma mensagem retornada para o período: {start_at} a {end_at}")
+        
+        # Filtrar por centro de custo se especificado
+        if tenant_segment_id and messages:
+            messages_filtradas = filtrar_por_centro_custo(messages, tenant_segment_id)
+            logger_kolmeya.info("Filtro por centro de custo %r: %d de %d mensagens",
+                                tenant_segment_id, len(messages_filtradas), len(messages))
+            return messages_filtradas
+        
+        # Se não há filtro, retornar todas as mensagens
+        print(f"🔍 DEBUG - Sem filtro de centro de custo, retornando todas as {len(messages)} mensagens")
+        return messages
     except requests.exceptions.Timeout:
         print("❌ Timeout na requisição")
         return []
@@ -886,7 +536,10 @@ def consultar_status_sms_kolmeya(start_at, end_at, limit=30000, token=None, tena
 
 def consultar_acessos_sms_kolmeya(start_at, end_at, limit=5000, token=None, tenant_segment_id=None):
     """
-    Consulta os acessos realizados nas mensagens SMS enviadas via API do Kolmeya
+    Consulta os acessos realizados nas mensagens SMS enviadas via API do Kolmeya.
+    
+    Sessões que pedem os mesmos acessos ao mesmo tempo (ou até COALESCENCIA_TTL segundos
+    depois) recebem o resultado de uma única consulta (ver coalescencia.py).
     """
     if token is None:
         token = get_kolmeya_token()
@@ -895,32 +548,38 @@ def consultar_acessos_sms_kolmeya(start_at, end_at, limit=5000, token=None, tena
         print("❌ Token do Kolmeya não encontrado")
         return []
     
+    chave = chave_requisicao(KOLMEYA_ACESSOS_URL, token=token, start_at=start_at, end_at=end_at,
+                             limit=min(limit, LIMITE_ACESSOS_API), tenant_segment_id=tenant_segment_id or 0)
+    # Erros são tratados fora do coalescedor: uma falha não fica guardada e servida às outras sessões
+    try:
+        return coalescedor_acessos.executar(
+            chave, lambda: _consultar_acessos_sms_kolmeya(start_at, end_at, limit, token, tenant_segment_id))
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Erro na requisição Kolmeya SMS Acessos: {e}")
+        return []
+    except ValueError as e:
+        print(f"❌ Resposta inesperada do Kolmeya SMS Acessos: {e}")
+        return []
+    except Exception as e:
+        print(f"❌ Erro inesperado na consulta Kolmeya SMS Acessos: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+def _consultar_acessos_sms_kolmeya(start_at, end_at, limit, token, tenant_segment_id):
+    """Consulta de fato os acessos (chamada por consultar_acessos_sms_kolmeya); erros levantam exceção."""
     # Para acessos, usar formato de data simples (YYYY-MM-DD)
     # Não validar período pois a API de acessos aceita períodos maiores
     
-    url = "https://kolmeya.com.br/api/v1/sms/accesses"
-    headers = {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    
-    # Preparar dados da requisição conforme documentação da API
-    data = {
-        "start_at": start_at,  # required
-        "end_at": end_at,      # required
-        "limit": min(limit, 5000),  # required, <= 5000
-        "is_robot": 0,         # Excluir acessos de robôs
-        "tenant_segment_id": None  # Opcional, será definido abaixo
-    }
+    url = KOLMEYA_ACESSOS_URL
     
     # Definir tenant_segment_id conforme documentação
     if tenant_segment_id is not None and tenant_segment_id != 0:
-        data["tenant_segment_id"] = tenant_segment_id
+        centro_custo_api = tenant_segment_id
         print(f"   🏢 Filtrando por centro de custo: {tenant_segment_id}")
     else:
         # Se não especificado, usar 0 para todos os centros de custo
-        data["tenant_segment_id"] = 0
+        centro_custo_api = 0
         print(f"   🏢 Consultando todos os centros de custo (tenant_segment_id: 0)")
     
     print(f"🔍 DEBUG - Consultando Kolmeya SMS Acessos:")
@@ -928,206 +587,119 @@ def consultar_acessos_sms_kolmeya(start_at, end_at, limit=5000, token=None, tena
     print(f"   📅 Período: {start_at} até {end_at}")
     print(f"   🏢 Centro de custo: {tenant_segment_id}")
     print(f"   🔑 Token: {token[:10]}...")
-    print(f"   📋 Request Body: {data}")
-    print(f"   📋 Headers: {headers}")
     
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=60)  # Aumentado timeout
-        response.raise_for_status()
-        
-        data = response.json()
+    # Todas as páginas (limit <= 5000 por página): a primeira traz totalAccesses, as demais vêm em paralelo
+    def buscar_acessos_dias(inicio, fim):
+        acessos, total = buscar_acessos_kolmeya(
+            inicio.strftime('%Y-%m-%d'),
+            fim.strftime('%Y-%m-%d'),
+            token,
+            tenant_segment_id=centro_custo_api,
+            is_robot=0,  # Excluir acessos de robôs
+            limite=min(limit, LIMITE_ACESSOS_API),
+            url=url,
+            timeout=60
+        )
+        print(f"   📥 Acessos de {inicio} a {fim}: {len(acessos)} (Total informado: {total})")
+        # Acessos guardados em colunas (ver registros_kolmeya.py); a lista da API é descartada
+        return RegistrosKolmeya.de_acessos(acessos)
+    
+    def conferir_acessos_dia(dia, registros):
+        # A API só filtra por dia: o dia aberto é reaproveitado enquanto o total não muda
+        total = total_acessos_kolmeya(dia.strftime('%Y-%m-%d'), dia.strftime('%Y-%m-%d'), token,
+                                      tenant_segment_id=centro_custo_api, is_robot=0, url=url)
+        return total is not None and total == len(registros)
+    
+    # Dias fechados vêm do cache por dia (cache_dias.py); só os dias ausentes são buscados
+    conta = identificar_conta(token, url, {"tenant_segment_id": centro_custo_api, "is_robot": 0})
+    registros_acessos = carregar_por_dia(conta, 'acessos',
+                                         datetime.strptime(start_at, '%Y-%m-%d').date(),
+                                         datetime.strptime(end_at, '%Y-%m-%d').date(),
+                                         buscar_acessos_dias, campos=CAMPOS_ACESSO,
+                                         conferir=conferir_acessos_dia)
+    
+    if registros_acessos:
+        print(f"✅ Kolmeya SMS Acessos - {len(registros_acessos)} acessos no período")
         
-        # A API retorna um dicionário com 'accesses' e 'totalAccesses'
-        # Estrutura conforme documentação: {"accesses": [...], "totalAccesses": 0}
-        all_accesses = []
-        total_accesses = 0
+        # Debug do primeiro acesso
+        primeiro_acesso = registros_acessos[0]
+        print(f"🔍 DEBUG - Estrutura do primeiro acesso:")
+        print(f"   📋 Campos disponíveis: {list(primeiro_acesso.keys())}")
+        print(f"   🆔 CPF: {primeiro_acesso.get('cpf', 'N/A')}")
+        print(f"   📱 Telefone: {primeiro_acesso.get('fullphone', 'N/A')}")
+        print(f"   📅 Acessado em: {primeiro_acesso.get('accessed_at', 'N/A')}")
+        print(f"   🏢 Centro de custo: {primeiro_acesso.get('tenant_segment_id', 'N/A')}")
         
-        if isinstance(data, dict) and "accesses" in data:
-            # Formato correto da API
-            all_accesses = data["accesses"]
-            total_accesses = data.get("totalAccesses", len(all_accesses))
-            print(f"   📊 Estrutura da resposta: dicionário com {len(all_accesses)} acessos")
-        elif isinstance(data, list):
-            # Fallback para caso a API retorne lista (não esperado)
-            print(f"   ⚠️ API retornou lista em vez de dicionário (não esperado)")
-            for item in data:
-                if isinstance(item, dict) and "accesses" in item:
-                    item_accesses = item["accesses"]
-                    if item_accesses:
-                        all_accesses.extend(item_accesses)
-                        total_accesses += item.get("totalAccesses", len(item_accesses))
-        else:
-            print(f"   ❌ Estrutura de resposta inesperada: {type(data)}")
-            print(f"   📋 Conteúdo: {data}")
+        # FILTRAR ACESSOS POR DATA se o campo accessed_at estiver disponível
+        # (só saem os acessos com data fora do período)
+        data_ini_dt, data_fim_dt = limites_periodo(datetime.strptime(start_at, '%Y-%m-%d'),
+                                                   datetime.strptime(end_at, '%Y-%m-%d'))
+        tem_data, convertida, no_periodo = registros_acessos.mascaras_data(data_ini_dt, data_fim_dt)
+        fora_periodo = convertida & ~no_periodo
         
-        if all_accesses:
-            print(f"✅ Kolmeya SMS Acessos - {len(all_accesses)} acessos encontrados (Total: {total_accesses})")
-            
-            # Debug do primeiro acesso
-            primeiro_acesso = all_accesses[0]
-            print(f"🔍 DEBUG - Estrutura do primeiro acesso:")
-            print(f"   📋 Campos disponíveis: {list(primeiro_acesso.keys())}")
-            print(f"   🆔 CPF: {primeiro_acesso.get('cpf', 'N/A')}")
-            print(f"   👤 Nome: {primeiro_acesso.get('name', 'N/A')}")
-            print(f"   📱 Telefone: {primeiro_acesso.get('fullphone', 'N/A')}")
-            print(f"   💬 Mensagem: {primeiro_acesso.get('message', 'N/A')[:50]}...")
-            print(f"   🤖 É robô: {primeiro_acesso.get('is_robot', 'N/A')}")
-            print(f"   📅 Acessado em: {primeiro_acesso.get('accessed_at', 'N/A')}")
-            print(f"   🏢 Centro de custo: {primeiro_acesso.get('tenant_segment_id', 'N/A')}")
-            print(f"   📋 Job ID: {primeiro_acesso.get('job_id', 'N/A')}")
-            
-            # FILTRAR ACESSOS POR DATA se o campo accessed_at estiver disponível
-            acessos_filtrados = []
-            acessos_sem_data = 0
-            
-            for acesso in all_accesses:
-                if isinstance(acesso, dict):
-                    accessed_at = acesso.get('accessed_at')
-                    if accessed_at:
-                        try:
-                            # Tentar diferentes formatos de data
-                            data_acesso = None
-                            if isinstance(accessed_at, str):
-                                # Formato: YYYY-MM-DD HH:MM:SS
-                                if len(accessed_at) >= 19:
-                                    data_acesso = datetime.strptime(accessed_at[:19], '%Y-%m-%d %H:%M:%S')
-                                # Formato: YYYY-MM-DD
-                                elif len(accessed_at) == 10:
-                                    data_acesso = datetime.strptime(accessed_at, '%Y-%m-%d')
-                            
-                            if data_acesso:
-                                # Converter datas de entrada para datetime
-                                data_ini_dt = datetime.strptime(start_at, '%Y-%m-%d')
-                                data_fim_dt = datetime.strptime(end_at, '%Y-%m-%d')
-                                
-                                # Verificar se está no período
-                                if data_ini_dt.date() <= data_acesso.date() <= data_fim_dt.date():
-                                    acessos_filtrados.append(acesso)
-                                else:
-                                    acessos_sem_data += 1
-                            else:
-                                # Se não conseguiu parsear a data, incluir o acesso
-                                acessos_filtrados.append(acesso)
-                        except (ValueError, TypeError):
-                            # Se erro ao parsear data, incluir o acesso
-                            acessos_filtrados.append(acesso)
-                    else:
-                        # Se não tem data, incluir o acesso
-                        acessos_sem_data += 1
-                        acessos_filtrados.append(acesso)
-            
-            print(f"🔍 DEBUG - Filtro por data dos acessos:")
-            print(f"   📊 Total de acessos recebidos: {len(all_accesses)}")
-            print(f"   📊 Acessos filtrados por data: {len(acessos_filtrados)}")
-            print(f"   📊 Acessos sem data ou fora do período: {acessos_sem_data}")
-            
-            accesses = acessos_filtrados
-        else:
-            print(f"⚠️ Kolmeya SMS Acessos - Nenhum acesso encontrado")
-            print(f"   📋 Response completo: {data}")
-            accesses = []
+        acessos_filtrados = registros_acessos.filtrar(~fora_periodo)
+        acessos_sem_data = int((~tem_data).sum() + fora_periodo.sum())
         
-        return accesses
+        print(f"🔍 DEBUG - Filtro por data dos acessos:")
+        print(f"   📊 Total de acessos recebidos: {len(registros_acessos)}")
+        print(f"   📊 Acessos filtrados por data: {len(acessos_filtrados)}")
+        print(f"   📊 Acessos sem data ou fora do período: {acessos_sem_data}")
         
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erro na requisição Kolmeya SMS Acessos: {e}")
-        return []
-    except Exception as e:
-        print(f"❌ Erro inesperado na consulta Kolmeya SMS Acessos: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        accesses = acessos_filtrados
+    else:
+        print(f"⚠️ Kolmeya SMS Acessos - Nenhum acesso encontrado")
+        accesses = []
+    
+    return accesses
 
 def extrair_cpfs_acessos_kolmeya(accesses):
     """Extrai CPFs únicos dos acessos do Kolmeya."""
     cpfs = set()
-    
-    if not accesses:
-        print(f"🔍 DEBUG - Nenhum acesso fornecido para extração de CPFs")
-        return cpfs
-    
-    print(f"🔍 DEBUG - Extraindo CPFs dos acessos do Kolmeya de {len(accesses)} acessos")
-    
-    # Debug: Mostrar estrutura dos primeiros acessos
-    if accesses and len(accesses) > 0:
-        print(f"🔍 DEBUG - Estrutura do primeiro acesso:")
-        primeiro_acesso = accesses[0]
-        if isinstance(primeiro_acesso, dict):
-            print(f"   📋 Campos disponíveis: {list(primeiro_acesso.keys())}")
-            print(f"   🆔 CPF: {primeiro_acesso.get('cpf', 'N/A')}")
-            print(f"   👤 Nome: {primeiro_acesso.get('name', 'N/A')}")
-            print(f"   📱 Telefone: {primeiro_acesso.get('fullphone', 'N/A')}")
-            print(f"   🏢 Centro de custo: {primeiro_acesso.get('tenant_segment_id', 'N/A')}")
-            print(f"   📅 Acessado em: {primeiro_acesso.get('accessed_at', 'N/A')}")
-        
-        # Mostrar alguns exemplos de CPFs encontrados
-        print(f"🔍 DEBUG - Exemplos de CPFs nos acessos:")
-        for i, acesso in enumerate(accesses[:10]):  # Primeiros 10 acessos
-            if isinstance(acesso, dict):
-                cpf = acesso.get('cpf')
-                nome = acesso.get('name', 'N/A')
-                print(f"   Acesso {i+1}: CPF={cpf}, Nome={nome}")
-    
+    amostra = Amostra(logger_kolmeya)
     cpfs_validos = 0
     cpfs_invalidos = 0
     acessos_sem_cpf = 0
     
-    for i, acesso in enumerate(accesses):
-        if isinstance(acesso, dict):
+    with ResumoExecucao(logger_kolmeya, 'extrair_cpfs_acessos_kolmeya') as resumo:
+        if isinstance(accesses, RegistrosKolmeya):
+            # Registros em colunas: CPFs já limpos na conversão
+            cpfs = accesses.cpfs()
+            resumo.contar('acessos', len(accesses))
+            for chave, valor in accesses.contagem_cpfs().items():
+                resumo.contar(chave, valor)
+            resumo.contar('cpfs_unicos', len(cpfs))
+            return cpfs
+        
+        for acesso in accesses or []:
+            if not isinstance(acesso, dict):
+                continue
             # Extrair CPF do campo 'cpf' (conforme documentação da API)
             cpf = acesso.get('cpf')
             
-            # CORREÇÃO: Aceitar CPFs mesmo que não passem na validação rigorosa
             if cpf and cpf != 0:  # CPF 0 é inválido
-                # Limpar CPF
                 cpf_limpo = limpar_cpf(str(cpf))
                 
-                # Verificar se tem pelo menos 11 dígitos
+                # CPFs com 11 dígitos são aceitos mesmo sem passar na validação rigorosa
                 if cpf_limpo and len(cpf_limpo) == 11:
-                    # Tentar validar, mas aceitar mesmo se não passar na validação rigorosa
-                    if validar_cpf(cpf_limpo):
-                        cpfs.add(cpf_limpo)
-                        cpfs_validos += 1
-                        if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                            print(f"   ✅ CPF de acesso extraído (válido): {cpf_limpo}")
-                            print(f"      📱 Telefone: {acesso.get('fullphone', 'N/A')}")
-                            print(f"      👤 Nome: {acesso.get('name', 'N/A')}")
-                    else:
-                        # CPF tem 11 dígitos mas não passa na validação - aceitar mesmo assim
-                        cpfs.add(cpf_limpo)
-                        cpfs_validos += 1
-                        if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                            print(f"   ⚠️ CPF de acesso extraído (aceito): {cpf_limpo} (não passou na validação rigorosa)")
-                            print(f"      📱 Telefone: {acesso.get('fullphone', 'N/A')}")
-                            print(f"      👤 Nome: {acesso.get('name', 'N/A')}")
+                    cpfs.add(cpf_limpo)
+                    cpfs_validos += 1
+                    amostra.registrar("CPF de acesso extraído: %s (telefone %s, nome %s)",
+                                      cpf_limpo, acesso.get('fullphone'), acesso.get('name'))
                 else:
                     cpfs_invalidos += 1
-                    if cpfs_invalidos <= 3:  # Mostrar apenas os primeiros 3 para debug
-                        print(f"   ❌ CPF de acesso inválido (formato): {cpf} -> {cpf_limpo}")
+                    amostra.registrar("CPF de acesso inválido (formato): %s -> %s", cpf, cpf_limpo)
             else:
                 acessos_sem_cpf += 1
-                if acessos_sem_cpf <= 3:  # Mostrar apenas os primeiros 3 para debug
-                    print(f"   ⚠️ Acesso sem CPF válido: {acesso.get('name', 'N/A')} - CPF: {cpf}")
-                    print(f"      📱 Telefone: {acesso.get('fullphone', 'N/A')}")
-                    print(f"      🏢 Centro de custo: {acesso.get('tenant_segment_id', 'N/A')}")
-            
-            # Mostrar progresso a cada 1000 acessos processados
-            if (i + 1) % 1000 == 0:
-                print(f"   📊 Progresso: {i + 1}/{len(accesses)} acessos processados")
-    
-    print(f"🔍 DEBUG - Resumo da extração de CPFs:")
-    print(f"   📊 Total de acessos processados: {len(accesses)}")
-    print(f"   ✅ CPFs válidos extraídos: {cpfs_validos}")
-    print(f"   ❌ CPFs inválidos encontrados: {cpfs_invalidos}")
-    print(f"   ⚠️ Acessos sem CPF: {acessos_sem_cpf}")
-    print(f"   📋 CPFs únicos finais: {len(cpfs)}")
-    
-    if cpfs:
-        print(f"   📋 Primeiros 5 CPFs de acessos: {list(cpfs)[:5]}")
-        if len(cpfs) > 5:
-            print(f"   📋 Últimos 5 CPFs de acessos: {list(cpfs)[-5:]}")
+                amostra.registrar("Acesso sem CPF: %s (telefone %s, centro de custo %s)",
+                                  acesso.get('name'), acesso.get('fullphone'), acesso.get('tenant_segment_id'))
+        
+        resumo.contar('acessos', len(accesses) if accesses else 0)
+        resumo.contar('cpfs_validos', cpfs_validos)
+        resumo.contar('cpfs_invalidos', cpfs_invalidos)
+        resumo.contar('sem_cpf', acessos_sem_cpf)
+        resumo.contar('cpfs_unicos', len(cpfs))
     
-    return cpfs
+    return ConjuntoIds.de_textos(cpfs)
 
 def testar_acessos_kolmeya(token=None, start_at=None, end_at=None, tenant_segment_id=None):
     """
@@ -1179,7 +751,7 @@ def testar_acessos_kolmeya(token=None, start_at=None, end_at=None, tenant_segmen
         # Mostrar alguns CPFs
         if cpfs:
             print(f"📋 Primeiros 10 CPFs encontrados:")
-            for i, cpf in enumerate(list(cpfs)[:10]):
+            for i, cpf in enumerate(cpfs.textos(10)):
                 print(f"   {i+1}. {cpf}")
         
         return acessos
@@ -1187,7 +759,7 @@ def testar_acessos_kolmeya(token=None, start_at=None, end_at=None, tenant_segmen
         print("❌ Nenhum acesso encontrado")
         return []
 
-def consultar_andamento_propostas_facta(cpfs, token=None, ambiente="homologacao"):
+def consultar_andamento_propostas_facta(cpfs, token=None, ambiente="homologacao", progresso=None, usar_cache=True):
     """
     Consulta o andamento de propostas no FACTA para os CPFs fornecidos.
     
@@ -1195,6 +767,8 @@ def consultar_andamento_propostas_facta(cpfs, token=None, ambiente="homologacao"
         cpfs: Lista de CPFs para consultar
         token: Token de autenticação do FACTA
         ambiente: "homologacao" ou "producao"
+        progresso: Callback opcional (concluidos, total, cpf, propostas) chamado a cada CPF
+        usar_cache: Se True, reaproveita o cache local de propostas (facta_cache.db)
     
     Returns:
         Lista de propostas encontradas com seus valores AF
@@ -1238,69 +812,12 @@ def consultar_andamento_propostas_facta(cpfs, token=None, ambiente="homologacao"
     print(f"   📊 CPFs para consulta: {len(cpfs)}")
     print(f"   🏢 Ambiente: {ambiente}")
     
-    todas_propostas = []
-    
-    # Processar CPFs em lotes para evitar timeout
-    lote_size = 10  # Consultar 10 CPFs por vez
-    for i in range(0, len(cpfs), lote_size):
-        lote_cpfs = list(cpfs)[i:i+lote_size]
-        print(f"   📋 Processando lote {i//lote_size + 1}: CPFs {i+1}-{min(i+lote_size, len(cpfs))}")
-        
-        for cpf in lote_cpfs:
-            try:
-                # Parâmetros da consulta - CORREÇÃO: Remover filtros desnecessários
-                params = {
-                    "cpf": cpf,
-                    "quantidade": 5000  # Máximo de registros por página
-                }
-                
-                
-                
-                print(f"      🔍 Consultando CPF: {cpf}")
-                print(f"      📋 Parâmetros: {params}")
-                
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                print(f"      📊 Status Code: {response.status_code}")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                print(f"      📄 Resposta FACTA: {data}")
-                
-                # CORREÇÃO: Verificar se não há erro (erro = false significa sucesso)
-                if not data.get("erro", False):
-                    propostas = data.get("propostas", [])
-                    if propostas:
-                        print(f"      ✅ CPF {cpf}: {len(propostas)} propostas encontradas")
-                        
-                        for proposta in propostas:
-                            # Extrair informações relevantes
-                            proposta_info = {
-                                "cpf": cpf,
-                                "cliente": proposta.get("cliente", ""),
-                                "codigo_af": proposta.get("codigo_af", ""),
-                                "valor_af": proposta.get("valor_af", 0),
-                                "status_proposta": proposta.get("status_proposta", ""),
-                                "data_movimento": proposta.get("data_movimento", ""),
-                                "convenio": proposta.get("convenio", ""),
-                                "averbador": proposta.get("averbador", ""),
-                                "produto": proposta.get("produto", ""),
-                                "valor_bruto": proposta.get("valor_bruto", 0),
-                                "saldo_devedor": proposta.get("saldo_devedor", 0)
-                            }
-                            todas_propostas.append(proposta_info)
-                    else:
-                        print(f"      ⚠️ CPF {cpf}: Nenhuma proposta encontrada")
-                else:
-                    print(f"      ❌ CPF {cpf}: Erro na consulta - {data.get('mensagem', 'Erro desconhecido')}")
-                
-                # Pequena pausa entre consultas para não sobrecarregar a API
-                time.sleep(0.5)
-                
-            except requests.exceptions.RequestException as e:
-                print(f"      ❌ Erro na requisição para CPF {cpf}: {e}")
-            except Exception as e:
-                print(f"      ❌ Erro inesperado para CPF {cpf}: {e}")
+    # Consultas em paralelo, limitadas pela cota do FACTA (token bucket compartilhado)
+    if usar_cache:
+        # Só CPFs ausentes ou vencidos no cache vão ao FACTA
+        todas_propostas = consultar_propostas_com_cache(cpfs, url, headers, ambiente.lower(), progresso=progresso)
+    else:
+        todas_propostas = consultar_cpfs_facta_concorrente(cpfs, url, headers, progresso=progresso)
     
     print(f"✅ FACTA Andamento de Propostas - {len(todas_propostas)} propostas encontradas")
     
@@ -1374,7 +891,7 @@ def consultar_todas_propostas_facta(token=None, ambiente="homologacao", data_ini
             print(f"   📋 Consultando página {pagina}...")
             print(f"   📋 Parâmetros: {params}")
             
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = http_get(url, headers=headers, params=params, timeout=30)
             print(f"   📊 Status Code: {response.status_code}")
             
             response.raise_for_status()
@@ -1484,13 +1001,13 @@ def testar_api_facta(token=None, ambiente="homologacao"):
     print(f"   🏢 Ambiente: {ambiente}")
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = http_get(url, headers=headers, params=params, timeout=30)
         print(f"   📊 Status Code: {response.status_code}")
         
         if response.status_code == 200:
             data = response.json()
             print(f"   ✅ API FACTA respondendo corretamente")
-            print(f"   📄 Resposta: {data}")
+            logger_facta.debug("Resposta do teste FACTA: %s", data)
             return True
         elif response.status_code == 401:
             print(f"   ❌ Erro 401: Token inválido ou expirado")
@@ -1512,7 +1029,21 @@ def testar_api_facta(token=None, ambiente="homologacao"):
         print(f"   ❌ Erro inesperado no teste: {e}")
         return False
 
-def consultar_cpfs_diretamente_kolmeya(start_at, end_at, limit=30000, token=None, tenant_segment_id=None):
+def api_facta_disponivel(token=None, ambiente="homologacao", forcar=False):
+    """
+    testar_api_facta com o resultado guardado (SAUDE_TTL_OK / SAUDE_TTL_FALHA em disjuntor.py).
+
+    As consultas integradas checam o FACTA antes de começar; com o resultado guardado,
+    reruns seguidos não repetem o teste a cada vez.
+    """
+    if token is None:
+        token = get_facta_token()
+    if not token:
+        return testar_api_facta(token=token, ambiente=ambiente)
+    return saude_cacheada(("facta", ambiente.lower(), token),
+                          lambda: testar_api_facta(token=token, ambiente=ambiente), forcar=forcar)
+
+def consultar_cpfs_diretamente_kolmeya(start_at, end_at, limit=30000, token=None, tenant_segment_id=None, usar_cache=True):
     """
     Consulta diretamente o endpoint de status de SMS do Kolmeya e extrai CPFs.
     
@@ -1522,9 +1053,10 @@ def consultar_cpfs_diretamente_kolmeya(start_at, end_at, limit=30000, token=None
         limit: Limite de mensagens a consultar
         token: Token do Kolmeya
         tenant_segment_id: Centro de custo (opcional)
+        usar_cache: Se True, usa o armazenamento local de status (kolmeya_store.py)
     
     Returns:
-        Lista de CPFs únicos encontrados
+        CPFs únicos encontrados (ConjuntoIds; lista vazia em caso de erro)
     """
     if token is None:
         token = get_kolmeya_token()
@@ -1538,115 +1070,31 @@ def consultar_cpfs_diretamente_kolmeya(start_at, end_at, limit=30000, token=None
         print("❌ Token do Kolmeya parece inválido (muito curto)")
         return []
     
-    url = "https://kolmeya.com.br/api/v1/sms/reports/statuses"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    
-    body = {
-        "start_at": start_at,
-        "end_at": end_at,
-        "limit": min(limit, 30000)  # Máximo permitido pela API
-    }
-    
-    print(f"🔍 DEBUG - Consultando CPFs diretamente do endpoint de status:")
-    print(f"   🌐 URL: {url}")
-    print(f"   📅 Período: {start_at} a {end_at}")
-    print(f"   🏢 Centro de custo: {tenant_segment_id}")
-    print(f"   📋 Request body: {body}")
-    
     try:
-        resp = requests.post(url, headers=headers, json=body, timeout=60)
+        # Janelas divididas automaticamente quando atingem o limite de 30.000 por requisição;
+        # só os campos usados pelo dashboard são mantidos (decodificação em fluxo com ijson)
+        if usar_cache:
+            messages = sincronizar_status_kolmeya(start_at, end_at, token, limite=limit, timeout=60,
+                                                  campos=CAMPOS_PROJETADOS_STATUS)
+        else:
+            messages = buscar_status_kolmeya(start_at, end_at, token, limite=limit, timeout=60,
+                                             campos=CAMPOS_PROJETADOS_STATUS)
         
-        print(f"   📊 Status Code: {resp.status_code}")
+        logger_kolmeya.debug("Comparação: %d mensagens de %s a %s; primeira: %s",
+                             len(messages), start_at, end_at, messages[0] if messages else None)
         
-        if resp.status_code == 200:
-            data = resp.json()
-            messages = data.get("messages", [])
-            
-            print(f"✅ Resposta recebida: {len(messages)} mensagens")
-            
-            # Debug da primeira mensagem
-            if messages and len(messages) > 0:
-                primeira_msg = messages[0]
-                print(f"🔍 DEBUG - Estrutura da primeira mensagem:")
-                print(f"   📋 Campos disponíveis: {list(primeira_msg.keys())}")
-                print(f"   🆔 CPF: {primeira_msg.get('cpf', 'N/A')}")
-                print(f"   📱 Telefone: {primeira_msg.get('telefone', 'N/A')}")
-                print(f"   🏢 Centro de custo: {primeira_msg.get('centro_custo', 'N/A')}")
-                print(f"   📅 Enviada em: {primeira_msg.get('enviada_em', 'N/A')}")
-            
-            # Extrair CPFs das mensagens
-            cpfs = set()
-            cpfs_validos = 0
-            cpfs_invalidos = 0
-            mensagens_sem_cpf = 0
-            
-            for i, msg in enumerate(messages):
-                if isinstance(msg, dict):
-                    # Campo 'cpf' da API
-                    cpf = msg.get('cpf')
-                    
-                    # CORREÇÃO: Aceitar CPFs mesmo que não passem na validação rigorosa
-                    if cpf and cpf != 0:  # CPF 0 é inválido
-                        valor_str = str(cpf).strip()
-                        
-                        # Limpar CPF
-                        cpf_limpo = limpar_cpf(valor_str)
-                        
-                        # Verificar se tem pelo menos 11 dígitos
-                        if cpf_limpo and len(cpf_limpo) == 11:
-                            # Tentar validar, mas aceitar mesmo se não passar na validação rigorosa
-                            if validar_cpf(cpf_limpo):
-                                cpfs.add(cpf_limpo)
-                                cpfs_validos += 1
-                                if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                                    print(f"   ✅ CPF extraído (válido): {cpf_limpo}")
-                            else:
-                                # CPF tem 11 dígitos mas não passa na validação - aceitar mesmo assim
-                                cpfs.add(cpf_limpo)
-                                cpfs_validos += 1
-                                if len(cpfs) <= 5:  # Mostrar apenas os primeiros 5 para debug
-                                    print(f"   ⚠️ CPF extraído (aceito): {cpf_limpo} (não passou na validação rigorosa)")
-                        else:
-                            cpfs_invalidos += 1
-                            if cpfs_invalidos <= 3:  # Mostrar apenas os primeiros 3 para debug
-                                print(f"   ❌ CPF inválido (formato): {cpf} -> {cpf_limpo}")
-                    else:
-                        mensagens_sem_cpf += 1
-                        if mensagens_sem_cpf <= 3:  # Mostrar apenas os primeiros 3 para debug
-                            print(f"   ⚠️ Mensagem sem CPF válido: {msg.get('telefone', 'N/A')} - CPF: {cpf}")
-                
-                # Mostrar progresso a cada 1000 mensagens processadas
-                if (i + 1) % 1000 == 0:
-                    print(f"   📊 Progresso: {i + 1}/{len(messages)} mensagens processadas")
-            
-            print(f"🔍 DEBUG - Resumo da extração de CPFs do endpoint:")
-            print(f"   📊 Total de mensagens processadas: {len(messages)}")
-            print(f"   ✅ CPFs válidos extraídos: {cpfs_validos}")
-            print(f"   ❌ CPFs inválidos encontrados: {cpfs_invalidos}")
-            print(f"   ⚠️ Mensagens sem CPF: {mensagens_sem_cpf}")
-            print(f"   📋 CPFs únicos finais: {len(cpfs)}")
-            
-            if cpfs:
-                print(f"   📋 Primeiros 5 CPFs: {list(cpfs)[:5]}")
-                if len(cpfs) > 5:
-                    print(f"   📋 Últimos 5 CPFs: {list(cpfs)[-5:]}")
-            
-            return list(cpfs)
-            
-        elif resp.status_code == 401:
+        # Mesma extração dos painéis: amostra em DEBUG e uma linha de resumo
+        return extrair_cpfs_kolmeya(messages)
+        
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code == 401:
             print(f"   ❌ Erro 401: Token inválido ou expirado")
-            return []
-        elif resp.status_code == 403:
+        elif status_code == 403:
             print(f"   ❌ Erro 403: Acesso negado")
-            return []
         else:
-            print(f"   ❌ Erro HTTP {resp.status_code}: {resp.text}")
-            return []
-            
+            print(f"   ❌ Erro HTTP {status_code}: {e.response.text if e.response is not None else e}")
+        return []
     except requests.exceptions.Timeout:
         print("   ❌ Timeout na requisição")
         return []
@@ -1710,7 +1158,7 @@ def consultar_andamento_propostas_por_endpoint_direto(start_at, end_at, limit=30
     
     # 2. Testar conectividade com FACTA antes de consultar
     print(f"\n🧪 Passo 2: Testando conectividade com API FACTA...")
-    if not testar_api_facta(token=token_facta, ambiente=ambiente_facta):
+    if not api_facta_disponivel(token=token_facta, ambiente=ambiente_facta):
         print("❌ API FACTA não está respondendo. Finalizando consulta.")
         return {
             "cpfs": cpfs,
@@ -1722,7 +1170,7 @@ def consultar_andamento_propostas_por_endpoint_direto(start_at, end_at, limit=30
     # 3. Consultar propostas do FACTA
     print(f"\n📋 Passo 3: Consultando propostas do FACTA...")
     propostas = consultar_andamento_propostas_facta(
-        cpfs=set(cpfs),  # Converter para set
+        cpfs=cpfs.textos(),  # CPFs em texto para a consulta
         token=token_facta,
         ambiente=ambiente_facta
     )
@@ -1798,7 +1246,7 @@ def consultar_andamento_propostas_por_envios(start_at, end_at, limit=5000, token
     
     # 3. Testar conectividade com FACTA antes de consultar
     print(f"\n🧪 Passo 3a: Testando conectividade com API FACTA...")
-    if not testar_api_facta(token=token_facta, ambiente=ambiente_facta):
+    if not api_facta_disponivel(token=token_facta, ambiente=ambiente_facta):
         print("❌ API FACTA não está respondendo. Finalizando consulta.")
         return {
             "mensagens": messages,
@@ -1889,7 +1337,7 @@ def consultar_andamento_propostas_por_acessos(start_at, end_at, limit=5000, toke
     
     # 3. Testar conectividade com FACTA antes de consultar
     print(f"\n🧪 Passo 3a: Testando conectividade com API FACTA...")
-    if not testar_api_facta(token=token_facta, ambiente=ambiente_facta):
+    if not api_facta_disponivel(token=token_facta, ambiente=ambiente_facta):
         print("❌ API FACTA não está respondendo. Finalizando consulta.")
         return {
             "acessos": acessos,
@@ -1921,309 +1369,34 @@ def consultar_andamento_propostas_por_acessos(start_at, end_at, limit=5000, toke
 
 @st.cache_data(ttl=600)
 def ler_base(uploaded_file):
-    if uploaded_file.name.endswith('.csv'):
-        try:
-            return pd.read_csv(uploaded_file, dtype=str, sep=';')
-        except Exception:
-            uploaded_file.seek(0)
-            try:
-                return pd.read_csv(uploaded_file, dtype=str, sep=',')
-            except Exception:
-                uploaded_file.seek(0)
-                try:
-                    return pd.read_csv(uploaded_file, dtype=str)
-                except Exception as e:
-                    uploaded_file.seek(0)
-                    raise e
-    else:
-        return pd.read_excel(uploaded_file, dtype=str)
+    # Cache em disco pelo hash do conteúdo (vale depois de reinícios); o hash também é a chave do perfil
+    return carregar_base(uploaded_file.name, uploaded_file.getvalue())
 
 def extrair_ura_da_base(df, data_ini=None, data_fim=None, apenas_fgts=False):
     """Extrai e conta registros com UTM source = 'URA' da base carregada, separados por status e opcionalmente filtrados por data."""
-    print(f"🔍 DEBUG - INICIANDO extrair_ura_da_base")
-    print(f"   📊 DataFrame shape: {df.shape if df is not None else 'None'}")
-    print(f"   📋 Colunas disponíveis: {list(df.columns) if df is not None else 'None'}")
-    print(f"   🎯 Apenas FGTS: {apenas_fgts}")
-    
     ura_count = 0
-    ura_por_status = {
-        'Novo': 0,
-        'FGTS': 0,
-        'CLT': 0,
-        'Outros': 0
-    }
-    ura_cpfs_por_status = {
-        'Novo': set(),
-        'FGTS': set(),
-        'CLT': set(),
-        'Outros': set()
-    }
-    
-    # NOVO: Lista para armazenar todos os registros URA encontrados
+    ura_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
+    ura_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
     registros_ura = []
     
     # Verifica se há dados válidos na base
     if df is None or df.empty:
         return ura_count, ura_por_status, ura_cpfs_por_status, registros_ura
     
-    # Procura por colunas que podem conter UTM source
-    colunas_utm = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['utm', 'source', 'origem', 'fonte']):
-            colunas_utm.append(col)
-    
-    # Se não encontrar colunas específicas, procura por qualquer coluna que contenha "utm"
-    if not colunas_utm:
-        for col in df.columns:
-            if 'utm' in col.lower():
-                colunas_utm.append(col)
-    
-    # Se ainda não encontrou, procura por colunas que contenham "source"
-    if not colunas_utm:
-        for col in df.columns:
-            if 'source' in col.lower():
-                colunas_utm.append(col)
-    
-    # Se não encontrou nenhuma coluna UTM, retorna zeros
-    if not colunas_utm:
+    # Filtro sobre o perfil da base (calculado uma vez por upload, ver perfil_base.py)
+    perfil = obter_perfil_base(df)
+    if not perfil.colunas_utm:
         return ura_count, ura_por_status, ura_cpfs_por_status, registros_ura
     
-    # Procura por colunas que podem conter CPFs
-    colunas_cpf = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['cpf', 'document', 'documento', 'cnpj']):
-            colunas_cpf.append(col)
-    
-    # Se não encontrar colunas específicas de CPF, usa todas as colunas
-    if not colunas_cpf:
-        colunas_cpf = df.columns.tolist()
-    
-    # Procura por colunas de status
-    colunas_status = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['status', 'categoria', 'tipo', 'segmento']):
-            colunas_status.append(col)
-    
-    # Se não encontrar colunas específicas de status, procura por qualquer coluna que contenha "status"
-    if not colunas_status:
-        for col in df.columns:
-            if 'status' in col.lower():
-                colunas_status.append(col)
-    
-    # MELHORIA: Procura por colunas de data com prioridade para colunas específicas
-    colunas_data = []
-    colunas_data_prioridade = []
-    
-    # Primeiro, procura por colunas com nomes específicos (prioridade alta)
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['data criacao', 'data_criacao', 'criacao', 'created', 'data_created']):
-            colunas_data_prioridade.append(col)
-        elif any(keyword in col_lower for keyword in ['data', 'date', 'timestamp', 'hora', 'time']):
-            colunas_data.append(col)
-    
-    # Usa as colunas de prioridade alta primeiro, depois as outras
-    colunas_data_finais = colunas_data_prioridade + colunas_data
-    
-    # Conta registros com valor "URA"
-    print(f"🔍 DEBUG - Extraindo URA da base:")
-    print(f"   📊 Total de registros na base: {len(df)}")
-    print(f"   📅 Filtro de data: {data_ini} a {data_fim}")
-    print(f"   📋 Colunas de data encontradas: {colunas_data_finais}")
-    print(f"   📋 Colunas UTM encontradas: {colunas_utm}")
-    
-    # Debug: Mostrar alguns valores das colunas de data para verificar formato
-    if colunas_data_finais:
-        print(f"🔍 DEBUG - Verificando formato das colunas de data:")
-        for col in colunas_data_finais[:3]:  # Primeiras 3 colunas de data
-            valores_unicos = df[col].dropna().unique()
-            print(f"   📋 Coluna '{col}': {valores_unicos[:5]}")  # Primeiros 5 valores
-    
-    for idx, row in df.iterrows():
-        # Verifica se tem UTM source = "URA"
-        tem_ura = False
-        for col in colunas_utm:
-            valor = row[col] if col in row else None
-            if valor is not None:
-                valor_str = str(valor).strip().upper()
-                if valor_str == "URA":
-                    tem_ura = True
-                    break
-        
-        if tem_ura:
-            # MELHORIA: Filtro de data mais inteligente
-            data_valida = False
-            data_encontrada = None
-            
-            if data_ini and data_fim and colunas_data_finais:
-                # Tenta encontrar uma data válida nas colunas de data
-                for col in colunas_data_finais:
-                    try:
-                        data_str = str(row[col])
-                        if pd.notna(data_str) and data_str.strip():
-                            # Tenta diferentes formatos de data
-                            data_criacao = None
-                            
-                            # Formato: DD/MM/YYYY HH:MM (formato brasileiro)
-                            if len(data_str) >= 16 and '/' in data_str and ':' in data_str:
-                                try:
-                                    data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M')
-                                except ValueError:
-                                    # Tentar formato sem segundos
-                                    if len(data_str) >= 19:
-                                        data_criacao = datetime.strptime(data_str[:19], '%d/%m/%Y %H:%M:%S')
-                            # Formato: DD/MM/YYYY
-                            elif len(data_str) == 10 and '/' in data_str:
-                                data_criacao = datetime.strptime(data_str, '%d/%m/%Y')
-                            # Formato: YYYY-MM-DD HH:MM:SS
-                            elif len(data_str) >= 19 and '-' in data_str:
-                                try:
-                                    data_criacao = datetime.strptime(data_str[:19], '%Y-%m-%d %H:%M:%S')
-                                except ValueError:
-                                    # Tentar formato sem segundos
-                                    if len(data_str) >= 16:
-                                        data_criacao = datetime.strptime(data_str[:16], '%Y-%m-%d %H:%M')
-                            # Formato: YYYY-MM-DD
-                            elif len(data_str) == 10 and '-' in data_str:
-                                data_criacao = datetime.strptime(data_str, '%Y-%m-%d')
-                            
-                            if data_criacao:
-                                data_ini_dt = datetime.combine(data_ini, datetime.min.time())
-                                data_fim_dt = datetime.combine(data_fim, datetime.max.time())
-                                
-                                # Debug para os primeiros registros
-                                if ura_count < 3:
-                                    print(f"   🔍 DEBUG - Registro URA linha {idx + 1}:")
-                                    print(f"      📅 Data encontrada: {data_str} -> {data_criacao}")
-                                    print(f"      📅 Range filtro: {data_ini_dt} a {data_fim_dt}")
-                                    print(f"      ✅ Data válida: {data_ini_dt <= data_criacao <= data_fim_dt}")
-                                
-                                if data_ini_dt <= data_criacao <= data_fim_dt:
-                                    data_valida = True
-                                    data_encontrada = data_criacao
-                                    break
-                    except (ValueError, TypeError) as e:
-                        if ura_count < 3:
-                            print(f"      ❌ Erro ao parsear data '{data_str}': {e}")
-                        continue
-            else:
-                # Se não há filtro de data, considerar válido
-                data_valida = True
-            
-            # Se a data é válida ou não há filtro, processar o registro
-            if data_valida:
-                # NOVO: Verificar se deve filtrar apenas FGTS
-                if apenas_fgts:
-                    # Verificar se o registro é de FGTS
-                    eh_fgts = False
-                    for col in colunas_status:
-                        valor_status = row[col] if col in row else None
-                        if valor_status is not None:
-                            valor_status_str = str(valor_status).strip().upper()
-                            if valor_status_str.startswith('FGTS'):
-                                eh_fgts = True
-                                break
-                    
-                    # Se não é FGTS e estamos filtrando apenas FGTS, pular
-                    if not eh_fgts:
-                        if ura_count < 3:
-                            print(f"      ❌ Registro URA REJEITADO (não é FGTS)")
-                        continue
-                
-                ura_count += 1
-                
-                # Extrai CPF do registro
-                cpf_encontrado = None
-                for col in colunas_cpf:
-                    valor_cpf = row[col] if col in row else None
-                    if valor_cpf is not None:
-                        valor_cpf_str = str(valor_cpf).strip()
-                        # Usar a nova função de limpeza de CPF
-                        cpf_limpo = limpar_cpf(valor_cpf_str)
-                        if cpf_limpo and len(cpf_limpo) == 11 and validar_cpf(cpf_limpo):
-                            cpf_encontrado = cpf_limpo
-                            break
-                
-                # Categoriza por status
-                status_encontrado = False
-                for col in colunas_status:
-                    valor_status = row[col] if col in row else None
-                    if valor_status is not None:
-                        valor_status_str = str(valor_status).strip().upper()
-                        if valor_status_str.startswith('INSS'):
-                            ura_por_status['Novo'] += 1
-                            if cpf_encontrado:
-                                ura_cpfs_por_status['Novo'].add(cpf_encontrado)
-                            status_encontrado = True
-                            break
-                        elif valor_status_str.startswith('FGTS'):
-                            ura_por_status['FGTS'] += 1
-                            if cpf_encontrado:
-                                ura_cpfs_por_status['FGTS'].add(cpf_encontrado)
-                            status_encontrado = True
-                            break
-                        elif valor_status_str.startswith('CLT'):
-                            ura_por_status['CLT'] += 1
-                            if cpf_encontrado:
-                                ura_cpfs_por_status['CLT'].add(cpf_encontrado)
-                            status_encontrado = True
-                            break
-                
-                if not status_encontrado:
-                    ura_por_status['Outros'] += 1
-                    if cpf_encontrado:
-                        ura_cpfs_por_status['Outros'].add(cpf_encontrado)
-                
-                # Adicionar registro completo à lista com informações de data
-                status_registro = 'Outros'
-                for col in colunas_status:
-                    valor_status = row[col] if col in row else None
-                    if valor_status is not None:
-                        valor_status_str = str(valor_status).strip().upper()
-                        if valor_status_str.startswith('INSS'):
-                            status_registro = 'Novo'
-                            break
-                        elif valor_status_str.startswith('FGTS'):
-                            status_registro = 'FGTS'
-                            break
-                        elif valor_status_str.startswith('CLT'):
-                            status_registro = 'CLT'
-                            break
-                
-                registro_ura = {
-                    'linha': idx + 1,  # +1 para linha humana (não índice)
-                    'cpf': cpf_encontrado,
-                    'status': status_registro,
-                    'data_encontrada': data_encontrada.strftime('%d/%m/%Y %H:%M') if data_encontrada else 'N/A',
-                    'dados_completos': row.to_dict()
-                }
-                registros_ura.append(registro_ura)
-                
-                if ura_count <= 3:
-                    print(f"      ✅ Registro URA ACEITO (Total: {ura_count})")
-            else:
-                if ura_count < 3:
-                    print(f"      ❌ Registro URA REJEITADO pelo filtro de data")
+    mascara, data_encontrada = perfil.filtrar_canal('URA', data_ini, data_fim, apenas_fgts)
+    ura_count, ura_por_status, ura_cpfs_por_status = perfil.resumir_canal(mascara)
+    registros_ura = perfil.registros_canal(mascara, data_encontrada)
     
-    # Log final dos resultados
     print(f"🔍 DEBUG - Resultados da extração URA:")
+    print(f"   📅 Filtro de data: {data_ini} a {data_fim} (apenas FGTS: {apenas_fgts})")
     print(f"   📊 Total de registros URA encontrados: {ura_count}")
     print(f"   📋 Distribuição por status: {ura_por_status}")
     print(f"   📋 CPFs únicos por status: {dict((k, len(v)) for k, v in ura_cpfs_por_status.items())}")
-    print(f"   📋 Total de registros URA retornados: {len(registros_ura)}")
-    
-    # Debug adicional: Mostrar distribuição por data se houver filtro
-    if data_ini and data_fim and registros_ura:
-        print(f"🔍 DEBUG - Distribuição por data dos registros URA:")
-        datas_unicas = set()
-        for reg in registros_ura:
-            if reg['data_encontrada'] != 'N/A':
-                datas_unicas.add(reg['data_encontrada'][:10])  # Apenas a data (DD/MM/YYYY)
-        
-        print(f"   📅 Datas únicas encontradas: {sorted(list(datas_unicas))}")
     
     return ura_count, ura_por_status, ura_cpfs_por_status, registros_ura
 
@@ -2232,53 +1405,30 @@ def filtrar_mensagens_por_data(messages, data_ini, data_fim):
     if not messages or not data_ini or not data_fim:
         return messages
     
-    # CORREÇÃO: Usar timezone brasileiro para consistência
-    from datetime import timezone, timedelta
-    tz_brasil = timezone(timedelta(hours=-3))
-    
-    # Converte as datas para datetime com timezone brasileiro
-    data_ini_dt = datetime.combine(data_ini, datetime.min.time()).replace(tzinfo=tz_brasil)
-    data_fim_dt = datetime.combine(data_fim, datetime.max.time()).replace(tzinfo=tz_brasil)
+    # Datas convertidas em coluna, no fuso de São Paulo (ver datas_vetorizadas.py)
+    data_ini_dt, data_fim_dt = limites_periodo(data_ini, data_fim)
     
     print(f"🔍 DEBUG - Filtro por data (fuso BR):")
     print(f"   📅 Data inicial: {data_ini} -> {data_ini_dt}")
     print(f"   📅 Data final: {data_fim} -> {data_fim_dt}")
     print(f"   📊 Mensagens antes do filtro: {len(messages)}")
     
-    mensagens_filtradas = []
-    mensagens_processadas = 0
-    mensagens_fora_periodo = 0
-    
-    for msg in messages:
-        if isinstance(msg, dict):
-            # Campo 'enviada_em' da nova API (formato: dd/mm/yyyy hh:mm)
-            if 'enviada_em' in msg and msg['enviada_em']:
-                try:
-                    data_str = str(msg['enviada_em'])
-                    # Formato: DD/MM/YYYY HH:MM
-                    if len(data_str) >= 16 and '/' in data_str:
-                        # CORREÇÃO: Assumir que a data da API está no fuso brasileiro
-                        data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M').replace(tzinfo=tz_brasil)
-                        mensagens_processadas += 1
-                        
-                        # Se está no período, inclui a mensagem
-                        if data_ini_dt <= data_criacao <= data_fim_dt:
-                            mensagens_filtradas.append(msg)
-                            if mensagens_processadas <= 5:  # Mostrar apenas as primeiras 5 para debug
-                                print(f"   ✅ Mensagem incluída: {data_str} (criada em {data_criacao})")
-                        else:
-                            mensagens_fora_periodo += 1
-                            if mensagens_processadas <= 5:  # Mostrar apenas as primeiras 5 para debug
-                                print(f"   ❌ Mensagem fora do período: {data_str} (criada em {data_criacao})")
-                                print(f"      Comparação: {data_ini_dt} <= {data_criacao} <= {data_fim_dt}")
-                except (ValueError, TypeError) as e:
-                    print(f"   ⚠️ Erro ao processar data '{data_str}': {e}")
-                    continue
-            else:
-                # Se não tem campo 'enviada_em', incluir a mensagem (não filtrar)
-                mensagens_filtradas.append(msg)
-                if mensagens_processadas <= 5:
-                    print(f"   ⚠️ Mensagem sem data incluída (sem filtro): {msg.get('id', 'N/A')}")
+    if isinstance(messages, RegistrosKolmeya):
+        # Registros em colunas: datas já convertidas
+        tem_data, processadas, no_periodo = messages.mascaras_data(data_ini_dt, data_fim_dt)
+        mensagens_filtradas = messages.filtrar(~tem_data | no_periodo)
+    else:
+        datas = datas_do_campo(messages, 'enviada_em')
+        eh_mensagem = np.fromiter((isinstance(msg, dict) for msg in messages), dtype=bool, count=len(messages))
+        tem_data = np.fromiter((isinstance(msg, dict) and bool(msg.get('enviada_em')) for msg in messages),
+                               dtype=bool, count=len(messages))
+        processadas = datas.notna().to_numpy()
+        no_periodo = mascara_intervalo(datas, data_ini_dt, data_fim_dt)
+        
+        # Mensagens sem 'enviada_em' entram sem filtro; datas que não convertem ficam de fora
+        mensagens_filtradas = filtrar_por_mascara(messages, eh_mensagem & (~tem_data | no_periodo))
+    mensagens_processadas = int(processadas.sum())
+    mensagens_fora_periodo = int((processadas & ~no_periodo).sum())
     
     print(f"   📊 Mensagens processadas: {mensagens_processadas}")
     print(f"   📊 Mensagens incluídas: {len(mensagens_filtradas)}")
@@ -2299,7 +1449,7 @@ def filtrar_mensagens_por_data(messages, data_ini, data_fim):
 
 def obter_cpfs_fgts_4net_kolmeya(uploaded_file, data_ini, data_fim, messages):
     """Obtém CPFs de FGTS tanto do 4NET quanto do Kolmeya."""
-    cpfs_fgts = set()
+    cpfs_fgts = ConjuntoIds()
     
     # CPFs do 4NET (URA)
     if uploaded_file is not None:
@@ -2308,8 +1458,8 @@ def obter_cpfs_fgts_4net_kolmeya(uploaded_file, data_ini, data_fim, messages):
             ura_count, ura_por_status, ura_cpfs_por_status, registros_ura = extrair_ura_da_base(df_base, data_ini, data_fim, apenas_fgts=True)
             
             # Adicionar CPFs de FGTS do 4NET
-            cpfs_fgts.update(ura_cpfs_por_status.get('FGTS', set()))
-            print(f"CPFs FGTS encontrados no 4NET: {len(ura_cpfs_por_status.get('FGTS', set()))}")
+            cpfs_fgts = cpfs_fgts | ura_cpfs_por_status.get('FGTS', ConjuntoIds())
+            print(f"CPFs FGTS encontrados no 4NET: {len(ura_cpfs_por_status.get('FGTS', ConjuntoIds()))}")
         except Exception as e:
             print(f"Erro ao extrair CPFs FGTS do 4NET: {e}")
     
@@ -2321,33 +1471,16 @@ def obter_cpfs_fgts_4net_kolmeya(uploaded_file, data_ini, data_fim, messages):
         
         # Extrair CPFs das mensagens de FGTS
         cpfs_kolmeya_fgts = extrair_cpfs_kolmeya(mensagens_fgts)
-        cpfs_fgts.update(cpfs_kolmeya_fgts)
+        cpfs_fgts = cpfs_fgts | cpfs_kolmeya_fgts
         print(f"CPFs FGTS encontrados no Kolmeya: {len(cpfs_kolmeya_fgts)}")
     
     return cpfs_fgts
 
 def extrair_whatsapp_da_base(df, data_ini=None, data_fim=None, apenas_fgts=False):
     """Extrai e conta registros com UTM source = 'WHATSAPP_MKT' da base carregada, separados por status e opcionalmente filtrados por data."""
-    print(f"🔍 DEBUG - INICIANDO extrair_whatsapp_da_base")
-    print(f"   📊 DataFrame shape: {df.shape if df is not None else 'None'}")
-    print(f"   📋 Colunas disponíveis: {list(df.columns) if df is not None else 'None'}")
-    print(f"   🎯 Apenas FGTS: {apenas_fgts}")
-    
     whatsapp_count = 0
-    whatsapp_por_status = {
-        'Novo': 0,
-        'FGTS': 0,
-        'CLT': 0,
-        'Outros': 0
-    }
-    whatsapp_cpfs_por_status = {
-        'Novo': set(),
-        'FGTS': set(),
-        'CLT': set(),
-        'Outros': set()
-    }
-    
-    # NOVO: Lista para armazenar todos os registros WhatsApp encontrados
+    whatsapp_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
+    whatsapp_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
     registros_whatsapp = []
     
     # Verifica se há dados válidos na base
@@ -2355,537 +1488,59 @@ def extrair_whatsapp_da_base(df, data_ini=None, data_fim=None, apenas_fgts=False
         print(f"   ⚠️ DataFrame vazio ou None")
         return whatsapp_count, whatsapp_por_status, whatsapp_cpfs_por_status, registros_whatsapp
     
-    # Procura por colunas que podem conter UTM source
-    colunas_utm = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['utm', 'source', 'origem', 'fonte']):
-            colunas_utm.append(col)
-    
-    # Se não encontrar colunas específicas, procura por qualquer coluna que contenha "utm"
-    if not colunas_utm:
-        for col in df.columns:
-            if 'utm' in col.lower():
-                colunas_utm.append(col)
-    
-    # Se ainda não encontrou, procura por colunas que contenham "source"
-    if not colunas_utm:
-        for col in df.columns:
-            if 'source' in col.lower():
-                colunas_utm.append(col)
-    
-    # Se não encontrou nenhuma coluna UTM, retorna zeros
-    if not colunas_utm:
+    # Filtro sobre o perfil da base (calculado uma vez por upload, ver perfil_base.py)
+    perfil = obter_perfil_base(df)
+    if not perfil.colunas_utm:
         print(f"   ❌ NENHUMA coluna UTM encontrada!")
-        print(f"   📋 Todas as colunas: {list(df.columns)}")
         return whatsapp_count, whatsapp_por_status, whatsapp_cpfs_por_status, registros_whatsapp
-    else:
-        print(f"   ✅ Colunas UTM encontradas: {colunas_utm}")
-    
-    # Procura por colunas que podem conter CPFs
-    colunas_cpf = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['cpf', 'document', 'documento', 'cnpj']):
-            colunas_cpf.append(col)
-    
-    # Se não encontrar colunas específicas de CPF, usa todas as colunas
-    if not colunas_cpf:
-        colunas_cpf = df.columns.tolist()
-    
-    # Procura por colunas de status
-    colunas_status = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['status', 'categoria', 'tipo', 'segmento']):
-            colunas_status.append(col)
-    
-    # Se não encontrar colunas específicas de status, procura por qualquer coluna que contenha "status"
-    if not colunas_status:
-        for col in df.columns:
-            if 'status' in col.lower():
-                colunas_status.append(col)
-    
-    # MELHORIA: Procura por colunas de data com prioridade para colunas específicas
-    colunas_data = []
-    colunas_data_prioridade = []
-    
-    # Primeiro, procura por colunas com nomes específicos (prioridade alta)
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['data criacao', 'data_criacao', 'criacao', 'created', 'data_created']):
-            colunas_data_prioridade.append(col)
-        elif any(keyword in col_lower for keyword in ['data', 'date', 'timestamp', 'hora', 'time']):
-            colunas_data.append(col)
-    
-    # Usa as colunas de prioridade alta primeiro, depois as outras
-    colunas_data_finais = colunas_data_prioridade + colunas_data
-    
-    # Conta registros com valor "WHATSAPP_MKT"
-    print(f"🔍 DEBUG - Extraindo WhatsApp da base:")
-    print(f"   📊 Total de registros na base: {len(df)}")
-    print(f"   📅 Filtro de data: {data_ini} a {data_fim}")
-    print(f"   📋 Colunas de data encontradas: {colunas_data_finais}")
-    print(f"   📋 Colunas UTM encontradas: {colunas_utm}")
-    
-    # Debug: Verificar alguns valores da coluna UTM
-    if colunas_utm:
-        print(f"🔍 DEBUG - Verificando valores na coluna UTM '{colunas_utm[0]}':")
-        valores_unicos = df[colunas_utm[0]].dropna().unique()
-        print(f"   📋 Valores únicos encontrados: {valores_unicos[:10]}")  # Primeiros 10 valores
-        
-        # Verificar especificamente por "WHATSAPP_MKT"
-        registros_whatsapp_temp = df[df[colunas_utm[0]].str.upper() == "WHATSAPP_MKT"]
-        print(f"   📊 Registros com 'WHATSAPP_MKT' encontrados: {len(registros_whatsapp_temp)}")
-        if len(registros_whatsapp_temp) > 0:
-            print(f"   📋 Primeiros registros WhatsApp:")
-            for idx, row in registros_whatsapp_temp.head(3).iterrows():
-                print(f"      Linha {idx}: {row[colunas_utm[0]]}")
-    else:
-        print(f"   ❌ Nenhuma coluna UTM encontrada!")
-    
-    for idx, row in df.iterrows():
-        # Verifica se tem UTM source = "WHATSAPP_MKT"
-        tem_whatsapp = False
-        for col in colunas_utm:
-            valor = row[col] if col in row else None
-            if valor is not None:
-                valor_str = str(valor).strip().upper()
-                if valor_str == "WHATSAPP_MKT":
-                    tem_whatsapp = True
-                    if whatsapp_count < 5:  # Mostrar apenas os primeiros 5 para debug
-                        print(f"   ✅ Registro WhatsApp encontrado na linha {idx}, coluna '{col}': '{valor}'")
-                    break
-        
-        if tem_whatsapp:
-            # MELHORIA: Filtro de data mais inteligente
-            data_valida = False
-            data_encontrada = None
-            
-            if data_ini and data_fim and colunas_data_finais:
-                # Tenta encontrar uma data válida nas colunas de data
-                for col in colunas_data_finais:
-                    try:
-                        data_str = str(row[col])
-                        if pd.notna(data_str) and data_str.strip():
-                            # Tenta diferentes formatos de data
-                            data_criacao = None
-                            
-                            # Formato: DD/MM/YYYY HH:MM (formato brasileiro)
-                            if len(data_str) >= 16 and '/' in data_str and ':' in data_str:
-                                try:
-                                    data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M')
-                                except ValueError:
-                                    # Tentar formato sem segundos
-                                    if len(data_str) >= 19:
-                                        data_criacao = datetime.strptime(data_str[:19], '%d/%m/%Y %H:%M:%S')
-                            # Formato: DD/MM/YYYY
-                            elif len(data_str) == 10 and '/' in data_str:
-                                data_criacao = datetime.strptime(data_str, '%d/%m/%Y')
-                            # Formato: YYYY-MM-DD HH:MM:SS
-                            elif len(data_str) >= 19 and '-' in data_str:
-                                try:
-                                    data_criacao = datetime.strptime(data_str[:19], '%Y-%m-%d %H:%M:%S')
-                                except ValueError:
-                                    # Tentar formato sem segundos
-                                    if len(data_str) >= 16:
-                                        data_criacao = datetime.strptime(data_str[:16], '%Y-%m-%d %H:%M')
-                            # Formato: YYYY-MM-DD
-                            elif len(data_str) == 10 and '-' in data_str:
-                                data_criacao = datetime.strptime(data_str, '%Y-%m-%d')
-                            
-                            if data_criacao:
-                                data_ini_dt = datetime.combine(data_ini, datetime.min.time())
-                                data_fim_dt = datetime.combine(data_fim, datetime.max.time())
-                                
-                                # Debug para os primeiros registros
-                                if whatsapp_count < 3:
-                                    print(f"   🔍 DEBUG - Registro WhatsApp linha {idx + 1}:")
-                                    print(f"      📅 Data encontrada: {data_str} -> {data_criacao}")
-                                    print(f"      📅 Range filtro: {data_ini_dt} a {data_fim_dt}")
-                                    print(f"      ✅ Data válida: {data_ini_dt <= data_criacao <= data_fim_dt}")
-                                
-                                if data_ini_dt <= data_criacao <= data_fim_dt:
-                                    data_valida = True
-                                    data_encontrada = data_criacao
-                                    break
-                    except (ValueError, TypeError) as e:
-                        if whatsapp_count < 3:
-                            print(f"      ❌ Erro ao parsear data '{data_str}': {e}")
-                        continue
-            else:
-                # Se não há filtro de data, considerar válido
-                data_valida = True
-            
-            # Se a data é válida ou não há filtro, processar o registro
-            if data_valida:
-                # NOVO: Verificar se deve filtrar apenas FGTS
-                if apenas_fgts:
-                    # Verificar se o registro é de FGTS
-                    eh_fgts = False
-                    for col in colunas_status:
-                        valor_status = row[col] if col in row else None
-                        if valor_status is not None:
-                            valor_status_str = str(valor_status).strip().upper()
-                            if valor_status_str.startswith('FGTS'):
-                                eh_fgts = True
-                                break
-                    
-                    # Se não é FGTS e estamos filtrando apenas FGTS, pular
-                    if not eh_fgts:
-                        if whatsapp_count < 3:
-                            print(f"      ❌ Registro WhatsApp REJEITADO (não é FGTS)")
-                        continue
-                
-                whatsapp_count += 1
-                
-                # Extrai CPF do registro
-                cpf_encontrado = None
-                for col in colunas_cpf:
-                    valor_cpf = row[col] if col in row else None
-                    if valor_cpf is not None:
-                        valor_cpf_str = str(valor_cpf).strip()
-                        # Usar a nova função de limpeza de CPF
-                        cpf_limpo = limpar_cpf(valor_cpf_str)
-                        if cpf_limpo and len(cpf_limpo) == 11 and validar_cpf(cpf_limpo):
-                            cpf_encontrado = cpf_limpo
-                            if whatsapp_count <= 5:  # Mostrar apenas os primeiros 5 para debug
-                                print(f"      ✅ CPF encontrado na coluna '{col}': '{valor_cpf}' -> '{cpf_limpo}'")
-                            break
-                        elif whatsapp_count <= 3:  # Mostrar apenas os primeiros 3 para debug
-                            print(f"      ⚠️ CPF inválido na coluna '{col}': '{valor_cpf}' -> '{cpf_limpo}'")
-                
-                # Categoriza por status
-                status_encontrado = False
-                for col in colunas_status:
-                    valor_status = row[col] if col in row else None
-                    if valor_status is not None:
-                        valor_status_str = str(valor_status).strip().upper()
-                        if valor_status_str.startswith('INSS'):
-                            whatsapp_por_status['Novo'] += 1
-                            if cpf_encontrado:
-                                whatsapp_cpfs_por_status['Novo'].add(cpf_encontrado)
-                            status_encontrado = True
-                            break
-                        elif valor_status_str.startswith('FGTS'):
-                            whatsapp_por_status['FGTS'] += 1
-                            if cpf_encontrado:
-                                whatsapp_cpfs_por_status['FGTS'].add(cpf_encontrado)
-                            status_encontrado = True
-                            break
-                        elif valor_status_str.startswith('CLT'):
-                            whatsapp_por_status['CLT'] += 1
-                            if cpf_encontrado:
-                                whatsapp_cpfs_por_status['CLT'].add(cpf_encontrado)
-                            status_encontrado = True
-                            break
-                 
-                if not status_encontrado:
-                    whatsapp_por_status['Outros'] += 1
-                    if cpf_encontrado:
-                        whatsapp_cpfs_por_status['Outros'].add(cpf_encontrado)
-                
-                # Adicionar registro completo à lista com informações de data
-                status_registro = 'Outros'
-                for col in colunas_status:
-                    valor_status = row[col] if col in row else None
-                    if valor_status is not None:
-                        valor_status_str = str(valor_status).strip().upper()
-                        if valor_status_str.startswith('INSS'):
-                            status_registro = 'Novo'
-                            break
-                        elif valor_status_str.startswith('FGTS'):
-                            status_registro = 'FGTS'
-                            break
-                        elif valor_status_str.startswith('CLT'):
-                            status_registro = 'CLT'
-                            break
-                
-                registro_whatsapp = {
-                    'linha': idx + 1,  # +1 para linha humana (não índice)
-                    'cpf': cpf_encontrado,
-                    'status': status_registro,
-                    'data_encontrada': data_encontrada.strftime('%d/%m/%Y %H:%M') if data_encontrada else 'N/A',
-                    'dados_completos': row.to_dict()
-                }
-                registros_whatsapp.append(registro_whatsapp)
-                
-                if whatsapp_count <= 3:
-                    print(f"      ✅ Registro WhatsApp ACEITO (Total: {whatsapp_count})")
-            else:
-                if whatsapp_count < 3:
-                    print(f"      ❌ Registro WhatsApp REJEITADO pelo filtro de data")
     
-    # Log final dos resultados
+    mascara, data_encontrada = perfil.filtrar_canal('WHATSAPP_MKT', data_ini, data_fim, apenas_fgts)
+    whatsapp_count, whatsapp_por_status, whatsapp_cpfs_por_status = perfil.resumir_canal(mascara)
+    registros_whatsapp = perfil.registros_canal(mascara, data_encontrada)
+    
     print(f"🔍 DEBUG - Resultados da extração WhatsApp:")
+    print(f"   📅 Filtro de data: {data_ini} a {data_fim} (apenas FGTS: {apenas_fgts})")
     print(f"   📊 Total de registros WhatsApp encontrados: {whatsapp_count}")
     print(f"   📋 Distribuição por status: {whatsapp_por_status}")
     print(f"   📋 CPFs únicos por status: {dict((k, len(v)) for k, v in whatsapp_cpfs_por_status.items())}")
-    print(f"   📋 Total de registros WhatsApp retornados: {len(registros_whatsapp)}")
-    
-    # Debug adicional: Mostrar distribuição por data se houver filtro
-    if data_ini and data_fim and registros_whatsapp:
-        print(f"🔍 DEBUG - Distribuição por data dos registros WhatsApp:")
-        datas_unicas = set()
-        for reg in registros_whatsapp:
-            if reg['data_encontrada'] != 'N/A':
-                datas_unicas.add(reg['data_encontrada'][:10])  # Apenas a data (DD/MM/YYYY)
-        
-        print(f"   📅 Datas únicas encontradas: {sorted(list(datas_unicas))}")
     
     return whatsapp_count, whatsapp_por_status, whatsapp_cpfs_por_status, registros_whatsapp
 
 def extrair_ad_da_base(df, data_ini=None, data_fim=None, apenas_fgts=False):
     """Extrai e conta registros com UTM source = 'ad' da base carregada, separados por status e opcionalmente filtrados por data."""
-    print(f"🔍 DEBUG - INICIANDO extrair_ad_da_base")
-    print(f"   📊 DataFrame shape: {df.shape if df is not None else 'None'}")
-    print(f"   📋 Colunas disponíveis: {list(df.columns) if df is not None else 'None'}")
-    print(f"   🎯 Apenas FGTS: {apenas_fgts}")
-    
     ad_count = 0
-    ad_por_status = {
-        'Novo': 0,
-        'FGTS': 0,
-        'CLT': 0,
-        'Outros': 0
-    }
-    ad_cpfs_por_status = {
-        'Novo': set(),
-        'FGTS': set(),
-        'CLT': set(),
-        'Outros': set()
-    }
+    ad_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
+    ad_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
     
     # Verifica se há dados válidos na base
     if df is None or df.empty:
         print(f"   ⚠️ DataFrame vazio ou None")
         return ad_count, ad_por_status, ad_cpfs_por_status
     
-    # Procura por colunas que podem conter UTM source
-    colunas_utm = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['utm', 'source', 'origem', 'fonte']):
-            colunas_utm.append(col)
-    
-    # Se não encontrar colunas específicas, procura por qualquer coluna que contenha "utm"
-    if not colunas_utm:
-        for col in df.columns:
-            if 'utm' in col.lower():
-                colunas_utm.append(col)
-    
-    # Se ainda não encontrou, procura por colunas que contenham "source"
-    if not colunas_utm:
-        for col in df.columns:
-            if 'source' in col.lower():
-                colunas_utm.append(col)
-    
-    # Se não encontrou nenhuma coluna UTM, retorna zeros
-    if not colunas_utm:
+    # Filtro sobre o perfil da base (calculado uma vez por upload, ver perfil_base.py)
+    perfil = obter_perfil_base(df)
+    if not perfil.colunas_utm:
         print(f"   ❌ NENHUMA coluna UTM encontrada!")
-        print(f"   📋 Todas as colunas: {list(df.columns)}")
         return ad_count, ad_por_status, ad_cpfs_por_status
-    else:
-        print(f"   ✅ Colunas UTM encontradas: {colunas_utm}")  
-    
-    # Procura por colunas que podem conter CPFs
-    colunas_cpf = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['cpf', 'document', 'documento', 'cnpj']):
-            colunas_cpf.append(col)
-    
-    # Se não encontrar colunas específicas de CPF, usa todas as colunas
-    if not colunas_cpf:
-        colunas_cpf = df.columns.tolist()
-    
-    # Procura por colunas de status
-    colunas_status = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['status', 'categoria', 'tipo', 'segmento']):
-            colunas_status.append(col)
-    
-    # Se não encontrar colunas específicas de status, procura por qualquer coluna que contenha "status"
-    if not colunas_status:
-        for col in df.columns:
-            if 'status' in col.lower():
-                colunas_status.append(col)
-    
-    # Procura por colunas de data
-    colunas_data = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ['data', 'date', 'criacao', 'created', 'timestamp']):
-            colunas_data.append(col)
-    
-    # Conta registros com valor "ad" (minúsculo)
-    print(f"🔍 DEBUG - Extraindo AD da base:")
-    print(f"   📊 Total de registros na base: {len(df)}")
-    print(f"   📅 Filtro de data: {data_ini} a {data_fim}")
-    print(f"   📋 Colunas de data encontradas: {colunas_data}")
-    print(f"   📋 Colunas UTM encontradas: {colunas_utm}")
-    
-    # Debug: Verificar alguns valores da coluna UTM
-    if colunas_utm:
-        print(f"🔍 DEBUG - Verificando valores na coluna UTM '{colunas_utm[0]}':")
-        valores_unicos = df[colunas_utm[0]].dropna().unique()
-        print(f"   📋 Valores únicos encontrados: {valores_unicos[:10]}")  # Primeiros 10 valores
-        
-        # Verificar especificamente por "ad"
-        registros_ad = df[df[colunas_utm[0]].str.lower() == "ad"]
-        print(f"   📊 Registros com 'ad' encontrados: {len(registros_ad)}")
-        if len(registros_ad) > 0:
-            print(f"   📋 Primeiros registros AD:")
-            for idx, row in registros_ad.head(3).iterrows():
-                print(f"      Linha {idx}: {row[colunas_utm[0]]}")
-    else:
-        print(f"   ❌ Nenhuma coluna UTM encontrada!")
-    
-    for idx, row in df.iterrows():
-        # Verifica se tem UTM source = "ad" (minúsculo conforme dados)
-        tem_ad = False
-        for col in colunas_utm:
-            valor = row[col] if col in row else None
-            if valor is not None:
-                valor_str = str(valor).strip().lower()
-                if valor_str == "ad":
-                    tem_ad = True
-                    if ad_count < 5:  # Mostrar apenas os primeiros 5 para debug
-                        print(f"   ✅ Registro AD encontrado na linha {idx}, coluna '{col}': '{valor}'")
-                    break
-        
-        if tem_ad:
-            # Se há filtro de data, verifica se está no período
-            if data_ini and data_fim and colunas_data:
-                data_valida = False
-                if ad_count < 3:  # Debug para os primeiros registros
-                    print(f"   🔍 DEBUG - Verificando filtro de data para registro AD linha {idx}")
-                    print(f"      📅 Filtro: {data_ini} a {data_fim}")
-                
-                for col in colunas_data:
-                    try:
-                        data_str = str(row[col])
-                        if pd.notna(data_str) and data_str.strip():
-                            if ad_count < 3:
-                                print(f"      📋 Coluna '{col}': '{data_str}'")
-                            
-                            # Tenta diferentes formatos de data
-                            data_criacao = None
-                            
-                            # Formato: DD/MM/YYYY HH:MM
-                            if len(data_str) >= 16 and '/' in data_str:
-                                data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M')
-                            # Formato: DD/MM/YYYY
-                            elif len(data_str) == 10 and '/' in data_str:
-                                data_criacao = datetime.strptime(data_str, '%d/%m/%Y')
-                            # Formato: YYYY-MM-DD HH:MM:SS
-                            elif len(data_str) >= 19:
-                                data_criacao = datetime.strptime(data_str[:19], '%Y-%m-%d %H:%M:%S')
-                            # Formato: YYYY-MM-DD
-                            elif len(data_str) == 10:
-                                data_criacao = datetime.strptime(data_str, '%Y-%m-%d')
-                            
-                            if data_criacao:
-                                data_ini_dt = datetime.combine(data_ini, datetime.min.time())
-                                data_fim_dt = datetime.combine(data_fim, datetime.max.time())
-                                
-                                if ad_count < 3:
-                                    print(f"      📅 Data parseada: {data_criacao}")
-                                    print(f"      📅 Range filtro: {data_ini_dt} a {data_fim_dt}")
-                                    print(f"      ✅ Data válida: {data_ini_dt <= data_criacao <= data_fim_dt}")
-                                
-                                if data_ini_dt <= data_criacao <= data_fim_dt:
-                                    data_valida = True
-                                    break
-                    except (ValueError, TypeError) as e:
-                        if ad_count < 3:
-                            print(f"      ❌ Erro ao parsear data '{data_str}': {e}")
-                        continue
-                
-                # Se não há filtro de data ou se a data está no período, processar o registro
-                if not data_ini or not data_fim or data_valida:
-                    # NOVO: Verificar se deve filtrar apenas FGTS
-                    if apenas_fgts:
-                        # Verificar se o registro é de FGTS
-                        eh_fgts = False
-                        for col in colunas_status:
-                            valor_status = row[col] if col in row else None
-                            if valor_status is not None:
-                                valor_status_str = str(valor_status).strip().upper()
-                                if valor_status_str.startswith('FGTS'):
-                                    eh_fgts = True
-                                    break
-                        
-                        # Se não é FGTS e estamos filtrando apenas FGTS, pular
-                        if not eh_fgts:
-                            if ad_count < 3:
-                                print(f"      ❌ Registro AD REJEITADO (não é FGTS)")
-                            continue
-                    
-                    ad_count += 1
-                    if ad_count <= 3:
-                        print(f"      ✅ Registro AD ACEITO (Total: {ad_count})")
-                else:
-                    if ad_count < 3:
-                        print(f"      ❌ Registro AD REJEITADO pelo filtro de data")
-                    continue  # Pula para o próximo registro se a data não for válida
-            
-            # Extrai CPF do registro (apenas se o registro foi aceito)
-            cpf_encontrado = None
-            for col in colunas_cpf:
-                valor_cpf = row[col] if col in row else None
-                if valor_cpf is not None:
-                    valor_cpf_str = str(valor_cpf).strip()
-                    # Usar a nova função de limpeza de CPF
-                    cpf_limpo = limpar_cpf(valor_cpf_str)
-                    if cpf_limpo and len(cpf_limpo) == 11 and validar_cpf(cpf_limpo):
-                        cpf_encontrado = cpf_limpo
-                        if ad_count <= 5:  # Mostrar apenas os primeiros 5 para debug
-                            print(f"      ✅ CPF encontrado na coluna '{col}': '{valor_cpf}' -> '{cpf_limpo}'")
-                        break
-                    elif ad_count <= 3:  # Mostrar apenas os primeiros 3 para debug
-                        print(f"      ⚠️ CPF inválido na coluna '{col}': '{valor_cpf}' -> '{cpf_limpo}'")
-            
-            # Categoriza por status
-            status_encontrado = False
-            for col in colunas_status:
-                valor_status = row[col] if col in row else None
-                if valor_status is not None:
-                    valor_status_str = str(valor_status).strip().upper()
-                    if valor_status_str.startswith('INSS'):
-                        ad_por_status['Novo'] += 1
-                        if cpf_encontrado:
-                            ad_cpfs_por_status['Novo'].add(cpf_encontrado)
-                        status_encontrado = True
-                        break
-                    elif valor_status_str.startswith('FGTS'):
-                        ad_por_status['FGTS'] += 1
-                        if cpf_encontrado:
-                            ad_cpfs_por_status['FGTS'].add(cpf_encontrado)
-                        status_encontrado = True
-                        break
-                    elif valor_status_str.startswith('CLT'):
-                        ad_por_status['CLT'] += 1
-                        if cpf_encontrado:
-                            ad_cpfs_por_status['CLT'].add(cpf_encontrado)
-                        status_encontrado = True
-                        break
-            
-            if not status_encontrado:
-                ad_por_status['Outros'] += 1
-                if cpf_encontrado:
-                    ad_cpfs_por_status['Outros'].add(cpf_encontrado)
     
-    # Log final dos resultados
+    # AD usa as colunas e formatos de data da extração geral
+    mascara, _ = perfil.filtrar_canal('ad', data_ini, data_fim, apenas_fgts, regra_data_canal=False)
+    ad_count, ad_por_status, ad_cpfs_por_status = perfil.resumir_canal(mascara)
+    
     print(f"🔍 DEBUG - Resultados da extração AD:")
+    print(f"   📅 Filtro de data: {data_ini} a {data_fim} (apenas FGTS: {apenas_fgts})")
     print(f"   📊 Total de registros AD encontrados: {ad_count}")
     print(f"   📋 Distribuição por status: {ad_por_status}")
     print(f"   📋 CPFs únicos por status: {dict((k, len(v)) for k, v in ad_cpfs_por_status.items())}")
     
-    print(f"🔍 DEBUG - FUNÇÃO extrair_ad_da_base CONCLUÍDA")
     return ad_count, ad_por_status, ad_cpfs_por_status
 
+def cpfs_das_propostas(propostas):
+    """CPFs únicos das propostas do FACTA, normalizados de uma vez (int64)."""
+    return ConjuntoIds.de_codigos(
+        cpf_vetorizado.normalizar_cpfs([proposta.get('cpf') or '' for proposta in propostas or []])
+    )
+
 def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao", tenant_segment_id=None, limit_kolmeya=30000, limit_facta=5000):
     """
     Compara CPFs retornados pelo endpoint da FACTA com CPFs retornados pelo endpoint do Kolmeya.
@@ -2914,11 +1569,11 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
         print("❌ Token do Kolmeya não encontrado")
         return {
             "erro": "Token do Kolmeya não encontrado",
-            "cpfs_kolmeya": set(),
-            "cpfs_facta": set(),
-            "cpfs_coincidentes": set(),
-            "cpfs_apenas_kolmeya": set(),
-            "cpfs_apenas_facta": set(),
+            "cpfs_kolmeya": ConjuntoIds(),
+            "cpfs_facta": ConjuntoIds(),
+            "cpfs_coincidentes": ConjuntoIds(),
+            "cpfs_apenas_kolmeya": ConjuntoIds(),
+            "cpfs_apenas_facta": ConjuntoIds(),
             "total_kolmeya": 0,
             "total_facta": 0,
             "total_coincidentes": 0
@@ -2928,11 +1583,11 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
         print("❌ Token do FACTA não encontrado")
         return {
             "erro": "Token do FACTA não encontrado",
-            "cpfs_kolmeya": set(),
-            "cpfs_facta": set(),
-            "cpfs_coincidentes": set(),
-            "cpfs_apenas_kolmeya": set(),
-            "cpfs_apenas_facta": set(),
+            "cpfs_kolmeya": ConjuntoIds(),
+            "cpfs_facta": ConjuntoIds(),
+            "cpfs_coincidentes": ConjuntoIds(),
+            "cpfs_apenas_kolmeya": ConjuntoIds(),
+            "cpfs_apenas_facta": ConjuntoIds(),
             "total_kolmeya": 0,
             "total_facta": 0,
             "total_coincidentes": 0
@@ -2953,8 +1608,8 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
         tenant_segment_id=tenant_segment_id
     )
     
-    # Converter para set para facilitar comparação
-    cpfs_kolmeya_set = set(cpfs_kolmeya)
+    # Conjunto int64 ordenado para a comparação (ver conjuntos_ids.py)
+    cpfs_kolmeya_set = como_conjunto(cpfs_kolmeya)
     
     print(f"✅ CPFs do Kolmeya encontrados: {len(cpfs_kolmeya_set)}")
     
@@ -2962,15 +1617,15 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
     print(f"\n📋 Passo 2: Consultando CPFs do FACTA...")
     
     # Testar conectividade com FACTA
-    if not testar_api_facta(token=token_facta, ambiente=ambiente_facta):
+    if not api_facta_disponivel(token=token_facta, ambiente=ambiente_facta):
         print("❌ API FACTA não está respondendo")
         return {
             "erro": "API FACTA não está respondendo",
             "cpfs_kolmeya": cpfs_kolmeya_set,
-            "cpfs_facta": set(),
-            "cpfs_coincidentes": set(),
+            "cpfs_facta": ConjuntoIds(),
+            "cpfs_coincidentes": ConjuntoIds(),
             "cpfs_apenas_kolmeya": cpfs_kolmeya_set,
-            "cpfs_apenas_facta": set(),
+            "cpfs_apenas_facta": ConjuntoIds(),
             "total_kolmeya": len(cpfs_kolmeya_set),
             "total_facta": 0,
             "total_coincidentes": 0
@@ -2988,27 +1643,23 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
     )
     
     # Extrair CPFs únicos das propostas do FACTA
-    cpfs_facta_set = set()
-    for proposta in propostas_facta:
-        cpf = proposta.get('cpf', '')
-        if cpf:
-            cpf_limpo = limpar_cpf(str(cpf))
-            if cpf_limpo and len(cpf_limpo) == 11:
-                cpfs_facta_set.add(cpf_limpo)
+    cpfs_facta_set = cpfs_das_propostas(propostas_facta)
     
     print(f"✅ CPFs do FACTA encontrados: {len(cpfs_facta_set)}")
     
     # 3. COMPARAR CPFs
     print(f"\n🔍 Passo 3: Comparando CPFs...")
     
+    comparacao = sobreposicao(cpfs_kolmeya_set, cpfs_facta_set)
+    
     # CPFs que estão em AMBOS os sistemas
-    cpfs_coincidentes = cpfs_kolmeya_set & cpfs_facta_set
+    cpfs_coincidentes = comparacao['em_ambos']
     
     # CPFs que estão APENAS no Kolmeya
-    cpfs_apenas_kolmeya = cpfs_kolmeya_set - cpfs_facta_set
+    cpfs_apenas_kolmeya = comparacao['apenas_a']
     
     # CPFs que estão APENAS no FACTA
-    cpfs_apenas_facta = cpfs_facta_set - cpfs_kolmeya_set
+    cpfs_apenas_facta = comparacao['apenas_b']
     
     # 4. RESULTADOS
     print(f"\n✅ Comparação concluída:")
@@ -3028,7 +1679,7 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
     # Mostrar alguns exemplos de CPFs coincidentes
     if cpfs_coincidentes:
         print(f"   📋 Exemplos de CPFs coincidentes:")
-        for i, cpf in enumerate(list(cpfs_coincidentes)[:5]):
+        for i, cpf in enumerate(cpfs_coincidentes.textos(5)):
             print(f"      {i+1}. {cpf}")
         if len(cpfs_coincidentes) > 5:
             print(f"      ... e mais {len(cpfs_coincidentes) - 5} CPFs")
@@ -3036,7 +1687,7 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
     # Mostrar alguns exemplos de CPFs apenas no Kolmeya
     if cpfs_apenas_kolmeya:
         print(f"   📱 Exemplos de CPFs apenas no Kolmeya:")
-        for i, cpf in enumerate(list(cpfs_apenas_kolmeya)[:3]):
+        for i, cpf in enumerate(cpfs_apenas_kolmeya.textos(3)):
             print(f"      {i+1}. {cpf}")
         if len(cpfs_apenas_kolmeya) > 3:
             print(f"      ... e mais {len(cpfs_apenas_kolmeya) - 3} CPFs")
@@ -3044,7 +1695,7 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
     # Mostrar alguns exemplos de CPFs apenas no FACTA
     if cpfs_apenas_facta:
         print(f"   📋 Exemplos de CPFs apenas no FACTA:")
-        for i, cpf in enumerate(list(cpfs_apenas_facta)[:3]):
+        for i, cpf in enumerate(cpfs_apenas_facta.textos(3)):
             print(f"      {i+1}. {cpf}")
         if len(cpfs_apenas_facta) > 3:
             print(f"      ... e mais {len(cpfs_apenas_facta) - 3} CPFs")
@@ -3065,13 +1716,6 @@ def comparar_cpfs_facta_kolmeya(start_at, end_at, ambiente_facta="homologacao",
 
 
 def main():
-    # Garantir que pandas está disponível
-    try:
-        import pandas as pd
-    except ImportError:
-        st.error("❌ Erro: pandas não está disponível. Instale com: pip install pandas")
-        return
-    
     # Configuração da página com layout otimizado
     st.set_page_config(
         page_title="Dashboard Servix",
@@ -3214,6 +1858,22 @@ def main():
     )
     centro_custo_valor = centro_custo_opcoes[centro_custo_selecionado]
     
+    # Consultas independentes disparadas juntas; cada painel espera só pela sua (ver carregamento_paralelo.py)
+    token_kolmeya = get_kolmeya_token()
+    carregamento = CarregamentoParalelo()
+    carregamento.iniciar("status", obter_dados_sms_com_filtro, data_ini, data_fim, centro_custo_valor,
+                         timeout=PRAZO_PAINEL_STATUS, padrao=(RegistrosKolmeya.vazio(), 0))
+    if token_kolmeya:
+        carregamento.iniciar("acessos", consultar_acessos_sms_kolmeya,
+                             start_at=data_ini.strftime('%Y-%m-%d'),  # Formato correto: apenas data
+                             end_at=data_fim.strftime('%Y-%m-%d'),    # Formato correto: apenas data
+                             limit=10000,  # Aumentado para pegar mais acessos
+                             token=token_kolmeya,
+                             tenant_segment_id=centro_custo_valor,  # Passar centro de custo para filtragem
+                             timeout=PRAZO_PAINEL_ACESSOS, padrao=[])
+    carregamento.iniciar("facta", api_facta_disponivel, ambiente="producao",
+                         timeout=PRAZO_PAINEL_FACTA, padrao=False)
+    carregamento.encerrar()
 
 
     # Saldo Kolmeya com tratamento de erro melhorado
@@ -3221,15 +1881,27 @@ def main():
     
     with col_saldo:
         try:
-            saldo_kolmeya = obter_saldo_kolmeya()
+            # Saldo em memória compartilhado pelas sessões; se estiver velho, é atualizado em
+            # segundo plano e o último valor conhecido aparece na hora (ver saldo_kolmeya.py)
+            leitura_saldo = (obter_provedor_saldo(token_kolmeya).obter(espera=PRAZO_PAINEL_SALDO)
+                             if token_kolmeya else None)
             
             # Verificar se o saldo é válido
-            if saldo_kolmeya is None or saldo_kolmeya < 0:
+            if leitura_saldo is None:
+                saldo_kolmeya = 0.0
+                status_saldo = "❌ Token do Kolmeya não encontrado"
+                cor_borda = "rgba(255, 165, 0, 0.5)"  # Laranja para erro
+            elif leitura_saldo.valor is None:
                 saldo_kolmeya = 0.0
-                status_saldo = "⚠️ Erro na consulta"
+                status_saldo = "⏱️ Sem resposta do Kolmeya" if leitura_saldo.atualizando else "⚠️ Erro na consulta"
+                cor_borda = "rgba(255, 165, 0, 0.5)"  # Laranja para erro
+            elif leitura_saldo.erro is not None:
+                saldo_kolmeya = leitura_saldo.valor
+                status_saldo = f"⚠️ Último saldo conhecido ({formatar_idade(leitura_saldo.idade)})"
                 cor_borda = "rgba(255, 165, 0, 0.5)"  # Laranja para erro
             else:
-                status_saldo = "✅ Saldo atualizado"
+                saldo_kolmeya = leitura_saldo.valor
+                status_saldo = f"✅ Saldo atualizado {formatar_idade(leitura_saldo.idade)}"
                 cor_borda = "rgba(162, 89, 255, 0.5)"  # Roxo para sucesso
             
             st.markdown(
@@ -3266,10 +1938,10 @@ def main():
         'Outros': 0
     }
     ura_cpfs_por_status = {
-        'Novo': set(),
-        'FGTS': set(),
-        'CLT': set(),
-        'Outros': set()
+        'Novo': ConjuntoIds(),
+        'FGTS': ConjuntoIds(),
+        'CLT': ConjuntoIds(),
+        'Outros': ConjuntoIds()
     }
     registros_ura = []
     
@@ -3304,13 +1976,31 @@ def main():
             df_base = ler_base(uploaded_file)
             print(f"📁 Base carregada: {uploaded_file.name}")
             print(f"📊 Tamanho da base: {len(df_base) if df_base is not None else 0} registros")
+            if resumo_leitura(df_base):
+                st.caption(f"📁 Base lida: {resumo_leitura(df_base)}")
         except Exception as e:
             print(f"❌ Erro ao carregar base: {e}")
             df_base = None
     else:
         print(f"⚠️ Nenhuma base carregada")
     
-    messages, total_acessos = obter_dados_sms_com_filtro(data_ini, data_fim, centro_custo_valor)
+    # Situação do FACTA (consultada em paralelo com o Kolmeya)
+    resultado_facta = carregamento.resultado("facta")
+    st.session_state["facta_disponivel"] = resultado_facta.ok and bool(resultado_facta.valor)
+    if st.session_state["facta_disponivel"]:
+        st.sidebar.success("✅ API FACTA (produção) respondendo")
+    elif resultado_facta.expirou:
+        st.sidebar.warning("⏱️ API FACTA (produção) sem resposta")
+    else:
+        st.sidebar.error("❌ API FACTA (produção) indisponível")
+    for endpoint, restante in endpoints_indisponiveis().items():
+        st.sidebar.warning(f"🔌 {endpoint} fora do ar: nova tentativa em {restante:.0f}s")
+    
+    with st.spinner("Carregando envios do Kolmeya..."):
+        resultado_status = carregamento.resultado("status")
+    messages, total_acessos = resultado_status.valor
+    if resultado_status.expirou:
+        st.warning("⏱️ O Kolmeya não respondeu a tempo: os painéis de SMS estão sem os envios do período.")
     
     # Filtrar mensagens por data após receber da API
     if messages:
@@ -3322,6 +2012,22 @@ def main():
     
     print(f"📊 Resultado final: {len(messages) if messages else 0} SMS, {total_acessos} acessos")
     
+    # Índice de CPFs/telefones por fonte do período: cada fonte é registrada uma vez e as
+    # comparações dos painéis viram consultas ao índice (ver indice_identidades.py)
+    indice = obter_indice_identidades(
+        (chave_base(df_base) if df_base is not None else None, data_ini, data_fim, centro_custo_selecionado)
+    )
+    if df_base is not None:
+        try:
+            indice.registrar('base',
+                             cpfs=extrair_cpfs_da_base(df_base, data_ini, data_fim),
+                             telefones=extrair_telefones_da_base(df_base, data_ini, data_fim))
+        except Exception as e:
+            print(f"❌ Erro ao indexar CPFs e telefones da base: {e}")
+    indice.registrar('status_kolmeya',
+                     cpfs=extrair_cpfs_kolmeya(messages) if messages else ConjuntoIds(),
+                     telefones=extrair_telefones_kolmeya(messages) if messages else ConjuntoIds())
+    
     # Inicializar variáveis para contagem de URA ANTES de serem usadas
     ura_count = 0
     ura_por_status = {
@@ -3331,10 +2037,10 @@ def main():
         'Outros': 0
     }
     ura_cpfs_por_status = {
-        'Novo': set(),
-        'FGTS': set(),
-        'CLT': set(),
-        'Outros': set()
+        'Novo': ConjuntoIds(),
+        'FGTS': ConjuntoIds(),
+        'CLT': ConjuntoIds(),
+        'Outros': ConjuntoIds()
     }
     registros_ura = []
     
@@ -3347,10 +2053,10 @@ def main():
         'Outros': 0
     }
     ad_cpfs_por_status = {
-        'Novo': set(),
-        'FGTS': set(),
-        'CLT': set(),
-        'Outros': set()
+        'Novo': ConjuntoIds(),
+        'FGTS': ConjuntoIds(),
+        'CLT': ConjuntoIds(),
+        'Outros': ConjuntoIds()
     }
     
     # CALCULAR LEADS GERADOS ANTES DA RENDERIZAÇÃO DO HTML
@@ -3360,8 +2066,8 @@ def main():
     # Se há base carregada, fazer processamento
     if uploaded_file is not None:
         try:
-            # Extrair telefones da base
-            telefones_base_temp = extrair_telefones_da_base(df_base, data_ini, data_fim)
+            # Telefones da base no período (índice)
+            telefones_base_temp = indice.contar(['base'], tipo='telefone')
             
             # Para o painel 4NET, usar APENAS dados da URA (UTM source = "URA")
             if centro_custo_selecionado == "Novo":
@@ -3374,7 +2080,7 @@ def main():
                 total_leads_gerados = ura_count
             telefones_base = total_leads_gerados
             
-            print(f"🔍 Leads Gerados - Base: {len(telefones_base_temp)}, URA: {total_leads_gerados}")
+            print(f"🔍 Leads Gerados - Base: {telefones_base_temp}, URA: {total_leads_gerados}")
             
         except Exception as e:
             print(f"Erro ao calcular telefones coincidentes: {e}")
@@ -3385,7 +2091,7 @@ def main():
             if 'ura_por_status' not in locals() and 'ura_por_status' not in globals():
                 ura_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
             if 'ura_cpfs_por_status' not in locals() and 'ura_cpfs_por_status' not in globals():
-                ura_cpfs_por_status = {'Novo': set(), 'FGTS': set(), 'CLT': set(), 'Outros': set()}
+                ura_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
             if 'registros_ura' not in locals() and 'registros_ura' not in globals():
                 registros_ura = []
             
@@ -3406,7 +2112,7 @@ def main():
         if 'ura_por_status' not in locals() and 'ura_por_status' not in globals():
             ura_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
         if 'ura_cpfs_por_status' not in locals() and 'ura_cpfs_por_status' not in globals():
-            ura_cpfs_por_status = {'Novo': set(), 'FGTS': set(), 'CLT': set(), 'Outros': set()}
+            ura_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
         if 'registros_ura' not in locals() and 'registros_ura' not in globals():
             registros_ura = []
         
@@ -3478,7 +2184,7 @@ def main():
             # Em caso de erro, manter valores em zero
             ura_count = 0
             ura_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
-            ura_cpfs_por_status = {'Novo': set(), 'FGTS': set(), 'CLT': set(), 'Outros': set()}
+            ura_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
             registros_ura = []
             # Dados zerados
             pass
@@ -3486,7 +2192,7 @@ def main():
         # Se não há arquivo carregado, deixar o painel 4NET vazio (sem dados URA)
         ura_count = 0
         ura_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
-        ura_cpfs_por_status = {'Novo': set(), 'FGTS': set(), 'CLT': set(), 'Outros': set()}
+        ura_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
         registros_ura = []
 
     # LIMPEZA DO CACHE: Forçar atualização dos dados do Kolmeya
@@ -3513,64 +2219,6 @@ def main():
         'timestamp': datetime.now()
     }
     
-    # CONSULTA DOS ACESSOS DO KOLMEYA
-    print(f"🔍 CONSULTA KOLMEYA - Iniciando busca por acessos...")
-    
-    # Verificar token do Kolmeya
-    token_kolmeya = get_kolmeya_token()
-    print(f"   🔑 Token Kolmeya: {'Sim' if token_kolmeya else 'Não'}")
-    
-    # Inicializar variável acessos_kolmeya
-    acessos_kolmeya = []
-    
-    if not token_kolmeya:
-        print(f"   ❌ Token do Kolmeya não encontrado!")
-        st.session_state["acessos_kolmeya_count"] = 0
-        st.session_state["cpfs_kolmeya_consultados"] = set()
-    else:
-        print(f"✅ Token do Kolmeya encontrado: {token_kolmeya[:10]}...")
-        
-        # CONSULTA DIRETA aos acessos do Kolmeya
-        print(f"🔍 Consultando acessos do Kolmeya diretamente...")
-        print(f"   📅 Período: {data_ini} a {data_fim}")
-        print(f"   🏢 Centro de custo: {centro_custo_selecionado} ({centro_custo_valor})")
-        
-        # Forçar nova consulta de acessos
-        print(f"   🔄 Forçando consulta de acessos para período: {data_ini} a {data_fim}")
-        
-        acessos_kolmeya = consultar_acessos_sms_kolmeya(
-            start_at=data_ini.strftime('%Y-%m-%d'),  # Formato correto: apenas data
-            end_at=data_fim.strftime('%Y-%m-%d'),    # Formato correto: apenas data
-            limit=10000,  # Aumentado para pegar mais acessos
-            token=token_kolmeya,
-            tenant_segment_id=centro_custo_valor  # Passar centro de custo para filtragem
-        )
-    
-    if acessos_kolmeya:
-        print(f"✅ Acessos encontrados: {len(acessos_kolmeya)}")
-        
-        # SALVAR contagem de acessos no session state para mostrar no painel
-        st.session_state["acessos_kolmeya_count"] = len(acessos_kolmeya)
-        
-        # Extrair CPFs dos acessos
-        cpfs_acessos = extrair_cpfs_acessos_kolmeya(acessos_kolmeya)
-        
-        print(f"🔍 DEBUG - CPFs extraídos dos acessos do Kolmeya:")
-        print(f"   📊 Total de acessos: {len(acessos_kolmeya)}")
-        print(f"   📊 Total de CPFs únicos de acessos: {len(cpfs_acessos)}")
-        if cpfs_acessos:
-            print(f"   📋 Primeiros 5 CPFs de acessos: {list(cpfs_acessos)[:5]}")
-            
-            # SALVAR CPFs consultados no session state para mostrar no painel
-            st.session_state["cpfs_kolmeya_consultados"] = cpfs_acessos
-        else:
-            print(f"   ⚠️ Nenhum CPF encontrado nos acessos do Kolmeya")
-            st.session_state["cpfs_kolmeya_consultados"] = set()  # CPFs vazios
-    else:
-        print(f"⚠️ Nenhum acesso encontrado no Kolmeya para o período {data_ini} a {data_fim}")
-        st.session_state["acessos_kolmeya_count"] = 0
-        st.session_state["cpfs_kolmeya_consultados"] = set()
-
     # Layout simplificado com HTML puro - sem componentes Streamlit
     st.markdown("""
     <style>
@@ -3672,7 +2320,7 @@ def main():
 
     # Dados reais do Kolmeya via API
     total_mensagens = len(messages) if messages else 0
-    mensagens_entregues = len([msg for msg in messages if msg.get('status') == 'delivered']) if messages else 0
+    mensagens_entregues = messages.contar_status('delivered') if messages else 0
     investimento = total_mensagens * 0.0821972734562951
     
     # Inicializar variáveis para evitar erro
@@ -3708,25 +2356,15 @@ def main():
     # Calcular taxa de entrega baseada nas mensagens entregues
     taxa_entrega = (mensagens_entregues / total_mensagens * 100) if total_mensagens > 0 else 0.0
     
-    # CORREÇÃO: Calcular leads gerados comparando telefones da API com telefones da base
-    telefones_kolmeya = extrair_telefones_kolmeya(messages) if messages else set()
-    telefones_base_kolmeya = set()
-    
+    # CORREÇÃO: Calcular leads gerados comparando telefones da API com telefones da base (índice)
     if uploaded_file is not None and df_base is not None:
-        try:
-            telefones_base_kolmeya = extrair_telefones_da_base(df_base, data_ini, data_fim)
-            
-            # Calcular telefones coincidentes (leads gerados)
-            telefones_coincidentes = telefones_kolmeya & telefones_base_kolmeya
-            leads_gerados_kolmeya = len(telefones_coincidentes)
-            
-            print(f"🔍 DEBUG - Comparação Kolmeya vs Base:")
-            print(f"   📱 Telefones API Kolmeya: {len(telefones_kolmeya)}")
-            print(f"   📱 Telefones Base: {len(telefones_base_kolmeya)}")
-            print(f"   ✅ Telefones Coincidentes (Leads Gerados): {leads_gerados_kolmeya}")
-        except Exception as e:
-            print(f"❌ Erro ao comparar telefones: {e}")
-            leads_gerados_kolmeya = 0
+        # Telefones coincidentes (leads gerados)
+        leads_gerados_kolmeya = indice.contar(['status_kolmeya', 'base'], tipo='telefone')
+        
+        print(f"🔍 DEBUG - Comparação Kolmeya vs Base:")
+        print(f"   📱 Telefones API Kolmeya: {indice.contar(['status_kolmeya'], tipo='telefone')}")
+        print(f"   📱 Telefones Base: {indice.contar(['base'], tipo='telefone')}")
+        print(f"   ✅ Telefones Coincidentes (Leads Gerados): {leads_gerados_kolmeya}")
     else:
         leads_gerados_kolmeya = 0
         print(f"⚠️ Nenhuma base carregada para comparação")
@@ -4039,9 +2677,6 @@ def main():
                 <div style="font-size: 10px; color: #aaa; margin-top: 5px;">
                     Última atualização: {datetime.now().strftime('%d/%m %H:%M')}
                 </div>
-                <div style="font-size: 9px; color: #888; margin-top: 3px;">
-                    Acessos: {st.session_state.get('acessos_kolmeya_count', 0)}
-                </div>
                 {f'<div style="font-size: 9px; color: #4CAF50; margin-top: 3px;">💰 FACTA: +{formatar_real(valor_facta_kolmeya)}</div>' if valor_facta_kolmeya > 0 else ''}
             </div>
             <div class="metric-row">
@@ -4313,24 +2948,29 @@ def main():
     st.markdown("---")
     
     # Coletar todos os CPFs FGTS encontrados nos painéis
-    cpfs_fgts_todos = set()
+    cpfs_fgts_todos = ConjuntoIds()
     
     if uploaded_file is not None and df_base is not None:
+        cpfs_fgts_paineis = []
+        
         # CPFs do painel 4NET (URA)
         if 'ura_cpfs_por_status' in locals() and 'FGTS' in ura_cpfs_por_status:
-            cpfs_fgts_todos.update(ura_cpfs_por_status['FGTS'])
+            cpfs_fgts_paineis.append(ura_cpfs_por_status['FGTS'])
             print(f"🔍 CPFs FGTS do painel 4NET: {len(ura_cpfs_por_status['FGTS'])}")
         
         # CPFs do painel WhatsApp
         if 'whatsapp_cpfs_por_status' in locals() and 'FGTS' in whatsapp_cpfs_por_status:
-            cpfs_fgts_todos.update(whatsapp_cpfs_por_status['FGTS'])
+            cpfs_fgts_paineis.append(whatsapp_cpfs_por_status['FGTS'])
             print(f"🔍 CPFs FGTS do painel WhatsApp: {len(whatsapp_cpfs_por_status['FGTS'])}")
         
         # CPFs do painel AD
         if 'ad_cpfs_por_status' in locals() and 'FGTS' in ad_cpfs_por_status:
-            cpfs_fgts_todos.update(ad_cpfs_por_status['FGTS'])
+            cpfs_fgts_paineis.append(ad_cpfs_por_status['FGTS'])
             print(f"🔍 CPFs FGTS do painel AD: {len(ad_cpfs_por_status['FGTS'])}")
         
+        # União dos painéis em uma única ordenação (int64)
+        cpfs_fgts_todos = unir(cpfs_fgts_paineis)
+        
         print(f"🔍 Total de CPFs FGTS únicos encontrados: {len(cpfs_fgts_todos)}")
         
         # Consultar FACTA com os CPFs encontrados
@@ -4344,20 +2984,20 @@ def main():
                 st.metric("Total CPFs FGTS", len(cpfs_fgts_todos))
             
             with col_stats2:
-                cpfs_4net = len(ura_cpfs_por_status.get('FGTS', set())) if 'ura_cpfs_por_status' in locals() else 0
+                cpfs_4net = len(ura_cpfs_por_status.get('FGTS', ConjuntoIds())) if 'ura_cpfs_por_status' in locals() else 0
                 st.metric("Painel 4NET", cpfs_4net)
             
             with col_stats3:
-                cpfs_whatsapp = len(whatsapp_cpfs_por_status.get('FGTS', set())) if 'whatsapp_cpfs_por_status' in locals() else 0
+                cpfs_whatsapp = len(whatsapp_cpfs_por_status.get('FGTS', ConjuntoIds())) if 'whatsapp_cpfs_por_status' in locals() else 0
                 st.metric("Painel WhatsApp", cpfs_whatsapp)
             
             with col_stats4:
-                cpfs_ad = len(ad_cpfs_por_status.get('FGTS', set())) if 'ad_cpfs_por_status' in locals() else 0
+                cpfs_ad = len(ad_cpfs_por_status.get('FGTS', ConjuntoIds())) if 'ad_cpfs_por_status' in locals() else 0
                 st.metric("Painel AD", cpfs_ad)
             
             # Mostrar alguns CPFs como exemplo
             with st.expander("📋 Ver CPFs Encontrados"):
-                cpfs_list = list(cpfs_fgts_todos)[:10]  # Primeiros 10 CPFs
+                cpfs_list = cpfs_fgts_todos.textos(10)  # Primeiros 10 CPFs
                 st.write("**Primeiros 10 CPFs FGTS encontrados:**")
                 for i, cpf in enumerate(cpfs_list, 1):
                     st.write(f"{i}. {cpf}")
@@ -4384,7 +3024,7 @@ def main():
                     if cpfs_fgts_todos:
                         # Criar DataFrame para exportação
                         df_cpfs = pd.DataFrame({
-                            'CPF': list(cpfs_fgts_todos),
+                            'CPF': cpfs_fgts_todos.textos(),
                             'Status': 'FGTS',
                             'Data_Consulta': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
                         })
@@ -4415,10 +3055,15 @@ def main():
                             status_text.text("🔍 Consultando propostas no FACTA...")
                             progress_bar.progress(25)
                             
+                            def atualizar_progresso_facta(concluidos, total, cpf, propostas):
+                                progress_bar.progress(25 + int(50 * concluidos / total))
+                                status_text.text(f"🔍 Consultando propostas no FACTA... {concluidos}/{total} CPFs")
+                            
                             # Consultar propostas no FACTA
                             propostas_facta = consultar_andamento_propostas_facta(
-                                cpfs=list(cpfs_fgts_todos),
-                                ambiente=ambiente_facta
+                                cpfs=cpfs_fgts_todos.textos(),
+                                ambiente=ambiente_facta,
+                                progresso=atualizar_progresso_facta
                             )
                             
                             progress_bar.progress(75)
@@ -4513,9 +3158,7 @@ def main():
             }
             tenant_segment_id_comp = centro_custo_opcoes_comp[centro_custo_comp]
             
-            # Extrair CPFs da base carregada
-            
-            cpfs_base_comp = extrair_cpfs_da_base(df_base, data_ini, data_fim)
+            # CPFs da base do período já estão no índice ('base')
             
             
             # Consultar CPFs do Kolmeya
@@ -4540,22 +3183,9 @@ def main():
             )
             
             
-            # Padronizar CPFs da base
-            cpfs_base_padronizados = set()
-            for cpf in cpfs_base_comp:
-                cpf_limpo = limpar_cpf(str(cpf))
-                if cpf_limpo and len(cpf_limpo) == 11:
-                    cpfs_base_padronizados.add(cpf_limpo)
-            
-            # Padronizar CPFs do Kolmeya
-            cpfs_kolmeya_padronizados = set()
-            for cpf in cpfs_kolmeya_comp:
-                cpf_limpo = limpar_cpf(str(cpf))
-                if cpf_limpo and len(cpf_limpo) == 11:
-                    cpfs_kolmeya_padronizados.add(cpf_limpo)
-            
-            # CPFs que estão em AMBOS (base e Kolmeya)
-            cpfs_coincidentes_comp = cpfs_base_padronizados & cpfs_kolmeya_padronizados
+            # CPFs que estão em AMBOS (base e Kolmeya). A janela e o centro de custo da comparação
+            # não são os da chave do índice compartilhado, então a interseção é feita aqui
+            cpfs_coincidentes_comp = indice.conjunto(['base']) & cpfs_kolmeya_comp
             
             
             
@@ -4564,7 +3194,8 @@ def main():
           
             
             with col_stats4:
-                percentual = (len(cpfs_coincidentes_comp) / len(cpfs_base_padronizados) * 100) if cpfs_base_padronizados else 0
+                total_base_comp = indice.contar(['base'])
+                percentual = (len(cpfs_coincidentes_comp) / total_base_comp * 100) if total_base_comp else 0
                 
             
             # Se há CPFs coincidentes, fazer pesquisa no FACTA
@@ -4578,50 +3209,32 @@ def main():
                     st.stop()
                 
                 # Testar conectividade com FACTA
-                if not testar_api_facta(token=token_facta, ambiente=ambiente_facta_comp):
+                if not api_facta_disponivel(token=token_facta, ambiente=ambiente_facta_comp):
                     
                     st.stop()
                 
                 # Consultar propostas no FACTA para os CPFs coincidentes
-                propostas_encontradas = []
                 cpfs_com_propostas = []
                 
                 # Converter para lista para processamento
-                cpfs_coincidentes_list = list(cpfs_coincidentes_comp)
-                
-                # Processar em lotes para não sobrecarregar a API
-                tamanho_lote = 50
-                total_lotes = (len(cpfs_coincidentes_list) + tamanho_lote - 1) // tamanho_lote
+                cpfs_coincidentes_list = cpfs_coincidentes_comp.textos()
                 
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
-                for i in range(0, len(cpfs_coincidentes_list), tamanho_lote):
-                        lote_cpfs = cpfs_coincidentes_list[i:i + tamanho_lote]
-                        lote_atual = (i // tamanho_lote) + 1
-                        
-                        status_text.text(f"🔍 Processando lote {lote_atual}/{total_lotes} ({len(lote_cpfs)} CPFs)...")
-                        
-                        # Consultar propostas para este lote de CPFs
-                        for cpf in lote_cpfs:
-                            try:
-                                # Consultar propostas específicas do CPF no FACTA
-                                propostas_cpf = consultar_andamento_propostas_facta(
-                                    cpfs=[cpf],
-                                    token=token_facta,
-                                    ambiente=ambiente_facta_comp
-                                )
-                                
-                                if propostas_cpf:
-                                    propostas_encontradas.extend(propostas_cpf)
-                                    cpfs_com_propostas.append(cpf)
-                                
-                            except Exception as e:
-                                st.warning(f"⚠️ Erro ao consultar CPF {cpf}: {str(e)}")
-                                continue
-                        
-                        # Atualizar progresso
-                        progress_bar.progress(lote_atual / total_lotes)
+                def atualizar_progresso_comparacao(concluidos, total, cpf, propostas_cpf):
+                    if propostas_cpf:
+                        cpfs_com_propostas.append(cpf)
+                    status_text.text(f"🔍 Consultando FACTA: {concluidos}/{total} CPFs ({len(cpfs_com_propostas)} com propostas)...")
+                    progress_bar.progress(concluidos / total)
+                
+                # Consulta concorrente, limitada pela cota do FACTA
+                propostas_encontradas = consultar_andamento_propostas_facta(
+                    cpfs=cpfs_coincidentes_list,
+                    token=token_facta,
+                    ambiente=ambiente_facta_comp,
+                    progresso=atualizar_progresso_comparacao
+                )
                 
                 progress_bar.empty()
                 status_text.empty()
@@ -4676,8 +3289,67 @@ def main():
         st.success("✅ Valores do FACTA foram removidos do painel Kolmeya!")
         st.rerun()
     
+    # Acessos em um espaço próprio acima dos painéis: os painéis do status aparecem
+    # sem esperar pela consulta de acessos, que preenche o espaço quando termina
+    painel_acessos = st.empty()
     components.html(dashboard_html, height=800)
     
+    # CONSULTA DOS ACESSOS DO KOLMEYA
+    print(f"🔍 CONSULTA KOLMEYA - Iniciando busca por acessos...")
+    
+    # Verificar token do Kolmeya
+    print(f"   🔑 Token Kolmeya: {'Sim' if token_kolmeya else 'Não'}")
+    
+    # Inicializar variável acessos_kolmeya
+    acessos_kolmeya = []
+    
+    if not token_kolmeya:
+        print(f"   ❌ Token do Kolmeya não encontrado!")
+        st.session_state["acessos_kolmeya_count"] = 0
+        st.session_state["cpfs_kolmeya_consultados"] = ConjuntoIds()
+    else:
+        print(f"✅ Token do Kolmeya encontrado: {token_kolmeya[:10]}...")
+        
+        # CONSULTA DIRETA aos acessos do Kolmeya
+        print(f"🔍 Consultando acessos do Kolmeya diretamente...")
+        print(f"   📅 Período: {data_ini} a {data_fim}")
+        print(f"   🏢 Centro de custo: {centro_custo_selecionado} ({centro_custo_valor})")
+        
+        # Consulta disparada no início da página; só este painel espera por ela
+        resultado_acessos = carregamento.resultado("acessos")
+        acessos_kolmeya = resultado_acessos.valor
+        if resultado_acessos.expirou:
+            painel_acessos.warning("⏱️ O Kolmeya não respondeu a tempo: o painel de acessos está sem dados.")
+    
+    if acessos_kolmeya:
+        print(f"✅ Acessos encontrados: {len(acessos_kolmeya)}")
+        
+        # SALVAR contagem de acessos no session state para mostrar no painel
+        st.session_state["acessos_kolmeya_count"] = len(acessos_kolmeya)
+        
+        # Extrair CPFs dos acessos
+        cpfs_acessos = extrair_cpfs_acessos_kolmeya(acessos_kolmeya)
+        
+        print(f"🔍 DEBUG - CPFs extraídos dos acessos do Kolmeya:")
+        print(f"   📊 Total de acessos: {len(acessos_kolmeya)}")
+        print(f"   📊 Total de CPFs únicos de acessos: {len(cpfs_acessos)}")
+        if cpfs_acessos:
+            print(f"   📋 Primeiros 5 CPFs de acessos: {cpfs_acessos.textos(5)}")
+            
+            # SALVAR CPFs consultados no session state para mostrar no painel
+            st.session_state["cpfs_kolmeya_consultados"] = cpfs_acessos
+        else:
+            print(f"   ⚠️ Nenhum CPF encontrado nos acessos do Kolmeya")
+            st.session_state["cpfs_kolmeya_consultados"] = ConjuntoIds()  # CPFs vazios
+    else:
+        print(f"⚠️ Nenhum acesso encontrado no Kolmeya para o período {data_ini} a {data_fim}")
+        st.session_state["acessos_kolmeya_count"] = 0
+        st.session_state["cpfs_kolmeya_consultados"] = ConjuntoIds()
+    
+    if not (token_kolmeya and resultado_acessos.expirou):
+        painel_acessos.caption(f"📲 Acessos Kolmeya no período: {st.session_state['acessos_kolmeya_count']:,}".replace(',', '.'))
+    
+    
     
     total_leads_gerados = 0
     telefones_base = 0
@@ -4698,26 +3370,14 @@ def main():
     if uploaded_file is not None and df_base is not None:
         try:
             
-            # Extrair telefones da base carregada (com filtro de data) - usar variável diferente
-            telefones_base_todos = extrair_telefones_da_base(df_base, data_ini, data_fim)
-            
-            # Extrair CPFs da base carregada (com filtro de data)
-            cpfs_base = extrair_cpfs_da_base(df_base, data_ini, data_fim)
-            
-            # Extrair telefones do Kolmeya (usando os dados filtrados por data)
-            telefones_kolmeya = extrair_telefones_kolmeya(messages)
-            
-            # Extrair CPFs do Kolmeya (usando os dados filtrados por data)
-            cpfs_kolmeya = extrair_cpfs_kolmeya(messages)
-            
-            # CALCULAR LEADS GERADOS BASEADO NA COMPARAÇÃO BASE VS KOLMEYA
+            # CALCULAR LEADS GERADOS BASEADO NA COMPARAÇÃO BASE VS KOLMEYA (índice do período)
             if messages:
-                # Calcular telefones coincidentes (iguais) entre base e Kolmeya
-                telefones_coincidentes = set(telefones_base_todos) & set(telefones_kolmeya)
-                total_leads_gerados = len(telefones_coincidentes)
+                # Telefones coincidentes (iguais) entre base e Kolmeya
+                total_leads_gerados = indice.contar(['base', 'status_kolmeya'], tipo='telefone')
                 telefones_base = total_leads_gerados
                 
-                print(f"🔍 Leads Gerados - Base: {len(telefones_base_todos)}, Kolmeya: {len(telefones_kolmeya)}, Coincidentes: {total_leads_gerados}")
+                print(f"🔍 Leads Gerados - Base: {indice.contar(['base'], tipo='telefone')}, "
+                      f"Kolmeya: {indice.contar(['status_kolmeya'], tipo='telefone')}, Coincidentes: {total_leads_gerados}")
             else:
                 # Se não há mensagens do Kolmeya, usar apenas dados da URA
                 # Inicializar variáveis URA com valores padrão se não estiverem definidas
@@ -4745,7 +3405,7 @@ def main():
         # Inicializar variáveis URA com valores padrão
         ura_count = 0
         ura_por_status = {'Novo': 0, 'FGTS': 0, 'CLT': 0, 'Outros': 0}
-        ura_cpfs_por_status = {'Novo': set(), 'FGTS': set(), 'CLT': set(), 'Outros': set()}
+        ura_cpfs_por_status = {'Novo': ConjuntoIds(), 'FGTS': ConjuntoIds(), 'CLT': ConjuntoIds(), 'Outros': ConjuntoIds()}
         registros_ura = []
         
         if centro_custo_selecionado == "Novo":
@@ -4835,11 +3495,15 @@ def test_environment_status():
     # Botão para teste do saldo Kolmeya
     if st.sidebar.button("💰 Teste Saldo Kolmeya"):
         try:
-            saldo = obter_saldo_kolmeya()
+            # Consulta direta (sem o saldo em memória), para testar o token e o endpoint
+            token_teste = get_kolmeya_token()
+            if not token_teste:
+                raise ValueError("Token do Kolmeya não encontrado")
+            saldo = consultar_saldo_kolmeya(token_teste)
             if saldo > 0:
                 st.sidebar.success(f"✅ Saldo: {formatar_real(saldo)}")
             else:
-                st.sidebar.warning("⚠️ Saldo zero ou erro na consulta")
+                st.sidebar.warning("⚠️ Saldo zero")
         except Exception as e:
             st.sidebar.error(f"❌ Erro: {str(e)[:50]}...")
     
@@ -4851,14 +3515,14 @@ def test_environment_status():
             
             # Teste em homologação
             st.sidebar.write("**Homologação:**")
-            if testar_api_facta(ambiente="homologacao"):
+            if api_facta_disponivel(ambiente="homologacao", forcar=True):
                 st.sidebar.success("✅ Homologação: OK")
             else:
                 st.sidebar.error("❌ Homologação: Falha")
             
             # Teste em produção
             st.sidebar.write("**Produção:**")
-            if testar_api_facta(ambiente="producao"):
+            if api_facta_disponivel(ambiente="producao", forcar=True):
                 st.sidebar.success("✅ Produção: OK")
             else:
                 st.sidebar.error("❌ Produção: Falha")
@@ -4887,7 +3551,7 @@ def test_environment_status():
                 
                 if cpfs:
                     st.sidebar.write("**Primeiros 5 CPFs:**")
-                    for i, cpf in enumerate(list(cpfs)[:5]):
+                    for i, cpf in enumerate(cpfs.textos(5)):
                         st.sidebar.write(f"{i+1}. {cpf}")
             else:
                 st.sidebar.error("❌ Nenhuma mensagem encontrada")
@@ -4990,9 +3654,9 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
         print("❌ Nenhum arquivo de base de dados fornecido")
         return {
             "erro": "Nenhum arquivo de base de dados fornecido",
-            "cpfs_base": set(),
-            "cpfs_kolmeya": set(),
-            "cpfs_coincidentes": set(),
+            "cpfs_base": ConjuntoIds(),
+            "cpfs_kolmeya": ConjuntoIds(),
+            "cpfs_coincidentes": ConjuntoIds(),
             "total_base": 0,
             "total_kolmeya": 0,
             "total_coincidentes": 0
@@ -5006,9 +3670,9 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
         print(f"❌ Erro ao carregar base: {e}")
         return {
             "erro": f"Erro ao carregar base: {e}",
-            "cpfs_base": set(),
-            "cpfs_kolmeya": set(),
-            "cpfs_coincidentes": set(),
+            "cpfs_base": ConjuntoIds(),
+            "cpfs_kolmeya": ConjuntoIds(),
+            "cpfs_coincidentes": ConjuntoIds(),
             "total_base": 0,
             "total_kolmeya": 0,
             "total_coincidentes": 0
@@ -5029,8 +3693,8 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
         return {
             "erro": "Token do Kolmeya não encontrado",
             "cpfs_base": cpfs_base,
-            "cpfs_kolmeya": set(),
-            "cpfs_coincidentes": set(),
+            "cpfs_kolmeya": ConjuntoIds(),
+            "cpfs_coincidentes": ConjuntoIds(),
             "total_base": len(cpfs_base),
             "total_kolmeya": 0,
             "total_coincidentes": 0
@@ -5048,21 +3712,23 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
         tenant_segment_id=tenant_segment_id
     )
     
-    # Converter para set
-    cpfs_kolmeya_set = set(cpfs_kolmeya)
+    # Conjunto int64 ordenado para a comparação
+    cpfs_kolmeya_set = como_conjunto(cpfs_kolmeya)
     print(f"✅ CPFs do Kolmeya consultados: {len(cpfs_kolmeya_set)}")
     
     # 4. COMPARAR CPFs
     print(f"\n🔍 Passo 4: Comparando CPFs...")
     
+    comparacao = sobreposicao(cpfs_base, cpfs_kolmeya_set)
+    
     # CPFs que estão em AMBOS os sistemas
-    cpfs_coincidentes = cpfs_base & cpfs_kolmeya_set
+    cpfs_coincidentes = comparacao['em_ambos']
     
     # CPFs que estão APENAS na base
-    cpfs_apenas_base = cpfs_base - cpfs_kolmeya_set
+    cpfs_apenas_base = comparacao['apenas_a']
     
     # CPFs que estão APENAS no Kolmeya
-    cpfs_apenas_kolmeya = cpfs_kolmeya_set - cpfs_base
+    cpfs_apenas_kolmeya = comparacao['apenas_b']
     
     # 5. RESULTADOS
     print(f"\n✅ Comparação concluída:")
@@ -5082,7 +3748,7 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
     # Mostrar alguns exemplos de CPFs coincidentes
     if cpfs_coincidentes:
         print(f"   📋 Exemplos de CPFs coincidentes:")
-        for i, cpf in enumerate(list(cpfs_coincidentes)[:5]):
+        for i, cpf in enumerate(cpfs_coincidentes.textos(5)):
             print(f"      {i+1}. {cpf}")
         if len(cpfs_coincidentes) > 5:
             print(f"      ... e mais {len(cpfs_coincidentes) - 5} CPFs")
@@ -5090,7 +3756,7 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
     # Mostrar alguns exemplos de CPFs apenas na base
     if cpfs_apenas_base:
         print(f"   📋 Exemplos de CPFs apenas na Base:")
-        for i, cpf in enumerate(list(cpfs_apenas_base)[:3]):
+        for i, cpf in enumerate(cpfs_apenas_base.textos(3)):
             print(f"      {i+1}. {cpf}")
         if len(cpfs_apenas_base) > 3:
             print(f"      ... e mais {len(cpfs_apenas_base) - 3} CPFs")
@@ -5098,7 +3764,7 @@ def testar_comparacao_cpfs_kolmeya_base(uploaded_file, data_ini, data_fim, tenan
     # Mostrar alguns exemplos de CPFs apenas no Kolmeya
     if cpfs_apenas_kolmeya:
         print(f"   📱 Exemplos de CPFs apenas no Kolmeya:")
-        for i, cpf in enumerate(list(cpfs_apenas_kolmeya)[:3]):
+        for i, cpf in enumerate(cpfs_apenas_kolmeya.textos(3)):
             print(f"      {i+1}. {cpf}")
         if len(cpfs_apenas_kolmeya) > 3:
             print(f"      ... e mais {len(cpfs_apenas_kolmeya) - 3} CPFs")
@@ -5240,7 +3906,7 @@ def testar_cpf_especifico(cpf_teste="07814821436"):
         tenant_segment_id=None  # Sem filtro de centro de custo
     )
     
-    cpfs_kolmeya_set = set(cpfs_kolmeya)
+    cpfs_kolmeya_set = como_conjunto(cpfs_kolmeya)
     print(f"   📊 Total CPFs encontrados no Kolmeya: {len(cpfs_kolmeya_set)}")
     
     # Verificar se o CPF está no Kolmeya
@@ -5394,7 +4060,7 @@ def testar_cpf_wilton_completo():
         tenant_segment_id=None
     )
     
-    cpfs_kolmeya_set_sem_filtro = set(cpfs_kolmeya_sem_filtro)
+    cpfs_kolmeya_set_sem_filtro = como_conjunto(cpfs_kolmeya_sem_filtro)
     print(f"   📊 CPFs encontrados (sem filtro): {len(cpfs_kolmeya_set_sem_filtro)}")
     print(f"   🔍 CPF Wilton encontrado (sem filtro): {'✅ SIM' if cpf_limpo in cpfs_kolmeya_set_sem_filtro else '❌ NÃO'}")
     
@@ -5409,7 +4075,7 @@ def testar_cpf_wilton_completo():
         tenant_segment_id="FGTS"  # Filtro FGTS
     )
     
-    cpfs_kolmeya_set_com_filtro = set(cpfs_kolmeya_com_filtro)
+    cpfs_kolmeya_set_com_filtro = como_conjunto(cpfs_kolmeya_com_filtro)
     print(f"   📊 CPFs encontrados (com filtro FGTS): {len(cpfs_kolmeya_set_com_filtro)}")
     print(f"   🔍 CPF Wilton encontrado (com filtro FGTS): {'✅ SIM' if cpf_limpo in cpfs_kolmeya_set_com_filtro else '❌ NÃO'}")
     
@@ -5424,7 +4090,7 @@ def testar_cpf_wilton_completo():
         tenant_segment_id=8103  # ID do FGTS
     )
     
-    cpfs_kolmeya_set_com_filtro_id = set(cpfs_kolmeya_com_filtro_id)
+    cpfs_kolmeya_set_com_filtro_id = como_conjunto(cpfs_kolmeya_com_filtro_id)
     print(f"   📊 CPFs encontrados (com filtro 8103): {len(cpfs_kolmeya_set_com_filtro_id)}")
     print(f"   🔍 CPF Wilton encontrado (com filtro 8103): {'✅ SIM' if cpf_limpo in cpfs_kolmeya_set_com_filtro_id else '❌ NÃO'}")
     
@@ -0,0 +1,165 @@
+"""
+Benchmark da extração de telefones e CPFs da base: iterrows (implementação anterior) x colunas.
+
+Uso:
+    python benchmark_extracao.py --linhas 1000000 --amostra-legado 50000
+
+A implementação por iterrows é medida em uma amostra e extrapolada para o total de linhas,
+pois rodá-la sobre 1M de linhas leva vários minutos. Na amostra, os conjuntos das duas
+implementações são comparados.
+"""
+import argparse
+import re
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from extracao_vetorizada import extrair_telefones_vetorizado, extrair_cpfs_vetorizado
+
+
+def gerar_base(linhas: int, seed: int = 42) -> pd.DataFrame:
+    """Base sintética no formato das bases carregadas (todas as colunas como texto)."""
+    rng = np.random.default_rng(seed)
+
+    cpfs = pd.Series(rng.integers(0, 10**11, linhas)).astype(str).str.zfill(11)
+    # Parte dos CPFs sem zeros à esquerda, vazios ou em notação científica
+    sem_zeros = rng.random(linhas) < 0.1
+    cpfs[sem_zeros] = cpfs[sem_zeros].str.lstrip('0')
+    cpfs[rng.random(linhas) < 0.02] = np.nan
+    cpfs[rng.random(linhas) < 0.001] = '1.20225E+10'
+
+    telefones = '55' + pd.Series(rng.integers(11, 99, linhas)).astype(str) + '9' + \
+        pd.Series(rng.integers(10**7, 10**8, linhas)).astype(str)
+    telefones[rng.random(linhas) < 0.05] = '(11) 3333-444'
+
+    inicio = np.datetime64('2024-01-01T00:00')
+    minutos = rng.integers(0, 60 * 24 * 90, linhas).astype('timedelta64[m]')
+    datas = pd.Series(inicio + minutos)
+    datas_br = datas.dt.strftime('%d/%m/%Y %H:%M')
+    iso = rng.random(linhas) < 0.3
+    datas_br[iso] = datas[iso].dt.strftime('%Y-%m-%d %H:%M:%S')
+    datas_br[rng.random(linhas) < 0.01] = 'sem data'
+
+    return pd.DataFrame({
+        'Nome': 'Cliente',
+        'CPF': cpfs,
+        'Telefone': telefones,
+        'Data Criação': datas_br,
+        'Status': rng.choice(['INSS', 'FGTS', 'CLT', 'Outro'], linhas),
+    }).astype(object)
+
+
+# Implementação anterior (iterrows), mantida aqui apenas como referência de resultado e tempo
+
+def _limpar_telefone(telefone):
+    if not telefone:
+        return ""
+    t = re.sub(r'\D', '', str(telefone))
+    return t[-11:] if len(t) >= 11 else ""
+
+
+def _limpar_cpf(cpf):
+    if not cpf:
+        return ""
+    cpf_str = str(cpf).strip()
+    if 'E' in cpf_str.upper() or 'e' in cpf_str:
+        try:
+            cpf_str = str(int(float(cpf_str)))
+        except (ValueError, OverflowError):
+            return ""
+    cpf_limpo = re.sub(r'\D', '', cpf_str)
+    if len(cpf_limpo) <= 11:
+        return cpf_limpo.zfill(11)
+    return cpf_limpo[-11:]
+
+
+def _data_no_periodo(row, colunas_data, data_ini, data_fim):
+    for col in colunas_data:
+        try:
+            data_str = str(row[col])
+            if data_str.strip():
+                data_criacao = None
+                if len(data_str) >= 16 and '/' in data_str:
+                    data_criacao = datetime.strptime(data_str[:16], '%d/%m/%Y %H:%M')
+                elif len(data_str) == 10 and '/' in data_str:
+                    data_criacao = datetime.strptime(data_str, '%d/%m/%Y')
+                elif len(data_str) >= 19:
+                    data_criacao = datetime.strptime(data_str[:19], '%Y-%m-%d %H:%M:%S')
+                elif len(data_str) == 10:
+                    data_criacao = datetime.strptime(data_str, '%Y-%m-%d')
+                if data_criacao:
+                    if datetime.combine(data_ini, datetime.min.time()) <= data_criacao <= datetime.combine(data_fim, datetime.max.time()):
+                        return True
+        except (ValueError, TypeError):
+            continue
+    return False
+
+
+def extrair_legado(df, data_ini, data_fim):
+    colunas_tel = [c for c in df.columns if any(k in c.lower() for k in ['telefone', 'phone', 'celular', 'mobile', 'tel', 'ddd'])] or df.columns.tolist()
+    colunas_cpf = [c for c in df.columns if any(k in c.lower() for k in ['cpf', 'document', 'documento', 'cnpj'])] or df.columns.tolist()
+    colunas_data = [c for c in df.columns if any(k in c.lower() for k in ['data', 'date', 'criacao', 'created', 'timestamp'])]
+
+    telefones, cpfs = set(), set()
+    for _, row in df.iterrows():
+        if data_ini and data_fim and colunas_data and not _data_no_periodo(row, colunas_data, data_ini, data_fim):
+            continue
+        for col in colunas_tel:
+            if row[col] is not None:
+                t = _limpar_telefone(row[col])
+                if len(t) == 11:
+                    telefones.add(t)
+    for _, row in df.iterrows():
+        if data_ini and data_fim and colunas_data and not _data_no_periodo(row, colunas_data, data_ini, data_fim):
+            continue
+        for col in colunas_cpf:
+            if row[col] is not None:
+                valor_str = str(row[col]).strip()
+                if valor_str and valor_str != '0':
+                    c = _limpar_cpf(valor_str)
+                    if c and len(c) == 11:
+                        cpfs.add(c)
+                        break
+    return telefones, cpfs
+
+
+def extrair_vetorizado(df, data_ini, data_fim):
+    telefones = extrair_telefones_vetorizado(df, data_ini, data_fim)
+    cpfs, _ = extrair_cpfs_vetorizado(df, data_ini, data_fim)
+    return telefones, cpfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--amostra-legado', type=int, default=50_000)
+    args = parser.parse_args()
+
+    data_ini, data_fim = date(2024, 1, 15), date(2024, 2, 15)
+
+    print(f"📊 Gerando base sintética com {args.linhas:,} linhas...")
+    df = gerar_base(args.linhas)
+
+    amostra = df.head(min(args.amostra_legado, len(df)))
+    inicio = time.perf_counter()
+    legado = extrair_legado(amostra, data_ini, data_fim)
+    tempo_amostra = time.perf_counter() - inicio
+    tempo_legado = tempo_amostra * len(df) / len(amostra)
+
+    vetorizado_amostra = extrair_vetorizado(amostra, data_ini, data_fim)
+    iguais = legado == vetorizado_amostra
+    print(f"🔍 Conjuntos idênticos na amostra de {len(amostra):,} linhas: {'✅ sim' if iguais else '❌ não'}")
+
+    inicio = time.perf_counter()
+    telefones, cpfs = extrair_vetorizado(df, data_ini, data_fim)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    print(f"⏱️ iterrows: {tempo_amostra:.2f}s em {len(amostra):,} linhas (~{tempo_legado:.1f}s estimado para {len(df):,})")
+    print(f"⚡ colunas:  {tempo_vetorizado:.2f}s em {len(df):,} linhas ({len(telefones):,} telefones, {len(cpfs):,} CPFs)")
+    print(f"🚀 Ganho estimado: {tempo_legado / tempo_vetorizado:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
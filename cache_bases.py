@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from leitura_base import LEITURA_APENAS_PAPEIS, ler_arquivo_base
+from log_dashboard import obter_logger
+from perfil_base import PerfilBase, calcular_hash_conteudo, guardar_perfil, obter_perfil_base
+
+# Diretório do cache de bases (aponte para um disco persistente para sobreviver a reinícios)
+BASES_CACHE_DIR = os.getenv('BASES_CACHE_DIR', 'bases_cache')
+
+# Tamanho máximo do cache em disco; acima dele as bases abertas há mais tempo são apagadas
+BASES_CACHE_MAX_MB = float(os.getenv('BASES_CACHE_MAX_MB', '512'))
+
+# Muda quando o formato gravado (ou o perfil) muda; arquivos de outra versão são ignorados
+VERSAO_CACHE_BASES = 1
+
+EXTENSAO = '.npz'
+
+# Separador dos valores distintos de cada coluna no bloco de texto gravado
+SEPARADOR_TEXTOS = '\x1f'
+
+logger = obter_logger('base')
+
+
+def _juntar_textos(textos: List[str]) -> np.ndarray:
+    """
+    Textos em um único bloco UTF-8 separado por SEPARADOR_TEXTOS (split em C na leitura).
+
+    Se algum texto contém o separador (ou o único texto é vazio, que não se distingue de
+    nenhum texto), grava um vetor de texto NumPy, mais lento e maior.
+    """
+    bloco = SEPARADOR_TEXTOS.join(textos)
+    if bloco.count(SEPARADOR_TEXTOS) != max(len(textos) - 1, 0) or (textos and not bloco):
+        return np.array(textos, dtype=str)
+    return np.frombuffer(bloco.encode('utf-8'), dtype=np.uint8)
+
+
+def _separar_textos(vetor: np.ndarray) -> List[str]:
+    if vetor.dtype != np.uint8:
+        return vetor.tolist()
+    if not len(vetor):
+        return []
+    return vetor.tobytes().decode('utf-8').split(SEPARADOR_TEXTOS)
+
+
+def _colunas_base(df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Cada coluna como códigos int32 (-1 = vazio) e a lista de valores distintos."""
+    vetores = {}
+    tipos = []
+    for i in range(df.shape[1]):
+        serie = df.iloc[:, i]
+        codigos, valores = pd.factorize(serie)
+        vetores[f'base_{i}'] = codigos.astype(np.int32)
+        vetores[f'valores_{i}'] = _juntar_textos([str(valor) for valor in valores])
+        tipos.append(str(serie.dtype))
+    return vetores, {'colunas': df.columns.tolist(), 'tipos': tipos}
+
+
+def _base_de_colunas(colunas, metadados: Dict) -> pd.DataFrame:
+    series = {}
+    for i, tipo in enumerate(metadados['tipos']):
+        # Código -1 (vazio) cai no NaN do final, como o read_csv deixa as células vazias
+        valores = np.array(_separar_textos(colunas[f'valores_{i}']) + [np.nan], dtype=object)
+        series[i] = pd.Series(valores[colunas[f'base_{i}']], dtype=object if tipo == 'object' else tipo)
+    df = pd.DataFrame(series, copy=False)
+    df.columns = metadados['colunas']
+    return df
+
+
+class CacheBases:
+    """
+    Bases enviadas já lidas e perfiladas, um arquivo .npz por hash do conteúdo.
+
+    Reabrir o mesmo arquivo (inclusive depois de reiniciar o servidor) não passa de novo
+    pelo read_csv/openpyxl nem pelo perfil: as colunas voltam dos códigos gravados e o
+    perfil dos seus vetores. O .npz não é compactado, para carregar rápido. O tamanho
+    total é limitado por BASES_CACHE_MAX_MB, apagando primeiro as bases lidas há mais tempo.
+    """
+
+    def __init__(self, diretorio: str = None, max_bytes: int = None):
+        self.diretorio = diretorio or BASES_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else int(BASES_CACHE_MAX_MB * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave + EXTENSAO)
+
+    def ler(self, chave: str) -> Optional[Tuple[pd.DataFrame, PerfilBase]]:
+        """Base e perfil gravados para o hash, ou None se não estão no cache (ou são de outra versão)."""
+        caminho = self._caminho(chave)
+        try:
+            with np.load(caminho, allow_pickle=False) as colunas:
+                metadados = json.loads(str(colunas['metadados']))
+                if (metadados.get('versao') != VERSAO_CACHE_BASES
+                        or metadados.get('apenas_papeis') != LEITURA_APENAS_PAPEIS):
+                    return None
+                df = _base_de_colunas(colunas, metadados['base'])
+                perfil = PerfilBase.de_vetores(df, colunas, metadados['perfil'])
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Base do cache ilegível, será lida de novo: %s (%s)", caminho, e)
+            return None
+        df.attrs['leitura'] = metadados.get('leitura', {})
+        return df, perfil
+
+    def salvar(self, chave: str, df: pd.DataFrame, perfil: PerfilBase):
+        vetores_base, metadados_base = _colunas_base(df)
+        vetores_perfil, metadados_perfil = perfil.vetores()
+        metadados = {
+            'versao': VERSAO_CACHE_BASES,
+            'apenas_papeis': LEITURA_APENAS_PAPEIS,
+            'leitura': df.attrs.get('leitura', {}),
+            'base': metadados_base,
+            'perfil': metadados_perfil,
+        }
+        caminho = self._caminho(chave)
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f'{caminho}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            np.savez(arquivo, metadados=np.array(json.dumps(metadados, default=str)),
+                     **vetores_base, **vetores_perfil)
+        os.replace(temporario, caminho)
+
+    def arquivos(self) -> List[Tuple[float, int, str]]:
+        """(último acesso, tamanho, caminho) de cada base gravada."""
+        arquivos = []
+        try:
+            nomes = os.listdir(self.diretorio)
+        except FileNotFoundError:
+            return arquivos
+        for nome in nomes:
+            if nome.endswith(EXTENSAO):
+                caminho = os.path.join(self.diretorio, nome)
+                try:
+                    info = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_atime, info.st_size, caminho))
+        return arquivos
+
+    def aplicar_limite(self):
+        """Apaga as bases menos usadas até o cache caber em max_bytes."""
+        with self._lock:
+            arquivos = self.arquivos()
+            total = sum(tamanho for _, tamanho, _ in arquivos)
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                    total -= tamanho
+                except FileNotFoundError:
+                    pass
+
+    def limpar(self):
+        with self._lock:
+            for _, _, caminho in self.arquivos():
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+
+
+_cache_padrao: Optional[CacheBases] = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache_bases() -> CacheBases:
+    """Cache compartilhado pelo processo (todas as sessões do Streamlit)."""
+    global _cache_padrao
+    with _lock_cache:
+        if _cache_padrao is None:
+            _cache_padrao = CacheBases()
+        return _cache_padrao
+
+
+def carregar_base(nome: str, conteudo: bytes, cache: Optional[CacheBases] = None) -> pd.DataFrame:
+    """
+    Base enviada, lida do cache em disco pelo hash do conteúdo.
+
+    Na primeira vez o arquivo é lido (ler_arquivo_base), perfilado e gravado; das
+    próximas, a base volta do disco com o perfil já pronto para obter_perfil_base.
+    O hash fica em df.attrs['hash_conteudo'] e o resumo da leitura em df.attrs['leitura']
+    (com 'cache' e 'segundos_cache' quando veio do disco). Falha ao gravar só é registrada.
+    """
+    cache = cache or obter_cache_bases()
+    chave = calcular_hash_conteudo(conteudo)
+
+    inicio = time.perf_counter()
+    lido = cache.ler(chave)
+    if lido is not None:
+        df, perfil = lido
+        df.attrs['hash_conteudo'] = chave
+        guardar_perfil(chave, perfil)
+        segundos = time.perf_counter() - inicio
+        df.attrs['leitura'] = dict(df.attrs['leitura'], cache=True, segundos_cache=round(segundos, 3))
+        logger.info("Base %s do cache em disco: %d linhas em %.2fs", nome, len(df), segundos)
+        return df
+
+    df = ler_arquivo_base(nome, conteudo)
+    df.attrs['hash_conteudo'] = chave
+    perfil = obter_perfil_base(df)
+    try:
+        cache.salvar(chave, df, perfil)
+        cache.aplicar_limite()
+    except Exception as e:
+        logger.warning("Não foi possível gravar a base no cache em disco: %s", e)
+    return df
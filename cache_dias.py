@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from kolmeya_store import FUSO_BRASIL, agora_brasil, dia_fechado, fechamento_dia
+from log_dashboard import obter_logger
+from registros_kolmeya import RegistrosKolmeya, CAMPOS_MENSAGEM
+
+# Diretório do cache por dia (pode ser sobrescrito por variável de ambiente)
+KOLMEYA_CACHE_DIR = os.getenv('KOLMEYA_CACHE_DIR', 'kolmeya_cache')
+
+# Tamanho máximo do cache em disco; acima dele os arquivos menos usados são apagados
+KOLMEYA_CACHE_MAX_MB = float(os.getenv('KOLMEYA_CACHE_MAX_MB', '256'))
+
+# Validade (segundos) de um dia ainda aberto; dias fechados não expiram
+KOLMEYA_CACHE_TTL_ABERTO = float(os.getenv('KOLMEYA_CACHE_TTL_ABERTO', '300'))
+
+EXTENSAO = '.npz'
+
+logger = obter_logger('kolmeya')
+
+
+def agrupar_dias_consecutivos(dias: List[date]) -> List[Tuple[date, date]]:
+    """Intervalos [início, fim] de dias consecutivos (ex.: 1, 2, 3, 5 -> (1, 3), (5, 5))."""
+    intervalos: List[Tuple[date, date]] = []
+    for dia in sorted(dias):
+        if intervalos and intervalos[-1][1] == dia - timedelta(days=1):
+            intervalos[-1] = (intervalos[-1][0], dia)
+        else:
+            intervalos.append((dia, dia))
+    return intervalos
+
+
+def gravado_fechado(mtime: float, dia: date) -> bool:
+    """Arquivo gravado (mtime) depois do fechamento do dia, ou seja, com o dia completo."""
+    return mtime >= fechamento_dia(dia).replace(tzinfo=FUSO_BRASIL).timestamp()
+
+
+class CacheDias:
+    """
+    Registros do Kolmeya em disco, um arquivo .npz compactado por (conta, endpoint, dia).
+
+    Dias fechados gravados depois do fechamento valem para sempre (gravados antes, com o
+    dia ainda aberto, são buscados de novo); dias abertos valem KOLMEYA_CACHE_TTL_ABERTO segundos.
+    O tamanho total é limitado por KOLMEYA_CACHE_MAX_MB, apagando primeiro os arquivos
+    lidos há mais tempo (o horário de acesso é atualizado a cada leitura).
+    """
+
+    def __init__(self, diretorio: str = None, max_bytes: int = None, ttl_aberto: float = None):
+        self.diretorio = diretorio or KOLMEYA_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else int(KOLMEYA_CACHE_MAX_MB * 1024 * 1024)
+        self.ttl_aberto = ttl_aberto if ttl_aberto is not None else KOLMEYA_CACHE_TTL_ABERTO
+        self._lock = threading.Lock()
+
+    def _caminho(self, conta: str, endpoint: str, dia: date) -> str:
+        return os.path.join(self.diretorio, conta, endpoint, dia.isoformat() + EXTENSAO)
+
+    def ler(self, conta: str, endpoint: str, dia: date, fechado: bool,
+            validade: bool = True) -> Optional[RegistrosKolmeya]:
+        """
+        Registros do dia, ou None se não estão no cache ou não valem mais.
+
+        Um dia aberto vale ttl_aberto segundos. Um dia fechado só vale para sempre se o
+        arquivo foi gravado depois do fechamento (ver gravado_fechado); uma foto tirada com
+        o dia ainda aberto é buscada de novo. Com validade=False o arquivo é lido de qualquer
+        forma (conferência de um dia aberto expirado).
+        """
+        caminho = self._caminho(conta, endpoint, dia)
+        try:
+            info = os.stat(caminho)
+            if validade and fechado and not gravado_fechado(info.st_mtime, dia):
+                return None
+            if validade and not fechado and time.time() - info.st_mtime > self.ttl_aberto:
+                return None
+            registros = RegistrosKolmeya.carregar(caminho)
+            os.utime(caminho, (time.time(), info.st_mtime))
+            return registros
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Arquivo do cache ilegível, será buscado de novo: %s (%s)", caminho, e)
+            return None
+
+    def renovar(self, conta: str, endpoint: str, dia: date):
+        """Reinicia a validade de um dia aberto conferido sem mudanças."""
+        try:
+            os.utime(self._caminho(conta, endpoint, dia))
+        except FileNotFoundError:
+            pass
+
+    def salvar(self, conta: str, endpoint: str, dia: date, registros: RegistrosKolmeya):
+        caminho = self._caminho(conta, endpoint, dia)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f'{caminho}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            registros.salvar(arquivo)
+        os.replace(temporario, caminho)
+
+    def aplicar_limite(self):
+        """Apaga os arquivos menos usados até o cache caber em max_bytes."""
+        with self._lock:
+            arquivos = []
+            for raiz, _, nomes in os.walk(self.diretorio):
+                for nome in nomes:
+                    if nome.endswith(EXTENSAO):
+                        caminho = os.path.join(raiz, nome)
+                        try:
+                            info = os.stat(caminho)
+                        except FileNotFoundError:
+                            continue
+                        arquivos.append((info.st_atime, info.st_size, caminho))
+
+            total = sum(tamanho for _, tamanho, _ in arquivos)
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                    total -= tamanho
+                except FileNotFoundError:
+                    pass
+
+    def limpar(self, conta: str = None):
+        """Remove o cache de uma conta (ou todo o cache)."""
+        alvo = os.path.join(self.diretorio, conta) if conta else self.diretorio
+        with self._lock:
+            for raiz, _, nomes in os.walk(alvo, topdown=False):
+                for nome in nomes:
+                    os.remove(os.path.join(raiz, nome))
+                if raiz != self.diretorio:
+                    os.rmdir(raiz)
+
+
+_cache_padrao: Optional[CacheDias] = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache_dias() -> CacheDias:
+    """Cache compartilhado pelo processo (todas as sessões do Streamlit)."""
+    global _cache_padrao
+    with _lock_cache:
+        if _cache_padrao is None:
+            _cache_padrao = CacheDias()
+        return _cache_padrao
+
+
+def _conferir(conferir: Callable[[date, RegistrosKolmeya], bool], dia: date, registros: RegistrosKolmeya) -> bool:
+    try:
+        return bool(conferir(dia, registros))
+    except Exception as e:
+        logger.debug("Conferência do dia %s falhou, o dia será buscado: %s", dia, e)
+        return False
+
+
+def carregar_por_dia(conta: str, endpoint: str, data_ini: date, data_fim: date,
+                     buscar: Callable[[date, date], RegistrosKolmeya],
+                     campos: Dict[str, Optional[str]] = CAMPOS_MENSAGEM,
+                     cache: Optional[CacheDias] = None,
+                     conferir: Optional[Callable[[date, RegistrosKolmeya], bool]] = None) -> RegistrosKolmeya:
+    """
+    Registros de [data_ini, data_fim] montados a partir do cache por dia.
+
+    Só os dias ausentes (ou abertos e expirados) são buscados, agrupados em intervalos
+    consecutivos: buscar(início, fim) devolve os registros do intervalo e deve levantar
+    exceção em caso de erro, para que nada seja gravado. Dias futuros não são consultados.
+
+    conferir(dia, registros) decide, com uma consulta barata, se um dia aberto expirado
+    continua igual; nesse caso ele é reaproveitado e sua validade reiniciada.
+    """
+    cache = cache or obter_cache_dias()
+    agora = agora_brasil()
+    ultimo_dia = min(data_fim, agora.date())
+    dias = [data_ini + timedelta(days=i) for i in range((ultimo_dia - data_ini).days + 1)]
+
+    partes: Dict[date, RegistrosKolmeya] = {}
+    faltando = []
+    conferidos = 0
+    for dia in dias:
+        fechado = dia_fechado(dia, agora)
+        registros = cache.ler(conta, endpoint, dia, fechado)
+        if registros is None and not fechado and conferir is not None:
+            # Lido sem validade só para a conferência
+            registros = cache.ler(conta, endpoint, dia, fechado, validade=False)
+            if registros is not None and _conferir(conferir, dia, registros):
+                cache.renovar(conta, endpoint, dia)
+                conferidos += 1
+            else:
+                registros = None
+        if registros is None:
+            faltando.append(dia)
+        else:
+            partes[dia] = registros
+
+    intervalos = agrupar_dias_consecutivos(faltando)
+    for inicio, fim in intervalos:
+        registros = buscar(inicio, fim)
+        dias_intervalo = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+        for dia, parte in registros.separar_por_dia(dias_intervalo).items():
+            partes[dia] = parte
+            cache.salvar(conta, endpoint, dia, parte)
+    if intervalos:
+        cache.aplicar_limite()
+
+    logger.info("Cache por dia %s: %d dia(s), %d do disco (%d conferido(s)), %d buscado(s) em %d intervalo(s)",
+                endpoint, len(dias), len(dias) - len(faltando), conferidos, len(faltando), len(intervalos))
+    return RegistrosKolmeya.concatenar([partes[dia] for dia in sorted(partes)], campos)
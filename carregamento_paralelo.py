@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Contexto do Streamlit nas threads (permite st.* dentro das tarefas, se necessário)
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    HAS_SCRIPT_RUN_CTX = True
+except ImportError:
+    HAS_SCRIPT_RUN_CTX = False
+
+# Número de consultas da página executadas ao mesmo tempo
+CARREGAMENTO_MAX_WORKERS = int(os.getenv('CARREGAMENTO_MAX_WORKERS', '4'))
+
+# Prazo (segundos) de cada painel da página principal
+PRAZO_PAINEL_SALDO = float(os.getenv('PRAZO_PAINEL_SALDO', '20'))
+PRAZO_PAINEL_STATUS = float(os.getenv('PRAZO_PAINEL_STATUS', '60'))
+PRAZO_PAINEL_ACESSOS = float(os.getenv('PRAZO_PAINEL_ACESSOS', '60'))
+PRAZO_PAINEL_FACTA = float(os.getenv('PRAZO_PAINEL_FACTA', '35'))
+
+
+class ResultadoTarefa:
+    """Resultado de uma consulta da página: valor (ou o padrão), erro e tempo gasto."""
+
+    def __init__(self, nome: str, valor: Any, duracao: float, erro: Optional[Exception] = None,
+                 expirou: bool = False):
+        self.nome = nome
+        self.valor = valor
+        self.duracao = duracao
+        self.erro = erro
+        self.expirou = expirou
+
+    @property
+    def ok(self) -> bool:
+        return self.erro is None and not self.expirou
+
+
+class CarregamentoParalelo:
+    """
+    Dispara as consultas independentes da página de uma vez e entrega cada resultado ao painel.
+
+    Cada tarefa tem seu próprio prazo, contado a partir do disparo: quem passa do prazo
+    devolve o valor padrão e só o seu painel fica sem dados. A latência da página passa a
+    ser a da consulta mais lenta, e não a soma de todas.
+    """
+
+    def __init__(self, max_workers: int = CARREGAMENTO_MAX_WORKERS):
+        contexto = get_script_run_ctx() if HAS_SCRIPT_RUN_CTX else None
+        inicializar = (lambda: add_script_run_ctx(threading.current_thread(), contexto)) if contexto else None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='carregamento',
+                                            initializer=inicializar)
+        self._tarefas: Dict[str, Tuple[Future, float, Optional[float], Any]] = {}
+        self._entregues: Dict[str, ResultadoTarefa] = {}
+
+    @staticmethod
+    def _executar(funcao: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float]:
+        inicio = time.time()
+        valor = funcao(*args, **kwargs)
+        return valor, time.time() - inicio
+
+    def iniciar(self, nome: str, funcao: Callable, *args, timeout: Optional[float] = None,
+                padrao: Any = None, **kwargs):
+        """
+        Dispara uma consulta.
+
+        Args:
+            nome: Nome da tarefa (usado em resultado())
+            funcao: Função a executar com *args e **kwargs
+            timeout: Prazo em segundos a partir do disparo (None = sem prazo)
+            padrao: Valor entregue ao painel em caso de erro ou prazo esgotado
+        """
+        futuro = self._executor.submit(self._executar, funcao, args, kwargs)
+        self._tarefas[nome] = (futuro, time.time(), timeout, padrao)
+
+    def resultado(self, nome: str) -> ResultadoTarefa:
+        """Espera a tarefa até o fim do seu prazo e devolve o resultado (uma vez calculado, fica guardado)."""
+        if nome in self._entregues:
+            return self._entregues[nome]
+
+        futuro, inicio, timeout, padrao = self._tarefas[nome]
+        restante = None if timeout is None else max(0.0, inicio + timeout - time.time())
+
+        try:
+            valor, duracao = futuro.result(timeout=restante)
+            resultado = ResultadoTarefa(nome, valor, duracao)
+            print(f"   ⚡ {nome}: concluído em {duracao:.1f}s")
+        except FuturesTimeoutError:
+            resultado = ResultadoTarefa(nome, padrao, time.time() - inicio, expirou=True)
+            print(f"   ⏱️ {nome}: sem resposta em {timeout:g}s, painel exibido sem esses dados")
+        except Exception as e:
+            resultado = ResultadoTarefa(nome, padrao, time.time() - inicio, erro=e)
+            print(f"   ❌ {nome}: {e}")
+
+        self._entregues[nome] = resultado
+        return resultado
+
+    def encerrar(self):
+        """Libera o pool sem esperar tarefas que estouraram o prazo (terminam em segundo plano)."""
+        self._executor.shutdown(wait=False)
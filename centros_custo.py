@@ -0,0 +1,98 @@
+from typing import Dict, FrozenSet, List, Optional
+
+from log_dashboard import obter_logger
+
+# Constantes para os centros de custo do Kolmeya
+TENANT_SEGMENT_ID_FGTS = "FGTS"  # FGTS conforme registro
+TENANT_SEGMENT_ID_CLT = "Crédito CLT"   # CRÉDITO CLT conforme registro
+TENANT_SEGMENT_ID_NOVO = "Novo"  # NOVO conforme registro
+
+# ID numérico no Kolmeya -> nomes aceitos nas mensagens (comparados sem diferenciar maiúsculas)
+CENTROS_CUSTO: Dict[int, List[str]] = {
+    8103: [TENANT_SEGMENT_ID_FGTS],
+    8105: [TENANT_SEGMENT_ID_NOVO, "INSS"],
+    8208: [TENANT_SEGMENT_ID_CLT, "CLT", "Crédito", "Credito"],
+}
+
+# Campos em que o centro de custo pode vir na mensagem, em ordem de prioridade
+CAMPOS_CENTRO_CUSTO = [
+    'centro_custo', 'tenant_segment_id', 'cost_center', 'segment',
+    'campaign_id', 'campaign_name', 'template_id', 'template_name',
+    'sender_id', 'sender_name', 'account_id', 'account_name',
+    'group_id', 'group_name', 'tag', 'tags', 'category'
+]
+
+logger = obter_logger('kolmeya')
+
+
+def normalizar_centro_custo(valor) -> str:
+    return str(valor).strip().casefold()
+
+
+def _montar_tabela() -> Dict[str, int]:
+    tabela = {}
+    for id_centro, nomes in CENTROS_CUSTO.items():
+        tabela[str(id_centro)] = id_centro
+        for nome in nomes:
+            tabela[normalizar_centro_custo(nome)] = id_centro
+    return tabela
+
+
+# Tabela canônica (nome ou ID normalizado -> ID), montada uma única vez
+TABELA_CENTROS_CUSTO = _montar_tabela()
+
+
+def resolver_centro_custo(valor) -> Optional[int]:
+    """ID do centro de custo para um nome ou ID (ex.: 'fgts', 'FGTS', 8103, '8103' -> 8103)."""
+    if valor is None:
+        return None
+    return TABELA_CENTROS_CUSTO.get(normalizar_centro_custo(valor))
+
+
+def valores_aceitos(tenant_segment_id) -> FrozenSet[str]:
+    """Valores normalizados que correspondem ao filtro; centros desconhecidos aceitam só o próprio valor."""
+    id_centro = resolver_centro_custo(tenant_segment_id)
+    if id_centro is None:
+        return frozenset([normalizar_centro_custo(tenant_segment_id)])
+    return frozenset(chave for chave, id_tabela in TABELA_CENTROS_CUSTO.items() if id_tabela == id_centro)
+
+
+def valor_centro_custo(msg: Dict) -> Optional[str]:
+    """Primeiro campo preenchido de CAMPOS_CENTRO_CUSTO na mensagem."""
+    for campo in CAMPOS_CENTRO_CUSTO:
+        valor = msg.get(campo)
+        if valor:
+            return str(valor)
+    return None
+
+
+def filtrar_por_centro_custo(messages: List[Dict], tenant_segment_id) -> List[Dict]:
+    """
+    Mensagens do centro de custo informado.
+
+    O centro de custo de cada mensagem é o primeiro campo preenchido de CAMPOS_CENTRO_CUSTO
+    (valor_centro_custo), a mesma regra da versão em colunas (RegistrosKolmeya).
+    Mensagens sem centro de custo são mantidas.
+    """
+    aceitos = valores_aceitos(tenant_segment_id)
+    logger.debug("Filtro por centro de custo %r: aceitos %s", tenant_segment_id, sorted(aceitos))
+    # Poucos valores distintos no payload: cada um é normalizado e conferido uma única vez
+    decisao: Dict[str, bool] = {}
+
+    filtradas = []
+    for msg in messages:
+        if not isinstance(msg, dict):
+            continue
+        valor = valor_centro_custo(msg)
+        if valor is None:
+            filtradas.append(msg)
+            continue
+
+        aceito = decisao.get(valor)
+        if aceito is None:
+            aceito = decisao[valor] = normalizar_centro_custo(valor) in aceitos
+            logger.debug("Centro de custo %r %s pelo filtro", valor, 'aceito' if aceito else 'rejeitado')
+        if aceito:
+            filtradas.append(msg)
+    return filtradas
+
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from log_dashboard import obter_logger
+
+# Validade (segundos) do resultado compartilhado depois que a chamada termina
+COALESCENCIA_TTL = float(os.getenv('COALESCENCIA_TTL', '15'))
+
+# Resultados mantidos em memória por coalescedor
+COALESCENCIA_MAX = int(os.getenv('COALESCENCIA_MAX', '32'))
+
+logger = obter_logger('kolmeya')
+
+
+def _normalizar_valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, (int, str)):
+        return str(valor).strip()
+    if isinstance(valor, dict):
+        return tuple(sorted((str(k), _normalizar_valor(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        itens = [_normalizar_valor(v) for v in valor]
+        return tuple(sorted(itens, key=repr) if isinstance(valor, (set, frozenset)) else itens)
+    return valor
+
+
+def chave_requisicao(endpoint: str, **params) -> Tuple:
+    """
+    Chave de uma chamada: endpoint + parâmetros em ordem, com valores equivalentes na
+    mesma forma (ex.: 8103 e '8103'; date e a data ISO).
+    """
+    return (endpoint,) + tuple(sorted((nome, _normalizar_valor(valor)) for nome, valor in params.items()))
+
+
+class _Chamada:
+    __slots__ = ('evento', 'resultado', 'erro', 'iniciada_em')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro: Optional[BaseException] = None
+        self.iniciada_em = time.monotonic()
+
+
+class Coalescedor:
+    """
+    Single-flight: chamadas iguais e simultâneas (mesma chave) dividem uma única execução.
+
+    A primeira sessão a pedir executa a função; as que chegam enquanto ela roda esperam
+    e recebem o mesmo resultado (ou a mesma exceção). O resultado fica guardado por ttl
+    segundos para as sessões que chegam logo depois; ttl=0 só junta as simultâneas.
+    """
+
+    def __init__(self, nome: str, ttl: float = COALESCENCIA_TTL, max_resultados: int = COALESCENCIA_MAX):
+        self.nome = nome
+        self.ttl = ttl
+        self.max_resultados = max_resultados
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[Hashable, _Chamada] = {}
+        self._resultados: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def executar(self, chave: Hashable, funcao: Callable[[], Any], ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            guardado = self._resultados.get(chave)
+            if guardado is not None and time.monotonic() - guardado[1] < ttl:
+                self._resultados.move_to_end(chave)
+                logger.debug("%s: resultado guardado reaproveitado", self.nome)
+                return guardado[0]
+            chamada = self._em_andamento.get(chave)
+            executar = chamada is None
+            if executar:
+                chamada = self._em_andamento[chave] = _Chamada()
+
+        if not executar:
+            logger.debug("%s: aguardando chamada em andamento há %.1fs", self.nome,
+                         time.monotonic() - chamada.iniciada_em)
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+                if chamada.erro is None and ttl > 0:
+                    self._resultados[chave] = (chamada.resultado, time.monotonic())
+                    self._resultados.move_to_end(chave)
+                    while len(self._resultados) > self.max_resultados:
+                        self._resultados.popitem(last=False)
+            chamada.evento.set()
+        return chamada.resultado
+
+    def limpar(self):
+        with self._lock:
+            self._resultados.clear()
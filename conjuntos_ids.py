@@ -0,0 +1,177 @@
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# CPFs e telefones normalizados têm 11 dígitos; é a largura do texto exibido/exportado
+DIGITOS_ID = 11
+
+# Maior quantidade de dígitos que cabe em um int64 sem risco de estouro
+_MAX_DIGITOS = 18
+
+
+class ConjuntoIds:
+    """
+    Conjunto de CPFs ou telefones guardado como vetor int64 ordenado e sem repetição.
+
+    Ocupa 8 bytes por identificador (um set de textos de 11 dígitos passa de 80) e as
+    operações de conjunto usam intersect1d/setdiff1d sobre os vetores. Os textos
+    de 11 dígitos só são montados para exibição e exportação: iterar, textos() e para_set().
+    A ordenação sem repetição usa sort + comparação com o vizinho (o np.unique das versões
+    recentes do NumPy usa hash e chega a ser dezenas de vezes mais lento para int64).
+
+    Aceita os operadores de set (&, -, |, in, len, ==) também contra sets de textos.
+    """
+
+    __slots__ = ('valores',)
+    __hash__ = None
+
+    def __init__(self, valores: Optional[np.ndarray] = None):
+        # valores já ordenados e sem repetição; para montar a partir de dados use de_codigos/de_textos
+        self.valores = np.empty(0, dtype=np.int64) if valores is None else valores
+
+    @classmethod
+    def de_codigos(cls, codigos) -> 'ConjuntoIds':
+        """Conjunto de um vetor de códigos int64; negativos (sem valor, inválido) são ignorados."""
+        codigos = np.asarray(codigos, dtype=np.int64)
+        return cls(_ordenar_sem_repeticao(codigos[codigos >= 0]))
+
+    @classmethod
+    def de_textos(cls, textos: Iterable) -> 'ConjuntoIds':
+        """Conjunto de textos só com dígitos (ex.: saída de limpar_cpf); os demais são ignorados."""
+        if isinstance(textos, pd.Series):
+            textos = textos.dropna().to_numpy()
+        texto = np.asarray([str(t) for t in textos], dtype=str)
+        if not len(texto):
+            return cls()
+        numeros = np.char.isdigit(texto) & (np.char.str_len(texto) <= _MAX_DIGITOS)
+        return cls(_ordenar_sem_repeticao(texto[numeros].astype(np.int64)))
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.textos())
+
+    def __repr__(self) -> str:
+        return f"ConjuntoIds({len(self)} ids, {self.valores.nbytes} bytes)"
+
+    def __contains__(self, item) -> bool:
+        codigo = _codigo(item)
+        if codigo is None or not len(self.valores):
+            return False
+        posicao = np.searchsorted(self.valores, codigo)
+        return posicao < len(self.valores) and self.valores[posicao] == codigo
+
+    def __eq__(self, outro) -> bool:
+        if not isinstance(outro, (ConjuntoIds, set, frozenset)):
+            return NotImplemented
+        return np.array_equal(self.valores, como_conjunto(outro).valores)
+
+    def pertence(self, valores) -> np.ndarray:
+        """Máscara de quais valores (códigos int64, ConjuntoIds ou textos) estão no conjunto."""
+        codigos = valores.valores if isinstance(valores, ConjuntoIds) else np.asarray(valores)
+        if codigos.dtype != np.int64:
+            codigos = _codigos_de_textos(codigos)
+        if not len(self.valores):
+            return np.zeros(len(codigos), dtype=bool)
+        posicoes = np.minimum(np.searchsorted(self.valores, codigos), len(self.valores) - 1)
+        return (self.valores[posicoes] == codigos) & (codigos >= 0)
+
+    def intersecao(self, outro) -> 'ConjuntoIds':
+        return ConjuntoIds(np.intersect1d(self.valores, como_conjunto(outro).valores, assume_unique=True))
+
+    def diferenca(self, outro) -> 'ConjuntoIds':
+        return ConjuntoIds(np.setdiff1d(self.valores, como_conjunto(outro).valores, assume_unique=True))
+
+    def uniao(self, outro) -> 'ConjuntoIds':
+        return ConjuntoIds(_ordenar_sem_repeticao(np.concatenate([self.valores, como_conjunto(outro).valores])))
+
+    __and__ = __rand__ = intersecao
+    __sub__ = diferenca
+    __or__ = __ror__ = uniao
+
+    def __rsub__(self, outro) -> 'ConjuntoIds':
+        return como_conjunto(outro).diferenca(self)
+
+    def textos(self, limite: Optional[int] = None) -> List[str]:
+        """Identificadores como textos de 11 dígitos, em ordem (os `limite` primeiros, se informado)."""
+        valores = self.valores if limite is None else self.valores[:limite]
+        return [f'{valor:0{DIGITOS_ID}d}' for valor in valores.tolist()]
+
+    def para_set(self) -> set:
+        return set(self.textos())
+
+
+Conjunto = Union[ConjuntoIds, np.ndarray, Iterable]
+
+
+def _ordenar_sem_repeticao(valores: np.ndarray) -> np.ndarray:
+    """Valores int64 ordenados e sem repetição."""
+    ordenados = np.sort(valores)
+    if len(ordenados) < 2:
+        return ordenados
+    novos = np.empty(len(ordenados), dtype=bool)
+    novos[0] = True
+    np.not_equal(ordenados[1:], ordenados[:-1], out=novos[1:])
+    return ordenados[novos]
+
+
+def _codigo(item) -> Optional[int]:
+    if isinstance(item, (int, np.integer)) and not isinstance(item, bool):
+        return int(item)
+    if isinstance(item, str) and item.isdigit() and len(item) <= _MAX_DIGITOS:
+        return int(item)
+    return None
+
+
+def _codigos_de_textos(valores) -> np.ndarray:
+    """Códigos int64 de textos em ordem; o que não é número vira -1."""
+    texto = np.asarray([str(v) for v in valores], dtype=str)
+    codigos = np.full(len(texto), -1, dtype=np.int64)
+    if len(texto):
+        numeros = np.char.isdigit(texto) & (np.char.str_len(texto) <= _MAX_DIGITOS)
+        codigos[numeros] = texto[numeros].astype(np.int64)
+    return codigos
+
+
+def como_conjunto(valores: Conjunto) -> ConjuntoIds:
+    """ConjuntoIds de um ConjuntoIds, de um vetor int64 de códigos ou de uma coleção de textos."""
+    if isinstance(valores, ConjuntoIds):
+        return valores
+    if valores is None:
+        return ConjuntoIds()
+    if isinstance(valores, np.ndarray) and valores.dtype == np.int64:
+        return ConjuntoIds.de_codigos(valores)
+    return ConjuntoIds.de_textos(valores)
+
+
+def unir(conjuntos: Iterable[Conjunto]) -> ConjuntoIds:
+    """União de vários conjuntos em uma única ordenação."""
+    vetores = [como_conjunto(c).valores for c in conjuntos]
+    if not vetores:
+        return ConjuntoIds()
+    return ConjuntoIds(_ordenar_sem_repeticao(np.concatenate(vetores)))
+
+
+def contar_em_comum(a: Conjunto, b: Conjunto) -> int:
+    """Quantidade de identificadores presentes nos dois conjuntos."""
+    return len(como_conjunto(a).intersecao(b))
+
+
+def sobreposicao(a: Conjunto, b: Conjunto) -> dict:
+    """
+    Sobreposição entre dois conjuntos: em ambos, só em a, só em b e os totais.
+
+    Os três grupos são ConjuntoIds; use len() para contar e textos() para exibir.
+    """
+    a, b = como_conjunto(a), como_conjunto(b)
+    em_ambos = a & b
+    return {
+        'em_ambos': em_ambos,
+        'apenas_a': a - em_ambos,
+        'apenas_b': b - em_ambos,
+        'total_a': len(a),
+        'total_b': len(b),
+        'total_em_ambos': len(em_ambos),
+    }
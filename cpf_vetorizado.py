@@ -0,0 +1,188 @@
+import re
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+# Códigos dos vetores int64 de CPF (CPFs vão de 0 a 99.999.999.999): vazio/ausente/'0', e
+# valor preenchido que não vira CPF (notação científica que não converte)
+SEM_CPF = -1
+CPF_INVALIDO = -2
+
+# Valores mais longos que isso (texto livre colado na coluna) seguem pelo caminho valor a valor
+LARGURA_MAX_CPF = 40
+
+# Linhas processadas por vez na matriz de caracteres (limita a memória temporária)
+BLOCO_CPF = 65536
+
+_POTENCIAS = 10 ** np.arange(11, dtype=np.int64)
+_MODULO = 10 ** 11
+_PESOS_DV1 = np.arange(10, 1, -1)
+_PESOS_DV2 = np.arange(11, 1, -1)
+
+Valores = Union[pd.Series, np.ndarray, Iterable]
+
+
+def limpar_cpf(cpf) -> str:
+    """
+    CPF de um valor: 11 dígitos (zeros à esquerda ou 11 últimos), ou '' se vazio.
+
+    Notação científica (ex.: 1.20225E+17) é convertida para inteiro antes; se não
+    converter, o resultado é ''.
+    """
+    if not cpf:
+        return ""
+    cpf_str = str(cpf).strip()
+    if 'e' in cpf_str or 'E' in cpf_str:
+        try:
+            cpf_str = str(int(float(cpf_str)))
+        except (ValueError, OverflowError):
+            return ""
+    digitos = re.sub(r'\D', '', cpf_str)
+    return digitos.zfill(11)[-11:]
+
+
+def validar_cpf(cpf) -> bool:
+    """Dígitos verificadores de um CPF de 11 dígitos (todos iguais é inválido)."""
+    if not cpf or len(cpf) != 11 or not cpf.isdigit() or cpf == cpf[0] * 11:
+        return False
+    digitos = [int(c) for c in cpf]
+    resto1 = sum(d * p for d, p in zip(digitos, range(10, 1, -1))) % 11
+    resto2 = sum(d * p for d, p in zip(digitos, range(11, 1, -1))) % 11
+    return digitos[9] == (0 if resto1 < 2 else 11 - resto1) and digitos[10] == (0 if resto2 < 2 else 11 - resto2)
+
+
+def _como_objetos(valores: Valores) -> np.ndarray:
+    if isinstance(valores, pd.Series):
+        return valores.to_numpy(dtype=object)
+    if isinstance(valores, np.ndarray):
+        return valores.astype(object, copy=False)
+    return np.array(list(valores), dtype=object)
+
+
+def _limpar_cpf_notacao(valor: str) -> int:
+    """CPF (int) de um valor com 'e'/'E'; CPF_INVALIDO se não for número."""
+    try:
+        digitos = ''.join(c for c in str(int(float(valor))) if c.isdigit())
+    except (ValueError, OverflowError):
+        return CPF_INVALIDO
+    return int(digitos[-11:])
+
+
+def _normalizar_bloco(texto: np.ndarray) -> np.ndarray:
+    """
+    CPFs (int64) de um bloco de textos curtos, percorrendo as colunas de caracteres.
+
+    Cada dígito entra como valor * 10 + dígito, módulo 10^11: sobram os 11 últimos
+    dígitos e os zeros à esquerda ficam implícitos.
+    """
+    n = len(texto)
+    largura = max(texto.dtype.itemsize // 4, 1)
+    colunas = np.ascontiguousarray(np.ascontiguousarray(texto).view(np.uint32).reshape(n, largura).T)
+
+    cpfs = np.zeros(n, dtype=np.int64)
+    quantidade = np.zeros(n, dtype=np.int16)
+    notacao = np.zeros(n, dtype=bool)
+    for caracteres in colunas:
+        digito = (caracteres - 48) < 10  # uint32: abaixo de '0' dá a volta e fica grande
+        cpfs = np.where(digito, (cpfs * 10 + (caracteres.astype(np.int64) - 48)) % _MODULO, cpfs)
+        quantidade += digito
+        notacao |= (caracteres == 101) | (caracteres == 69)
+
+    # Mesma regra da base: vazio (após strip) e '0' não são CPF. Só linhas com até um dígito podem cair aqui
+    for indice in np.flatnonzero(quantidade <= 1):
+        if str(texto[indice]).strip() in ('', '0'):
+            cpfs[indice] = SEM_CPF
+            notacao[indice] = False
+
+    for indice in np.flatnonzero(notacao):
+        cpfs[indice] = _limpar_cpf_notacao(str(texto[indice]).strip())
+    return cpfs
+
+
+def normalizar_cpfs(valores: Valores) -> np.ndarray:
+    """
+    CPFs de uma coluna inteira (Series, array ou lista) como int64.
+
+    Segue limpar_cpfs_coluna: vazios, ausentes e '0' viram SEM_CPF; o resto vira os 11
+    últimos dígitos com zeros à esquerda; notação científica é convertida para inteiro
+    (CPF_INVALIDO se não converter).
+    """
+    objetos = _como_objetos(valores)
+    cpfs = np.full(len(objetos), SEM_CPF, dtype=np.int64)
+    presentes = ~pd.isna(objetos)
+    if not presentes.any():
+        return cpfs
+
+    indices = np.flatnonzero(presentes)
+    texto = objetos[indices].astype(str)
+    curtos = np.char.str_len(texto) <= LARGURA_MAX_CPF
+
+    todos_curtos = bool(curtos.all())
+    selecao_curtos = None if todos_curtos else np.flatnonzero(curtos)
+    for inicio in range(0, int(curtos.sum()), BLOCO_CPF):
+        if todos_curtos:
+            selecao = slice(inicio, inicio + BLOCO_CPF)
+            bloco = texto[selecao]
+        else:
+            selecao = selecao_curtos[inicio:inicio + BLOCO_CPF]
+            bloco = texto[selecao]
+            bloco = bloco.astype(f'U{max(int(np.char.str_len(bloco).max()), 1)}')
+        cpfs[indices[selecao]] = _normalizar_bloco(bloco)
+
+    for indice in np.flatnonzero(~curtos):
+        valor = str(texto[indice]).strip()
+        if valor in ('', '0'):
+            continue
+        cpf = limpar_cpf(valor)
+        cpfs[indices[indice]] = int(cpf) if cpf else CPF_INVALIDO
+    return cpfs
+
+
+def digitos_cpfs(cpfs: np.ndarray) -> np.ndarray:
+    """Matriz (n, 11) uint8 com os dígitos de cada CPF int64 (linhas sem CPF ficam zeradas)."""
+    cpfs = np.where(cpfs >= 0, cpfs, 0)
+    return ((cpfs[:, None] // _POTENCIAS[::-1]) % 10).astype(np.uint8)
+
+
+def _validar_bloco(cpfs: np.ndarray) -> np.ndarray:
+    digitos = digitos_cpfs(cpfs)
+    resto1 = (digitos[:, :9] @ _PESOS_DV1) % 11
+    resto2 = (digitos[:, :10] @ _PESOS_DV2) % 11
+    dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+    dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+    todos_iguais = (digitos == digitos[:, :1]).all(axis=1)
+    return (cpfs >= 0) & (digitos[:, 9] == dv1) & (digitos[:, 10] == dv2) & ~todos_iguais
+
+
+def validar_cpfs(cpfs: Valores) -> np.ndarray:
+    """
+    Máscara de CPFs com dígitos verificadores válidos.
+
+    Aceita o vetor int64 de normalizar_cpfs ou textos; textos só são válidos com
+    exatamente 11 dígitos (como em validar_cpf). Os dígitos são conferidos em blocos
+    de BLOCO_CPF linhas, para a matriz temporária não crescer com a coluna.
+    """
+    if not (isinstance(cpfs, np.ndarray) and cpfs.dtype == np.int64):
+        objetos = _como_objetos(cpfs)
+        codigos = np.full(len(objetos), SEM_CPF, dtype=np.int64)
+        presentes = ~pd.isna(objetos)
+        if presentes.any():
+            texto = objetos[presentes].astype(str)
+            onze = (np.char.str_len(texto) == 11) & np.char.isdigit(texto)
+            convertidos = np.full(len(texto), SEM_CPF, dtype=np.int64)
+            convertidos[onze] = texto[onze].astype(np.int64)
+            codigos[presentes] = convertidos
+        cpfs = codigos
+
+    validos = np.zeros(len(cpfs), dtype=bool)
+    for inicio in range(0, len(cpfs), BLOCO_CPF):
+        validos[inicio:inicio + BLOCO_CPF] = _validar_bloco(cpfs[inicio:inicio + BLOCO_CPF])
+    return validos
+
+
+def cpfs_texto(cpfs: np.ndarray) -> np.ndarray:
+    """CPFs int64 como textos de 11 dígitos (object; None onde não há CPF)."""
+    texto = (digitos_cpfs(cpfs) + 48).view('S11').ravel().astype('U11').astype(object)
+    texto[cpfs < 0] = None
+    return texto
@@ -5,7 +5,16 @@ import plotly.graph_objects as go
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import json
+import os
+import sys
 from typing import Dict, List, Optional
+
+# Adicionar o diretório raiz ao path para importar os módulos compartilhados
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import http_get, http_post
+from kolmeya_store import sincronizar_status_kolmeya
+from kolmeya_acessos import buscar_acessos_kolmeya, LIMITE_ACESSOS_API
 from facta_token_manager import render_facta_token_page, get_facta_token, is_facta_token_valid
 from config import (
     KOLMEYA_API_BASE_URL, 
@@ -288,7 +297,7 @@ def testar_conexao_api(token: str) -> bool:
             "limit": 1
         }
         
-        response = requests.post(API_BASE_URL, headers=headers, json=payload, timeout=10)
+        response = http_post(API_BASE_URL, headers=headers, json=payload, timeout=10)
         
         if response.status_code == 200:
             return True
@@ -309,7 +318,8 @@ def testar_conexao_api(token: str) -> bool:
 def obter_relatorio_sms_paginado(start_at: str, end_at: str, token: str, centro_custo: Optional[str] = None) -> Optional[pd.DataFrame]:
     """
     Obtém todos os envios de SMS da API Kolmeya com múltiplas consultas automáticas,
-    dividindo o período em intervalos menores para garantir a recuperação de todos os dados.
+    dividindo o período em janelas menores para garantir a recuperação de todos os dados.
+    Períodos acima de 7 dias são aceitos (uma janela por dia).
     
     Args:
         start_at: Data inicial (Y-m-d H:i)
@@ -321,12 +331,6 @@ def obter_relatorio_sms_paginado(start_at: str, end_at: str, token: str, centro_
         DataFrame com todos os envios no período ou None se houver erro.
     """
     try:
-        headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
         if not start_at or not end_at:
             st.error("Datas de início e fim são obrigatórias.")
             return None
@@ -334,77 +338,27 @@ def obter_relatorio_sms_paginado(start_at: str, end_at: str, token: str, centro_
         start_date_dt = datetime.strptime(start_at, '%Y-%m-%d %H:%M')
         end_date_dt = datetime.strptime(end_at, '%Y-%m-%d %H:%M')
         
-        if (end_date_dt - start_date_dt).days > 7:
-            st.error("O período máximo permitido é de 7 dias.")
-            return None
-        
-        todos_dados = []
-        total_registros_obtidos = 0
-        
-        # A lista de intervalos será preenchida dinamicamente
-        intervalos_para_buscar = [(start_date_dt, end_date_dt)]
-        
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Limite de registros 
-        API_LIMIT = 30000
-        
-        # Loop principal para buscar dados
-        i = 0
-        while intervalos_para_buscar:
-            current_interval_start, current_interval_end = intervalos_para_buscar.pop(0)
-            
-            # Atualizar status da barra de progresso
-            i += 1
-            progress = min(1.0, i / 1000)  
-            status_text.text(f"Buscando dados... Intervalo {i} ({current_interval_start.strftime('%H:%M')} - {current_interval_end.strftime('%H:%M')})")
-            progress_bar.progress(progress)
-            
-            payload = {
-                "start_at": current_interval_start.strftime('%Y-%m-%d %H:%M'),
-                "end_at": current_interval_end.strftime('%Y-%m-%d %H:%M'),
-                "limit": API_LIMIT
-            }
-            if centro_custo:
-                payload["centro_custo"] = centro_custo
-            
-            try:
-                response = requests.post(API_BASE_URL, headers=headers, json=payload, timeout=30)
-                response.raise_for_status() 
-                
-                data = response.json()
-                
-                if 'messages' in data and data['messages']:
-                    dados_obtidos_no_intervalo = data['messages']
-                    todos_dados.extend(dados_obtidos_no_intervalo)
-                    total_registros_obtidos += len(dados_obtidos_no_intervalo)
-                
-                    if len(dados_obtidos_no_intervalo) >= API_LIMIT:
-                        
-                        mid_point = current_interval_start + (current_interval_end - current_interval_start) / 2
-                        if mid_point > current_interval_start: # Evitar loops 
-                            intervalos_para_buscar.insert(0, (current_interval_start, mid_point))
-                            intervalos_para_buscar.insert(1, (mid_point, current_interval_end))
-                        else:
-                            #se intervalo curto
-                            temp_start = current_interval_start
-                            while temp_start < current_interval_end:
-                                temp_end = min(temp_start + timedelta(minutes=1), current_interval_end)
-                                if temp_end > temp_start:
-                                    intervalos_para_buscar.insert(0, (temp_start, temp_end))
-                                temp_start = temp_end
-                            
-            except requests.exceptions.HTTPError as http_err:
-                # Tratar erro 422 silenciosamente (dados inválidos para o intervalo)
-                if http_err.response.status_code != 422:
-                    # Apenas logar outros erros HTTP, mas continuar
-                    continue
-                # Para erro 422, apenas continuar sem mostrar mensagem
-                continue
-            except (requests.exceptions.RequestException, json.JSONDecodeError, Exception):
-                # Tratar todos os outros erros silenciosamente
-                continue
+        def atualizar_progresso(concluidas: int, planejadas: int):
+            status_text.text(f"Buscando dados... Janela {concluidas} de {planejadas}")
+            progress_bar.progress(min(1.0, concluidas / planejadas))
+        
+        payload_extra = {"centro_custo": centro_custo} if centro_custo else None
+        
+        # Dias fechados vêm do armazenamento local; só os dias abertos são buscados,
+        # em janelas diárias paralelas divididas quando atingem o limite da API
+        todos_dados = sincronizar_status_kolmeya(
+            start_at,
+            end_at,
+            token,
+            payload_extra=payload_extra,
+            url=API_BASE_URL,
+            timeout=30,
+            ignorar_erros=True,
+            progresso=atualizar_progresso
+        )
         
         progress_bar.empty()
         status_text.empty()
@@ -457,18 +411,12 @@ def obter_acessos_encurtador(start_at: str, end_at: str, token: str, tenant_segm
         token: Token de autorização
         tenant_segment_id: ID do centro de custo específico (opcional)
         is_robot: Filtro para robôs (0 = não robô, 1 = robô)
-        limit: Limite de registros (máximo 5000)
+        limit: Registros por página (máximo 5000); todas as páginas são buscadas
     
     Returns:
         DataFrame com os acessos no período ou None se houver erro.
     """
     try:
-        headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
         if not start_at or not end_at:
             st.error("Datas de início e fim são obrigatórias.")
             return None, 0
@@ -479,72 +427,17 @@ def obter_acessos_encurtador(start_at: str, end_at: str, token: str, tenant_segm
         if ' ' in end_at:
             end_at = end_at.split(' ')[0]
         
-        # IMPLEMENTAR PAGINAÇÃO AUTOMÁTICA para garantir todos os registros
-        all_accesses = []
-        total_accesses = 0
-        page = 1
-        max_pages = 50  
-        
-        while page <= max_pages:
-            payload = {
-                "start_at": start_at,
-                "end_at": end_at,
-                "limit": min(limit, 5000),  # Garantir que não exceda o limite da API
-                "page": page
-            }
-            
-            if tenant_segment_id is not None:
-                payload["tenant_segment_id"] = tenant_segment_id
-            
-            if is_robot is not None:
-                payload["is_robot"] = is_robot
-            
-            response = requests.post(API_ACCESSES_URL, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Processar resposta da API
-            current_accesses = []
-            current_total = 0
-            
-            if isinstance(data, list):
-                # Verificar se é uma lista de objetos com 'accesses' e 'totalAccesses'
-                if data and isinstance(data[0], dict) and 'accesses' in data[0]:
-                    for item in data:
-                        if isinstance(item, dict) and 'accesses' in item:
-                            if isinstance(item['accesses'], list):
-                                current_accesses.extend(item['accesses'])
-                            current_total += item.get('totalAccesses', 0)
-                else:
-                    # Formato: lista direta de acessos
-                    current_accesses = data
-                    current_total = len(data)
-            elif isinstance(data, dict) and 'accesses' in data:
-                # Formato: dicionário com 'accesses' e 'totalAccesses'
-                current_accesses = data['accesses']
-                current_total = data.get('totalAccesses', len(current_accesses))
-            else:
-                st.error(f"Formato de resposta da API não reconhecido na página {page}")
-                break
-            
-            # Adicionar acessos da página atual
-            if current_accesses:
-                all_accesses.extend(current_accesses)
-                total_accesses = max(total_accesses, current_total)
-                
-                # Se recebemos menos registros que o limite, provavelmente é a última página
-                if len(current_accesses) < limit:
-                    break
-            else:
-                # Página vazia, parar
-                break
-            
-            page += 1
-            
-            # Pequena pausa para não sobrecarregar a API
-            import time
-            time.sleep(0.1)
+        # Todas as páginas: a primeira traz totalAccesses, as demais são buscadas em paralelo
+        all_accesses, total_accesses = buscar_acessos_kolmeya(
+            start_at,
+            end_at,
+            token,
+            tenant_segment_id=tenant_segment_id,
+            is_robot=is_robot,
+            limite=min(limit, LIMITE_ACESSOS_API),  # Garantir que não exceda o limite da API
+            url=API_ACCESSES_URL,
+            timeout=30
+        )
         
         if not all_accesses:
             st.warning("Nenhum acesso encontrado para o período selecionado.")
@@ -694,7 +587,7 @@ def obter_propostas_facta(token: str, ambiente: str = 'producao', cpfs_validos:
                 except:
                     pass
         
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = http_get(url, headers=headers, params=params, timeout=30)
         response.raise_for_status()
         
         data = response.json()
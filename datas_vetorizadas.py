@@ -0,0 +1,136 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import compress
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Fuso das datas devolvidas pelas APIs e das bases carregadas
+FUSO_HORARIO = 'America/Sao_Paulo'
+
+# Formatos candidatos (formato, quantidade de caracteres considerados), em ordem de preferência
+FORMATOS_DATA = [
+    ('%d/%m/%Y %H:%M:%S', 19),
+    ('%d/%m/%Y %H:%M', 16),
+    ('%d/%m/%Y', 10),
+    ('%Y-%m-%d %H:%M:%S', 19),
+    ('%Y-%m-%dT%H:%M:%S', 19),
+    ('%Y-%m-%d %H:%M', 16),
+    ('%Y-%m-%d', 10),
+]
+
+# Quantidade de valores usados para inferir o formato de uma coluna
+TAMANHO_AMOSTRA = 200
+# Colunas mistas: quantos formatos diferentes tentar antes de desistir do restante
+MAX_FORMATOS_POR_COLUNA = 3
+# Colunas convertidas mantidas em memória
+MAX_COLUNAS_CACHE = 32
+
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    """Valores como texto sem espaços nas pontas; ausentes viram ''."""
+    serie = serie.astype(object)
+    return serie.where(serie.notna(), '').astype(str).str.strip()
+
+
+def inferir_formato(texto: pd.Series, formatos: List[Tuple[str, int]] = FORMATOS_DATA) -> Optional[Tuple[str, int]]:
+    """
+    Formato que converte mais valores de uma amostra da coluna.
+
+    Em empate vale a ordem de FORMATOS_DATA (com segundos antes de sem segundos).
+    Retorna None se nenhum formato converte a amostra.
+    """
+    amostra = texto[texto != ''].head(TAMANHO_AMOSTRA)
+    if amostra.empty:
+        return None
+
+    melhor, acertos_melhor = None, 0
+    for formato, largura in formatos:
+        acertos = int(pd.to_datetime(amostra.str[:largura], format=formato, errors='coerce').notna().sum())
+        if acertos > acertos_melhor:
+            melhor, acertos_melhor = (formato, largura), acertos
+    return melhor
+
+
+def parsear_datas(serie: pd.Series, formatos: List[Tuple[str, int]] = FORMATOS_DATA,
+                  fuso: Optional[str] = FUSO_HORARIO) -> pd.Series:
+    """
+    Converte uma coluna de datas com o formato inferido de uma amostra, em uma chamada por formato.
+
+    Valores que o formato inferido não converte (colunas mistas) passam por nova inferência,
+    até MAX_FORMATOS_POR_COLUNA formatos. O que sobra vira NaT.
+    Com fuso, as datas saem localizadas (ex.: America/Sao_Paulo, -03:00).
+    """
+    texto = _como_texto(serie)
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    pendentes = texto != ''
+
+    for _ in range(MAX_FORMATOS_POR_COLUNA):
+        if not pendentes.any():
+            break
+        escolhido = inferir_formato(texto[pendentes], formatos)
+        if escolhido is None:
+            break
+        formato, largura = escolhido
+        datas[pendentes] = pd.to_datetime(texto[pendentes].str[:largura], format=formato, errors='coerce')
+        pendentes &= datas.isna()
+
+    if fuso:
+        datas = datas.dt.tz_localize(fuso, ambiguous='NaT', nonexistent='shift_forward')
+    return datas
+
+
+_cache_datas: "OrderedDict[str, pd.Series]" = OrderedDict()
+_lock_cache = threading.Lock()
+
+
+def _chave_serie(serie: pd.Series, fuso: Optional[str]) -> str:
+    valores = pd.util.hash_pandas_object(_como_texto(serie), index=False).to_numpy()
+    return hashlib.sha256(valores.tobytes() + str(fuso).encode()).hexdigest()
+
+
+def parsear_datas_cache(serie: pd.Series, fuso: Optional[str] = FUSO_HORARIO) -> pd.Series:
+    """parsear_datas memoizado pelo conteúdo da coluna (mesmo payload não é convertido duas vezes)."""
+    chave = _chave_serie(serie, fuso)
+
+    with _lock_cache:
+        datas = _cache_datas.get(chave)
+        if datas is not None:
+            _cache_datas.move_to_end(chave)
+            return datas.set_axis(serie.index)
+
+    datas = parsear_datas(serie, fuso=fuso)
+
+    with _lock_cache:
+        _cache_datas[chave] = datas
+        while len(_cache_datas) > MAX_COLUNAS_CACHE:
+            _cache_datas.popitem(last=False)
+    return datas
+
+
+def datas_do_campo(registros: List[Dict], campo: str, fuso: Optional[str] = FUSO_HORARIO) -> pd.Series:
+    """Datas de um campo de uma lista de registros da API (mensagens, acessos), uma por registro."""
+    valores = [registro.get(campo) if isinstance(registro, dict) else None for registro in registros]
+    return parsear_datas_cache(pd.Series(valores, dtype=object), fuso=fuso)
+
+
+def limites_periodo(data_ini, data_fim, fuso: Optional[str] = FUSO_HORARIO) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """[data_ini 00:00, data_fim 23:59:59.999999] no fuso informado."""
+    inicio = pd.Timestamp(datetime.combine(data_ini, datetime.min.time()))
+    fim = pd.Timestamp(datetime.combine(data_fim, datetime.max.time()))
+    if fuso:
+        inicio, fim = inicio.tz_localize(fuso), fim.tz_localize(fuso)
+    return inicio, fim
+
+
+def mascara_intervalo(datas: pd.Series, inicio: pd.Timestamp, fim: pd.Timestamp) -> np.ndarray:
+    """True onde a data está em [inicio, fim]; NaT dá False."""
+    return ((datas >= inicio) & (datas <= fim)).to_numpy(dtype=bool)
+
+
+def filtrar_por_mascara(registros: List, mascara: np.ndarray) -> List:
+    """Registros onde a máscara é True, na ordem original."""
+    return list(compress(registros, mascara))
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from log_dashboard import obter_logger
+
+# Falhas seguidas que abrem o disjuntor de um endpoint
+DISJUNTOR_FALHAS = int(os.getenv('DISJUNTOR_FALHAS', '3'))
+
+# Segundos com o disjuntor aberto antes de deixar passar uma requisição de teste
+DISJUNTOR_PAUSA = float(os.getenv('DISJUNTOR_PAUSA', '30'))
+
+# Validade (segundos) do resultado de um teste de saúde, conforme deu certo ou não
+SAUDE_TTL_OK = float(os.getenv('SAUDE_TTL_OK', '120'))
+SAUDE_TTL_FALHA = float(os.getenv('SAUDE_TTL_FALHA', '30'))
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio-aberto'
+
+logger = obter_logger('http')
+
+
+class CircuitoAberto(requests.exceptions.ConnectionError):
+    """Requisição recusada sem ir à rede porque o endpoint está com o disjuntor aberto."""
+
+    def __init__(self, endpoint: str, restante: float):
+        super().__init__(f"Endpoint indisponível, nova tentativa em {restante:.0f}s: {endpoint}")
+        self.endpoint = endpoint
+        self.restante = restante
+
+
+def chave_endpoint(url: str) -> str:
+    """Host + caminho da URL (sem query), que identifica o disjuntor."""
+    partes = urlsplit(url)
+    return f"{partes.netloc.lower()}{partes.path.rstrip('/')}"
+
+
+class Disjuntor:
+    """
+    Circuit breaker de um endpoint.
+
+    Depois de `falhas_max` falhas seguidas (erro de conexão, timeout ou 5xx), recusa
+    as chamadas por `pausa` segundos com CircuitoAberto, sem esperar o timeout. Passada
+    a pausa, uma única requisição de teste é liberada: se der certo o disjuntor fecha,
+    se falhar ele volta a abrir.
+    """
+
+    def __init__(self, endpoint: str, falhas_max: int = DISJUNTOR_FALHAS, pausa: float = DISJUNTOR_PAUSA):
+        self.endpoint = endpoint
+        self.falhas_max = falhas_max
+        self.pausa = pausa
+        self._lock = threading.Lock()
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._falhas < self.falhas_max:
+                return FECHADO
+            if self._testando or time.monotonic() >= self._aberto_ate:
+                return MEIO_ABERTO
+            return ABERTO
+
+    def restante(self) -> float:
+        """Segundos até a próxima requisição de teste (0 se o disjuntor não está aberto)."""
+        with self._lock:
+            if self._falhas < self.falhas_max:
+                return 0.0
+            return max(0.0, self._aberto_ate - time.monotonic())
+
+    def permitir(self):
+        """Levanta CircuitoAberto se a chamada não deve ir à rede."""
+        with self._lock:
+            if self._falhas < self.falhas_max:
+                return
+            agora = time.monotonic()
+            if agora < self._aberto_ate or self._testando:
+                raise CircuitoAberto(self.endpoint, max(0.0, self._aberto_ate - agora))
+            self._testando = True
+
+    def liberar(self):
+        """Encerra a requisição de teste sem contar sucesso nem falha (erro alheio ao endpoint)."""
+        with self._lock:
+            self._testando = False
+
+    def registrar_sucesso(self):
+        with self._lock:
+            if self._falhas >= self.falhas_max:
+                logger.info("Disjuntor fechado: %s voltou a responder", self.endpoint)
+            self._falhas = 0
+            self._testando = False
+
+    def registrar_falha(self, motivo):
+        with self._lock:
+            self._falhas += 1
+            self._testando = False
+            if self._falhas >= self.falhas_max:
+                if self._falhas == self.falhas_max:
+                    logger.warning("Disjuntor aberto por %.0fs após %d falhas seguidas: %s (%s)",
+                                   self.pausa, self._falhas, self.endpoint, motivo)
+                self._aberto_ate = time.monotonic() + self.pausa
+
+
+_disjuntores: Dict[str, Disjuntor] = {}
+_lock_disjuntores = threading.Lock()
+
+
+def obter_disjuntor(url: str) -> Disjuntor:
+    """Disjuntor do endpoint da URL, compartilhado pelo processo."""
+    endpoint = chave_endpoint(url)
+    disjuntor = _disjuntores.get(endpoint)
+    if disjuntor is not None:
+        return disjuntor
+
+    with _lock_disjuntores:
+        disjuntor = _disjuntores.get(endpoint)
+        if disjuntor is None:
+            disjuntor = Disjuntor(endpoint)
+            _disjuntores[endpoint] = disjuntor
+        return disjuntor
+
+
+def endpoints_indisponiveis() -> Dict[str, float]:
+    """Endpoints com disjuntor aberto -> segundos até a próxima tentativa."""
+    with _lock_disjuntores:
+        disjuntores = list(_disjuntores.values())
+    return {d.endpoint: d.restante() for d in disjuntores if d.estado != FECHADO}
+
+
+_saude: Dict[Hashable, Tuple[bool, float]] = {}
+_lock_saude = threading.Lock()
+
+
+def saude_cacheada(chave: Hashable, testar: Callable[[], bool], forcar: bool = False,
+                   ttl_ok: float = SAUDE_TTL_OK, ttl_falha: float = SAUDE_TTL_FALHA) -> bool:
+    """
+    Resultado de testar() guardado por ttl_ok (sucesso) ou ttl_falha (falha) segundos.
+
+    Evita repetir o teste de conectividade antes de cada consulta; forcar=True ignora o
+    valor guardado (ex.: botão de teste manual).
+    """
+    agora = time.monotonic()
+    if not forcar:
+        with _lock_saude:
+            guardado = _saude.get(chave)
+        if guardado is not None:
+            ok, testado_em = guardado
+            if agora - testado_em < (ttl_ok if ok else ttl_falha):
+                return ok
+
+    ok = bool(testar())
+    with _lock_saude:
+        _saude[chave] = (ok, time.monotonic())
+    return ok
+
+
+def limpar_saude():
+    with _lock_saude:
+        _saude.clear()
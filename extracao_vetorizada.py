@@ -0,0 +1,227 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from conjuntos_ids import ConjuntoIds
+from cpf_vetorizado import normalizar_cpfs, validar_cpfs, cpfs_texto, SEM_CPF
+
+# Código dos vetores int64 de telefone onde a linha não tem telefone de 11 dígitos
+SEM_TELEFONE = -1
+
+# Palavras-chave usadas para detectar as colunas da base
+PALAVRAS_TELEFONE = ['telefone', 'phone', 'celular', 'mobile', 'tel', 'ddd']
+PALAVRAS_CPF = ['cpf', 'document', 'documento', 'cnpj']
+PALAVRAS_DATA = ['data', 'date', 'criacao', 'created', 'timestamp']
+
+# Formatos aceitos nas colunas de data (escolhidos pelo comprimento do texto e pela presença de '/')
+FORMATO_BR_HORA = '%d/%m/%Y %H:%M'
+FORMATO_BR = '%d/%m/%Y'
+FORMATO_ISO_HORA = '%Y-%m-%d %H:%M:%S'
+FORMATO_ISO = '%Y-%m-%d'
+
+
+def detectar_colunas(df: pd.DataFrame, palavras: List[str]) -> List[str]:
+    """Colunas cujo nome contém alguma das palavras-chave (sem diferenciar maiúsculas)."""
+    return [col for col in df.columns if any(palavra in str(col).lower() for palavra in palavras)]
+
+
+def como_texto(serie: pd.Series) -> pd.Series:
+    """Converte a coluna para texto como str(valor) faria, com valores ausentes virando 'nan'."""
+    serie = serie.astype(object)
+    return serie.where(serie.notna(), 'nan').astype(str)
+
+
+def limpar_telefones_coluna(serie: pd.Series) -> pd.Series:
+    """Versão em coluna de limpar_telefone: 11 últimos dígitos, ou NaN se houver menos de 11."""
+    digitos = como_texto(serie).str.replace(r'\D', '', regex=True)
+    return digitos.str[-11:].where(digitos.str.len() >= 11)
+
+
+def codificar_telefones_coluna(serie: pd.Series) -> np.ndarray:
+    """Como limpar_telefones_coluna, mas em int64 (SEM_TELEFONE onde há menos de 11 dígitos)."""
+    digitos = como_texto(serie).str.replace(r'\D', '', regex=True)
+    completos = (digitos.str.len() >= 11).to_numpy()
+    telefones = np.full(len(digitos), SEM_TELEFONE, dtype=np.int64)
+    if completos.any():
+        telefones[completos] = digitos[completos].str[-11:].astype(np.int64).to_numpy()
+    return telefones
+
+
+def limpar_cpfs_coluna(serie: pd.Series) -> pd.Series:
+    """
+    Versão em coluna de limpar_cpf aplicada como em extrair_cpfs_da_base (ver cpf_vetorizado.py).
+
+    Vazios e '0' são ignorados; o resto vira 11 dígitos (zeros à esquerda ou 11 últimos).
+    Valores ausentes são lidos como o texto 'nan', como no laço original. Retorna NaN onde não há CPF.
+    """
+    serie = serie.astype(object)
+    cpfs = cpfs_texto(normalizar_cpfs(serie.where(serie.notna(), 'nan')))
+    return pd.Series(cpfs, index=serie.index, dtype=object).fillna(np.nan)
+
+
+def parsear_datas_coluna(serie: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de datas em datetime64, uma vez por formato.
+
+    Segue as mesmas regras por comprimento da extração original:
+    DD/MM/YYYY HH:MM, DD/MM/YYYY, YYYY-MM-DD HH:MM:SS e YYYY-MM-DD. Valores inválidos viram NaT.
+    """
+    texto = como_texto(serie)
+    tamanho = texto.str.len()
+    tem_barra = texto.str.contains('/', regex=False)
+
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    casos = [
+        ((tamanho >= 16) & tem_barra, 16, FORMATO_BR_HORA),
+        ((tamanho == 10) & tem_barra, 10, FORMATO_BR),
+        ((tamanho >= 19) & ~tem_barra, 19, FORMATO_ISO_HORA),
+        ((tamanho == 10) & ~tem_barra, 10, FORMATO_ISO),
+    ]
+    for mascara, fatia, formato in casos:
+        if mascara.any():
+            datas[mascara] = pd.to_datetime(texto[mascara].str[:fatia], format=formato, errors='coerce')
+    return datas
+
+
+def parsear_datas_canal_coluna(serie: pd.Series) -> pd.Series:
+    """
+    Variante de parsear_datas_coluna usada pelos canais (URA, WhatsApp).
+
+    DD/MM/YYYY HH:MM exige ':' e aceita segundos; YYYY-MM-DD HH:MM:SS exige '-' e aceita
+    o formato sem segundos.
+    """
+    texto = como_texto(serie)
+    tamanho = texto.str.len()
+    tem_barra = texto.str.contains('/', regex=False)
+    tem_hifen = texto.str.contains('-', regex=False)
+    tem_dois_pontos = texto.str.contains(':', regex=False)
+
+    br_hora = (tamanho >= 16) & tem_barra & tem_dois_pontos
+    br = ~br_hora & (tamanho == 10) & tem_barra
+    iso_hora = ~br_hora & ~br & (tamanho >= 19) & tem_hifen
+    iso = ~br_hora & ~br & ~iso_hora & (tamanho == 10) & tem_hifen
+
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    tentativas = [
+        (br_hora, 16, FORMATO_BR_HORA),
+        (br_hora & (tamanho >= 19), 19, '%d/%m/%Y %H:%M:%S'),
+        (br, 10, FORMATO_BR),
+        (iso_hora, 19, FORMATO_ISO_HORA),
+        (iso_hora, 16, '%Y-%m-%d %H:%M'),
+        (iso, 10, FORMATO_ISO),
+    ]
+    for mascara, fatia, formato in tentativas:
+        # Cada tentativa só preenche o que as anteriores não conseguiram
+        mascara = mascara & datas.isna()
+        if mascara.any():
+            datas[mascara] = pd.to_datetime(texto[mascara].str[:fatia], format=formato, errors='coerce')
+    return datas
+
+
+def validar_cpfs_coluna(cpfs: pd.Series) -> np.ndarray:
+    """Versão em coluna de validar_cpf: dígitos verificadores conferidos com matriz NumPy."""
+    return validar_cpfs(cpfs)
+
+
+def codigos_cpf_por_linha(df: pd.DataFrame, colunas_cpf: List[str],
+                          exigir_validacao: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    CPF de cada linha (int64): o da primeira coluna que produz um CPF.
+
+    Args:
+        df: Base carregada
+        colunas_cpf: Colunas candidatas, em ordem
+        exigir_validacao: Se True, só aceita CPFs com dígitos verificadores válidos
+
+    Returns:
+        Tupla (CPF por linha ou negativo, quantidade de valores inválidos vistos antes do CPF em cada linha)
+    """
+    cpf_linha = np.full(len(df), SEM_CPF, dtype=np.int64)
+    invalidos = np.zeros(len(df), dtype=np.int64)
+
+    for col in colunas_cpf:
+        pendentes = cpf_linha < 0
+        if not pendentes.any():
+            break
+        valores = df[col].astype(object)
+        # Ausentes entram como o texto 'nan', como em limpar_cpfs_coluna
+        cpfs_coluna = normalizar_cpfs(valores.where(valores.notna(), 'nan'))
+        # Valores preenchidos (nem vazios nem '0'), nas linhas ainda sem CPF
+        preenchidos = cpfs_coluna != SEM_CPF
+        if exigir_validacao:
+            cpfs_coluna = np.where(validar_cpfs(cpfs_coluna), cpfs_coluna, SEM_CPF)
+
+        invalidos += pendentes & preenchidos & (cpfs_coluna < 0)
+        cpf_linha = np.where(pendentes, cpfs_coluna, cpf_linha)
+
+    return cpf_linha, invalidos
+
+
+def cpfs_por_linha(df: pd.DataFrame, colunas_cpf: List[str], exigir_validacao: bool = False) -> Tuple[pd.Series, pd.Series]:
+    """Como codigos_cpf_por_linha, com o CPF em texto de 11 dígitos (NaN onde não há CPF)."""
+    cpf_linha, invalidos = codigos_cpf_por_linha(df, colunas_cpf, exigir_validacao)
+    cpfs = pd.Series(cpfs_texto(cpf_linha), index=df.index, dtype=object).fillna(np.nan)
+    return cpfs, pd.Series(invalidos, index=df.index)
+
+
+def mascara_periodo(df: pd.DataFrame, colunas_data: List[str], data_ini, data_fim,
+                    datas_por_coluna: Optional[Dict[str, pd.Series]] = None) -> np.ndarray:
+    """
+    Linhas com alguma coluna de data dentro de [data_ini 00:00, data_fim 23:59:59].
+
+    Sem período ou sem colunas de data, todas as linhas são mantidas.
+    """
+    if not (data_ini and data_fim and colunas_data):
+        return np.ones(len(df), dtype=bool)
+
+    inicio = pd.Timestamp(datetime.combine(data_ini, datetime.min.time()))
+    fim = pd.Timestamp(datetime.combine(data_fim, datetime.max.time()))
+
+    mascara = np.zeros(len(df), dtype=bool)
+    for col in colunas_data:
+        if datas_por_coluna is not None and col in datas_por_coluna:
+            datas = datas_por_coluna[col]
+        else:
+            datas = parsear_datas_coluna(df[col])
+        mascara |= ((datas >= inicio) & (datas <= fim)).to_numpy()
+    return mascara
+
+
+def extrair_telefones_vetorizado(df: pd.DataFrame, data_ini=None, data_fim=None) -> ConjuntoIds:
+    """Telefones de 11 dígitos da base (colunas de telefone, ou todas), opcionalmente filtrados por data."""
+    colunas_telefone = detectar_colunas(df, PALAVRAS_TELEFONE) or df.columns.tolist()
+    colunas_data = detectar_colunas(df, PALAVRAS_DATA)
+
+    filtrado = df[mascara_periodo(df, colunas_data, data_ini, data_fim)]
+    if not colunas_telefone:
+        return ConjuntoIds()
+    return ConjuntoIds.de_codigos(np.concatenate([codificar_telefones_coluna(filtrado[col]) for col in colunas_telefone]))
+
+
+def extrair_cpfs_vetorizado(df: pd.DataFrame, data_ini=None, data_fim=None) -> Tuple[ConjuntoIds, Dict[str, int]]:
+    """
+    CPFs da base (primeira coluna de CPF válida de cada linha), opcionalmente filtrados por data.
+
+    Returns:
+        Tupla (CPFs únicos, estatísticas com registros, cpfs_validos, cpfs_invalidos, registros_sem_cpf)
+    """
+    colunas_cpf = detectar_colunas(df, PALAVRAS_CPF) or df.columns.tolist()
+    colunas_data = detectar_colunas(df, PALAVRAS_DATA)
+
+    filtrado = df[mascara_periodo(df, colunas_data, data_ini, data_fim)]
+    cpf_linha, invalidos = codigos_cpf_por_linha(filtrado, colunas_cpf)
+    return resumir_cpfs(cpf_linha, invalidos)
+
+
+def resumir_cpfs(cpf_linha: np.ndarray, invalidos: np.ndarray) -> Tuple[ConjuntoIds, Dict[str, int]]:
+    """Conjunto de CPFs e estatísticas a partir do CPF (int64) por linha."""
+    encontrados = int((cpf_linha >= 0).sum())
+    estatisticas = {
+        'registros': len(cpf_linha),
+        'cpfs_validos': encontrados,
+        'cpfs_invalidos': int(invalidos.sum()),
+        'registros_sem_cpf': len(cpf_linha) - encontrados,
+    }
+    return ConjuntoIds.de_codigos(cpf_linha), estatisticas
@@ -0,0 +1,380 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from http_client import http_get
+from facta_lookup import ErroRespostaFacta, conferir_resposta_facta, consultar_cpfs_facta_por_cpf, limitador_facta
+
+# Validade das entradas (podem ser sobrescritas por variáveis de ambiente)
+FACTA_CACHE_TTL_HORAS = float(os.getenv('FACTA_CACHE_TTL_HORAS', '24'))
+FACTA_CACHE_TTL_NEGATIVO_HORAS = float(os.getenv('FACTA_CACHE_TTL_NEGATIVO_HORAS', '6'))
+
+# Intervalo mínimo entre sincronizações por data de alteração
+FACTA_CACHE_INTERVALO_SYNC_MIN = float(os.getenv('FACTA_CACHE_INTERVALO_SYNC_MIN', '5'))
+
+# Janela máxima (em dias) pedida ao FACTA em uma sincronização por data de alteração
+FACTA_CACHE_JANELA_SYNC_DIAS = int(os.getenv('FACTA_CACHE_JANELA_SYNC_DIAS', '7'))
+
+CAMPOS_PROPOSTA = (
+    "cpf", "cliente", "codigo_af", "valor_af", "status_proposta", "data_movimento",
+    "convenio", "averbador", "produto", "valor_bruto", "saldo_devedor"
+)
+
+
+def _normalizar_cpf(cpf) -> str:
+    digitos = ''.join(c for c in str(cpf) if c.isdigit())
+    return digitos.zfill(11)[-11:] if digitos else ''
+
+
+class FactaPropostasCache:
+    """Armazena as propostas do FACTA por CPF em SQLite, com validade por entrada."""
+
+    def __init__(self, db_path: str = None):
+        """Inicializa o cache ao lado do dashboard.db."""
+        self.db_path = db_path or "facta_cache.db"
+        self._lock = threading.Lock()
+        self._init_sqlite()
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_sqlite(self):
+        """Cria as tabelas do cache."""
+        conn = self._conectar()
+        cursor = conn.cursor()
+
+        # Propostas normalizadas (mesmo formato de consultar_andamento_propostas_facta)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS propostas_facta_cache (
+            ambiente TEXT NOT NULL,
+            cpf TEXT NOT NULL,
+            codigo_af TEXT NOT NULL,
+            cliente TEXT,
+            valor_af REAL DEFAULT 0.0,
+            status_proposta TEXT,
+            data_movimento TEXT,
+            convenio TEXT,
+            averbador TEXT,
+            produto TEXT,
+            valor_bruto REAL DEFAULT 0.0,
+            saldo_devedor REAL DEFAULT 0.0,
+            atualizado_em REAL NOT NULL,
+            PRIMARY KEY (ambiente, cpf, codigo_af)
+        )
+        """)
+
+        # Última consulta de cada CPF; total_propostas = 0 é o cache negativo
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cpfs_facta_cache (
+            ambiente TEXT NOT NULL,
+            cpf TEXT NOT NULL,
+            consultado_em REAL NOT NULL,
+            total_propostas INTEGER DEFAULT 0,
+            PRIMARY KEY (ambiente, cpf)
+        )
+        """)
+
+        # Marca da última sincronização por data de alteração
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sincronizacao_facta_cache (
+            ambiente TEXT PRIMARY KEY,
+            sincronizado_em REAL NOT NULL
+        )
+        """)
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _linha_proposta(ambiente: str, proposta: Dict, agora: float) -> tuple:
+        return (
+            ambiente,
+            _normalizar_cpf(proposta.get("cpf", "")),
+            str(proposta.get("codigo_af", "") or ""),
+            proposta.get("cliente", ""),
+            proposta.get("valor_af", 0) or 0,
+            proposta.get("status_proposta", ""),
+            proposta.get("data_movimento", ""),
+            proposta.get("convenio", ""),
+            proposta.get("averbador", ""),
+            proposta.get("produto", ""),
+            proposta.get("valor_bruto", 0) or 0,
+            proposta.get("saldo_devedor", 0) or 0,
+            agora
+        )
+
+    def obter_frescos(self, ambiente: str, cpfs: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Retorna as propostas dos CPFs cujas entradas ainda estão dentro da validade.
+
+        As tabelas são consultadas pelo CPF normalizado; o resultado usa os CPFs como recebidos.
+        """
+        agora = time.time()
+        limite_positivo = agora - FACTA_CACHE_TTL_HORAS * 3600
+        limite_negativo = agora - FACTA_CACHE_TTL_NEGATIVO_HORAS * 3600
+
+        conn = self._conectar()
+        cursor = conn.cursor()
+        frescos: Dict[str, List[Dict]] = {}
+
+        chaves = {cpf: _normalizar_cpf(cpf) for cpf in cpfs}
+        normalizados = list(dict.fromkeys(chaves.values()))
+        for i in range(0, len(normalizados), 500):
+            lote = normalizados[i:i + 500]
+            marcadores = ','.join('?' * len(lote))
+            cursor.execute(f"""
+                SELECT cpf, consultado_em, total_propostas FROM cpfs_facta_cache
+                WHERE ambiente = ? AND cpf IN ({marcadores})
+            """, [ambiente] + lote)
+            for cpf, consultado_em, total in cursor.fetchall():
+                limite = limite_positivo if total else limite_negativo
+                if consultado_em >= limite:
+                    frescos[cpf] = []
+
+        campos = ', '.join(CAMPOS_PROPOSTA)
+        lista_frescos = list(frescos)
+        for i in range(0, len(lista_frescos), 500):
+            lote = lista_frescos[i:i + 500]
+            marcadores = ','.join('?' * len(lote))
+            cursor.execute(f"""
+                SELECT {campos} FROM propostas_facta_cache
+                WHERE ambiente = ? AND cpf IN ({marcadores})
+            """, [ambiente] + lote)
+            for linha in cursor.fetchall():
+                proposta = dict(zip(CAMPOS_PROPOSTA, linha))
+                if proposta["cpf"] in frescos:
+                    frescos[proposta["cpf"]].append(proposta)
+
+        conn.close()
+        return {cpf: frescos[chave] for cpf, chave in chaves.items() if chave in frescos}
+
+    def salvar_consultas(self, ambiente: str, por_cpf: Dict[str, List[Dict]]):
+        """Substitui as propostas dos CPFs consultados e renova a validade (inclusive sem propostas)."""
+        if not por_cpf:
+            return
+
+        agora = time.time()
+        with self._lock:
+            conn = self._conectar()
+            cursor = conn.cursor()
+            for cpf, propostas in por_cpf.items():
+                cpf = _normalizar_cpf(cpf)
+                cursor.execute("DELETE FROM propostas_facta_cache WHERE ambiente = ? AND cpf = ?", (ambiente, cpf))
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO propostas_facta_cache
+                    (ambiente, cpf, codigo_af, cliente, valor_af, status_proposta, data_movimento,
+                     convenio, averbador, produto, valor_bruto, saldo_devedor, atualizado_em)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [self._linha_proposta(ambiente, dict(p, cpf=cpf), agora) for p in propostas])
+                cursor.execute("""
+                    INSERT OR REPLACE INTO cpfs_facta_cache (ambiente, cpf, consultado_em, total_propostas)
+                    VALUES (?, ?, ?, ?)
+                """, (ambiente, cpf, agora, len(propostas)))
+            conn.commit()
+            conn.close()
+
+    def aplicar_alteracoes(self, ambiente: str, propostas_alteradas: List[Dict], inicio_janela: float):
+        """
+        Aplica as propostas alteradas desde `inicio_janela` aos CPFs já conhecidos.
+
+        CPFs consultados depois de `inicio_janela` passam a ser considerados atualizados agora,
+        pois qualquer mudança posterior veio na sincronização. CPFs fora do cache são ignorados:
+        só conhecemos as propostas alteradas deles, não o conjunto completo.
+        """
+        agora = time.time()
+        with self._lock:
+            conn = self._conectar()
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT cpf FROM cpfs_facta_cache WHERE ambiente = ?", (ambiente,))
+            conhecidos = {linha[0] for linha in cursor.fetchall()}
+
+            linhas = []
+            cpfs_alterados = set()
+            for proposta in propostas_alteradas:
+                cpf = _normalizar_cpf(proposta.get("cpf", ""))
+                if cpf in conhecidos:
+                    linhas.append(self._linha_proposta(ambiente, proposta, agora))
+                    cpfs_alterados.add(cpf)
+
+            cursor.executemany("""
+                INSERT OR REPLACE INTO propostas_facta_cache
+                (ambiente, cpf, codigo_af, cliente, valor_af, status_proposta, data_movimento,
+                 convenio, averbador, produto, valor_bruto, saldo_devedor, atualizado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, linhas)
+
+            for cpf in cpfs_alterados:
+                cursor.execute("""
+                    UPDATE cpfs_facta_cache SET total_propostas = (
+                        SELECT COUNT(*) FROM propostas_facta_cache WHERE ambiente = ? AND cpf = ?
+                    ) WHERE ambiente = ? AND cpf = ?
+                """, (ambiente, cpf, ambiente, cpf))
+
+            cursor.execute("""
+                UPDATE cpfs_facta_cache SET consultado_em = ?
+                WHERE ambiente = ? AND consultado_em >= ?
+            """, (agora, ambiente, inicio_janela))
+
+            conn.commit()
+            conn.close()
+        return len(linhas)
+
+    def obter_ultima_sincronizacao(self, ambiente: str) -> Optional[float]:
+        conn = self._conectar()
+        cursor = conn.cursor()
+        cursor.execute("SELECT sincronizado_em FROM sincronizacao_facta_cache WHERE ambiente = ?", (ambiente,))
+        linha = cursor.fetchone()
+        conn.close()
+        return linha[0] if linha else None
+
+    def registrar_sincronizacao(self, ambiente: str, momento: float):
+        with self._lock:
+            conn = self._conectar()
+            conn.execute("""
+                INSERT OR REPLACE INTO sincronizacao_facta_cache (ambiente, sincronizado_em)
+                VALUES (?, ?)
+            """, (ambiente, momento))
+            conn.commit()
+            conn.close()
+
+    def limpar(self, ambiente: Optional[str] = None):
+        """Remove todas as entradas (ou só as do ambiente)."""
+        with self._lock:
+            conn = self._conectar()
+            for tabela in ("propostas_facta_cache", "cpfs_facta_cache", "sincronizacao_facta_cache"):
+                if ambiente:
+                    conn.execute(f"DELETE FROM {tabela} WHERE ambiente = ?", (ambiente,))
+                else:
+                    conn.execute(f"DELETE FROM {tabela}")
+            conn.commit()
+            conn.close()
+
+
+_cache_facta: Optional[FactaPropostasCache] = None
+_lock_cache_facta = threading.Lock()
+
+
+def obter_cache_facta() -> FactaPropostasCache:
+    """Instância do cache compartilhada pelo processo."""
+    global _cache_facta
+    if _cache_facta is None:
+        with _lock_cache_facta:
+            if _cache_facta is None:
+                _cache_facta = FactaPropostasCache()
+    return _cache_facta
+
+
+def _buscar_propostas_alteradas(url: str, headers: Dict, data_ini: datetime, data_fim: datetime) -> List[Dict]:
+    """Busca (paginado) todas as propostas alteradas no período via data_alteracao_ini/fim."""
+    alteradas = []
+    pagina = 1
+    while True:
+        params = {
+            "data_alteracao_ini": data_ini.strftime('%d/%m/%Y'),
+            "data_alteracao_fim": data_fim.strftime('%d/%m/%Y'),
+            "quantidade": 5000,
+            "pagina": pagina
+        }
+        limitador_facta.adquirir()
+        response = http_get(url, headers=headers, params=params, timeout=60)
+        response.raise_for_status()
+
+        data = response.json()
+        conferir_resposta_facta(data)
+        if data.get("erro", False):
+            break
+
+        propostas = data.get("propostas", []) or []
+        alteradas.extend(propostas)
+        if len(propostas) < 5000:
+            break
+        pagina += 1
+
+    return alteradas
+
+
+def sincronizar_alteracoes_facta(url: str, headers: Dict, ambiente: str,
+                                 cache: Optional[FactaPropostasCache] = None) -> bool:
+    """
+    Atualiza o cache com as propostas alteradas desde a última sincronização.
+
+    Returns:
+        True se a sincronização foi feita (ou não era necessária), False em caso de erro
+    """
+    cache = cache or obter_cache_facta()
+    agora = time.time()
+    ultima = cache.obter_ultima_sincronizacao(ambiente)
+
+    if ultima is not None and agora - ultima < FACTA_CACHE_INTERVALO_SYNC_MIN * 60:
+        return True
+
+    # A API filtra por dia: a janela começa à meia-noite do dia da última sincronização
+    if ultima is not None:
+        inicio_janela = datetime.combine(datetime.fromtimestamp(ultima).date(), datetime.min.time())
+        if datetime.fromtimestamp(agora) - inicio_janela <= timedelta(days=FACTA_CACHE_JANELA_SYNC_DIAS):
+            try:
+                alteradas = _buscar_propostas_alteradas(url, headers, inicio_janela, datetime.fromtimestamp(agora))
+            except (requests.exceptions.RequestException, ErroRespostaFacta) as e:
+                print(f"   ⚠️ Cache FACTA: falha ao sincronizar alterações: {e}")
+                return False
+
+            aplicadas = cache.aplicar_alteracoes(ambiente, alteradas, inicio_janela.timestamp())
+            print(f"   🔄 Cache FACTA: {len(alteradas)} propostas alteradas desde {inicio_janela.strftime('%d/%m/%Y')}, {aplicadas} aplicadas")
+
+    cache.registrar_sincronizacao(ambiente, agora)
+    return True
+
+
+def consultar_propostas_com_cache(cpfs: List[str], url: str, headers: Dict, ambiente: str,
+                                  progresso: Optional[Callable[[int, int, str, List[Dict]], None]] = None,
+                                  cache: Optional[FactaPropostasCache] = None) -> List[Dict]:
+    """
+    Retorna as propostas dos CPFs, consultando o FACTA apenas para os ausentes ou vencidos no cache.
+
+    Args:
+        cpfs: CPFs a consultar
+        url: Endpoint andamento-propostas do ambiente
+        headers: Cabeçalhos com o token
+        ambiente: "homologacao" ou "producao"
+        progresso: Callback (concluidos, total, cpf, propostas_do_cpf)
+        cache: Cache a usar (padrão: instância compartilhada)
+
+    Returns:
+        Lista de propostas na mesma ordem dos CPFs de entrada
+    """
+    cache = cache or obter_cache_facta()
+    cpfs = list(cpfs)
+    unicos = list(dict.fromkeys(cpfs))
+    total = len(unicos)
+
+    sincronizar_alteracoes_facta(url, headers, ambiente, cache)
+
+    frescos = cache.obter_frescos(ambiente, unicos)
+    pendentes = [cpf for cpf in unicos if cpf not in frescos]
+    print(f"   💾 Cache FACTA: {total - len(pendentes)} CPFs do cache, {len(pendentes)} a consultar")
+
+    concluidos = 0
+    if progresso:
+        for cpf in frescos:
+            concluidos += 1
+            progresso(concluidos, total, cpf, frescos[cpf])
+
+    def progresso_consulta(feitos, _total, cpf, propostas):
+        if progresso:
+            progresso(concluidos + feitos, total, cpf, propostas)
+
+    por_cpf = {}
+    if pendentes:
+        por_cpf, _ = consultar_cpfs_facta_por_cpf(pendentes, url, headers, progresso=progresso_consulta)
+        cache.salvar_consultas(ambiente, por_cpf)
+
+    todas_propostas = []
+    for cpf in cpfs:
+        todas_propostas.extend(frescos.get(cpf, por_cpf.get(cpf, [])))
+    return todas_propostas
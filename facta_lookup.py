@@ -0,0 +1,177 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from http_client import http_get
+from rate_limiter import TokenBucket
+from log_dashboard import obter_logger, Amostra, ResumoExecucao
+
+logger = obter_logger('facta')
+
+# Cota de requisições do FACTA (podem ser sobrescritas por variáveis de ambiente)
+FACTA_REQUISICOES_POR_SEGUNDO = float(os.getenv('FACTA_REQUISICOES_POR_SEGUNDO', '5'))
+FACTA_RAJADA = int(os.getenv('FACTA_RAJADA', '5'))
+FACTA_MAX_WORKERS = int(os.getenv('FACTA_MAX_WORKERS', '8'))
+FACTA_TENTATIVAS_429 = int(os.getenv('FACTA_TENTATIVAS_429', '4'))
+
+# Pausa padrão quando o 429 não traz Retry-After
+FACTA_BACKOFF_429 = 2.0
+
+# Trecho da mensagem do FACTA para CPF sem propostas: a única resposta com erro lida como "sem propostas"
+MENSAGEM_SEM_PROPOSTAS = 'nenhuma proposta'
+
+# Limitador único do processo: todas as sessões dividem a mesma cota
+limitador_facta = TokenBucket(FACTA_REQUISICOES_POR_SEGUNDO, FACTA_RAJADA)
+
+
+class ErroRespostaFacta(Exception):
+    """Resposta do FACTA com erro que não é a de "sem propostas" (token, instabilidade etc.)."""
+
+
+def conferir_resposta_facta(data: Dict):
+    """Levanta ErroRespostaFacta se a resposta traz erro e não é a de CPF sem propostas."""
+    if data.get("erro", False):
+        mensagem = str(data.get('mensagem') or 'Erro desconhecido')
+        if MENSAGEM_SEM_PROPOSTAS not in mensagem.lower():
+            raise ErroRespostaFacta(mensagem)
+
+
+def _segundos_retry_after(response: requests.Response, tentativa: int) -> float:
+    """Tempo de espera indicado pelo servidor, ou backoff exponencial se ausente."""
+    valor = response.headers.get('Retry-After')
+    if valor:
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            pass
+    return FACTA_BACKOFF_429 * (2 ** tentativa)
+
+
+def extrair_propostas_facta(cpf: str, data: Dict) -> List[Dict]:
+    """Converte a resposta de andamento-propostas nos dicionários usados pelo dashboard."""
+    if data.get("erro", False):
+        return []
+
+    propostas = []
+    for proposta in data.get("propostas", []) or []:
+        propostas.append({
+            "cpf": cpf,
+            "cliente": proposta.get("cliente", ""),
+            "codigo_af": proposta.get("codigo_af", ""),
+            "valor_af": proposta.get("valor_af", 0),
+            "status_proposta": proposta.get("status_proposta", ""),
+            "data_movimento": proposta.get("data_movimento", ""),
+            "convenio": proposta.get("convenio", ""),
+            "averbador": proposta.get("averbador", ""),
+            "produto": proposta.get("produto", ""),
+            "valor_bruto": proposta.get("valor_bruto", 0),
+            "saldo_devedor": proposta.get("saldo_devedor", 0)
+        })
+    return propostas
+
+
+def consultar_cpf_facta(url: str, headers: Dict, cpf: str,
+                        limitador: TokenBucket = limitador_facta) -> List[Dict]:
+    """
+    Consulta um CPF respeitando o limitador; em 429 pausa todas as threads e tenta de novo.
+
+    Resposta com erro que não seja a de "sem propostas" levanta ErroRespostaFacta, para o
+    CPF contar como falha (e não ser guardado no cache como CPF sem propostas).
+    """
+    params = {
+        "cpf": cpf,
+        "quantidade": 5000  # Máximo de registros por página
+    }
+
+    for tentativa in range(FACTA_TENTATIVAS_429 + 1):
+        limitador.adquirir()
+        response = http_get(url, headers=headers, params=params, timeout=30)
+
+        if response.status_code == 429 and tentativa < FACTA_TENTATIVAS_429:
+            espera = _segundos_retry_after(response, tentativa)
+            logger.debug("FACTA 429 para CPF %s: aguardando %.1fs", cpf, espera)
+            limitador.pausar(espera)
+            continue
+
+        response.raise_for_status()
+        data = response.json()
+        conferir_resposta_facta(data)
+        return extrair_propostas_facta(cpf, data)
+
+    return []
+
+
+def consultar_cpfs_facta_por_cpf(cpfs: List[str], url: str, headers: Dict,
+                                 max_workers: int = FACTA_MAX_WORKERS,
+                                 limitador: TokenBucket = limitador_facta,
+                                 progresso: Optional[Callable[[int, int, str, List[Dict]], None]] = None) -> Tuple[Dict[str, List[Dict]], List[str]]:
+    """
+    Consulta vários CPFs em paralelo, limitado pela cota do FACTA.
+
+    Args:
+        cpfs: CPFs a consultar
+        url: Endpoint andamento-propostas do ambiente
+        headers: Cabeçalhos com o token
+        max_workers: Número máximo de requisições simultâneas
+        limitador: Token bucket compartilhado
+        progresso: Callback (concluidos, total, cpf, propostas_do_cpf), chamado na thread do chamador
+            a cada CPF finalizado
+
+    Returns:
+        Tupla (propostas por CPF consultado com sucesso, CPFs cuja consulta falhou)
+    """
+    cpfs = list(cpfs)
+    por_cpf: Dict[str, List[Dict]] = {}
+    falhas: List[str] = []
+    amostra = Amostra(logger, nivel=logging.WARNING)
+
+    with ResumoExecucao(logger, 'consultar_cpfs_facta') as resumo, \
+            ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futuros = {
+            executor.submit(consultar_cpf_facta, url, headers, cpf, limitador): cpf
+            for cpf in cpfs
+        }
+
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            cpf = futuros[futuro]
+            try:
+                propostas = futuro.result()
+                por_cpf[cpf] = propostas
+            except requests.exceptions.RequestException as e:
+                falhas.append(cpf)
+                amostra.registrar("Erro na requisição para CPF %s: %s", cpf, e)
+                propostas = []
+            except ErroRespostaFacta as e:
+                falhas.append(cpf)
+                amostra.registrar("FACTA respondeu com erro para CPF %s: %s", cpf, e)
+                propostas = []
+            except Exception as e:
+                falhas.append(cpf)
+                amostra.registrar("Erro inesperado para CPF %s: %s", cpf, e)
+                propostas = []
+
+            if progresso:
+                progresso(concluidos, len(cpfs), cpf, propostas)
+
+        resumo.contar('cpfs', len(cpfs))
+        resumo.contar('com_propostas', sum(1 for propostas in por_cpf.values() if propostas))
+        resumo.contar('falhas', len(falhas))
+
+    return por_cpf, falhas
+
+
+def consultar_cpfs_facta_concorrente(cpfs: List[str], url: str, headers: Dict,
+                                     max_workers: int = FACTA_MAX_WORKERS,
+                                     limitador: TokenBucket = limitador_facta,
+                                     progresso: Optional[Callable[[int, int, str, List[Dict]], None]] = None) -> List[Dict]:
+    """Como consultar_cpfs_facta_por_cpf, mas retorna a lista de propostas na ordem dos CPFs de entrada."""
+    cpfs = list(cpfs)
+    por_cpf, _ = consultar_cpfs_facta_por_cpf(cpfs, url, headers, max_workers, limitador, progresso)
+
+    todas_propostas = []
+    for cpf in cpfs:
+        todas_propostas.extend(por_cpf.get(cpf, []))
+    return todas_propostas
@@ -0,0 +1,150 @@
+import os
+import random
+import ssl
+import threading
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from disjuntor import obter_disjuntor
+
+# Configurações do pool de conexões (podem ser sobrescritas por variáveis de ambiente)
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))   # Pools mantidos por sessão
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '32'))          # Conexões keep-alive por host
+HTTP_TIMEOUT_CONEXAO = float(os.getenv('HTTP_TIMEOUT_CONEXAO', '10'))  # Segundos para abrir a conexão
+HTTP_TIMEOUT_LEITURA = float(os.getenv('HTTP_TIMEOUT_LEITURA', '30'))  # Segundos para ler a resposta
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', '0.5'))
+
+# Status que indicam falha transitória do servidor. 429 fica de fora: quem tem cota
+# (facta_lookup.py) trata o 429 no próprio limitador, pausando todas as threads de uma vez
+STATUS_RETRY = (500, 502, 503, 504)
+
+# Os endpoints de relatório do Kolmeya usam POST apenas para leitura, então POST entra na política
+METODOS_RETRY = frozenset(['GET', 'POST', 'HEAD', 'OPTIONS'])
+
+
+class TLSAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        ctx = ssl.create_default_context()  # Usa o contexto seguro padrão recomendado
+        kwargs['ssl_context'] = ctx
+        return super(TLSAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+class RetryComJitter(Retry):
+    """Retry com backoff exponencial sorteado entre metade e o total do intervalo.
+
+    Sem o sorteio, as threads que falharam juntas (janelas do Kolmeya, CPFs do FACTA)
+    tentam de novo no mesmo instante e voltam a sobrecarregar o servidor.
+    """
+
+    def get_backoff_time(self) -> float:
+        intervalo = super().get_backoff_time()
+        return intervalo / 2 + random.uniform(0, intervalo / 2)
+
+
+_sessoes: Dict[str, requests.Session] = {}
+_lock_sessoes = threading.Lock()
+
+
+def _criar_retry() -> Retry:
+    """Política de retry aplicada pelo adapter a cada requisição."""
+    return RetryComJitter(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=STATUS_RETRY,
+        allowed_methods=METODOS_RETRY,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+
+def _criar_sessao() -> requests.Session:
+    """Cria uma sessão com o TLSAdapter montado e pool keep-alive."""
+    sessao = requests.Session()
+    adapter = TLSAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_criar_retry(),
+        pool_block=False
+    )
+    sessao.mount('https://', adapter)
+    sessao.mount('http://', HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_criar_retry()
+    ))
+    return sessao
+
+
+def obter_sessao(url: str) -> requests.Session:
+    """Retorna a sessão do processo para o host da URL, criando-a na primeira chamada."""
+    host = urlsplit(url).netloc.lower()
+    sessao = _sessoes.get(host)
+    if sessao is not None:
+        return sessao
+
+    with _lock_sessoes:
+        sessao = _sessoes.get(host)
+        if sessao is None:
+            sessao = _criar_sessao()
+            _sessoes[host] = sessao
+        return sessao
+
+
+def _normalizar_timeout(timeout: Optional[Union[float, Tuple[float, float]]]) -> Tuple[float, float]:
+    """Converte o timeout dos chamadores (leitura) em (conexão, leitura)."""
+    if timeout is None:
+        return (HTTP_TIMEOUT_CONEXAO, HTTP_TIMEOUT_LEITURA)
+    if isinstance(timeout, tuple):
+        return timeout
+    return (min(HTTP_TIMEOUT_CONEXAO, float(timeout)), float(timeout))
+
+
+def http_request(metodo: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Executa a requisição reaproveitando as conexões do pool do host.
+
+    Passa pelo disjuntor do endpoint (disjuntor.py): com ele aberto, levanta
+    CircuitoAberto (um ConnectionError) na hora, em vez de esperar o timeout.
+    """
+    disjuntor = obter_disjuntor(url)
+    disjuntor.permitir()
+    sessao = obter_sessao(url)
+    try:
+        resp = sessao.request(metodo, url, timeout=_normalizar_timeout(timeout), **kwargs)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        disjuntor.registrar_falha(e)
+        raise
+    except Exception:
+        disjuntor.liberar()
+        raise
+    if resp.status_code >= 500:
+        disjuntor.registrar_falha(f"HTTP {resp.status_code}")
+    else:
+        disjuntor.registrar_sucesso()
+    return resp
+
+
+def http_get(url: str, timeout=None, **kwargs) -> requests.Response:
+    """GET pelo cliente compartilhado."""
+    return http_request('GET', url, timeout=timeout, **kwargs)
+
+
+def http_post(url: str, timeout=None, **kwargs) -> requests.Response:
+    """POST pelo cliente compartilhado."""
+    return http_request('POST', url, timeout=timeout, **kwargs)
+
+
+def fechar_sessoes():
+    """Fecha todas as sessões abertas (útil em testes e no encerramento do processo)."""
+    with _lock_sessoes:
+        for sessao in _sessoes.values():
+            sessao.close()
+        _sessoes.clear()
@@ -0,0 +1,180 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from conjuntos_ids import Conjunto, ConjuntoIds, como_conjunto
+from log_dashboard import obter_logger
+
+# Fontes em que um CPF ou telefone pode aparecer; a posição na tupla é o bit da máscara.
+# Só entram aqui fontes que algum painel consulta (registrar uma fonte custa o hash e a remontagem das máscaras)
+FONTES = (
+    'base',            # base carregada, no período
+    'status_kolmeya',  # mensagens (status de SMS) do Kolmeya no período e centro de custo
+)
+TIPOS = ('cpf', 'telefone')
+
+# Índices mantidos em memória, um por (base, período, centro de custo)
+INDICE_IDENTIDADES_MAX = int(os.getenv('INDICE_IDENTIDADES_MAX', '4'))
+
+_BITS = {fonte: 1 << posicao for posicao, fonte in enumerate(FONTES)}
+_COMBINACOES = np.arange(1 << len(FONTES), dtype=np.int64)
+
+logger = obter_logger('base')
+
+
+def _mascara(fontes: Iterable[str]) -> int:
+    mascara = 0
+    for fonte in fontes:
+        if fonte not in _BITS:
+            raise ValueError(f"Fonte desconhecida: {fonte} (esperado uma de {', '.join(FONTES)})")
+        mascara |= _BITS[fonte]
+    return mascara
+
+
+def _assinatura(conjunto: ConjuntoIds) -> Tuple[int, str]:
+    return len(conjunto), hashlib.blake2b(conjunto.valores.tobytes(), digest_size=16).hexdigest()
+
+
+class _Camada:
+    """Identificadores de um tipo (CPF ou telefone) e a máscara de fontes de cada um."""
+
+    __slots__ = ('ids', 'mascaras', 'contagens', 'consultas', 'assinaturas')
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.mascaras = np.empty(0, dtype=np.uint16)
+        # Quantidade de identificadores por combinação exata de fontes (2^len(FONTES) posições)
+        self.contagens: Optional[np.ndarray] = None
+        self.consultas: Dict[Tuple[int, int], int] = {}
+        self.assinaturas: Dict[str, Tuple[int, str]] = {}
+
+    def registrar(self, fonte: str, conjunto: ConjuntoIds) -> bool:
+        assinatura = _assinatura(conjunto)
+        if self.assinaturas.get(fonte) == assinatura:
+            return False
+
+        bit = np.uint16(_BITS[fonte])
+        ids = (ConjuntoIds(self.ids) | conjunto).valores
+        mascaras = np.zeros(len(ids), dtype=np.uint16)
+        if len(self.ids):
+            mascaras[np.searchsorted(ids, self.ids)] = self.mascaras & ~bit
+        mascaras[np.searchsorted(ids, conjunto.valores)] |= bit
+
+        # Identificadores que só estavam na versão anterior da fonte saem do índice
+        presentes = mascaras != 0
+        self.ids, self.mascaras = ids[presentes], mascaras[presentes]
+        self.assinaturas[fonte] = assinatura
+        self.contagens = None
+        self.consultas.clear()
+        return True
+
+    def contar(self, incluir: int, excluir: int) -> int:
+        chave = (incluir, excluir)
+        if chave not in self.consultas:
+            if self.contagens is None:
+                self.contagens = np.bincount(self.mascaras, minlength=len(_COMBINACOES))
+            selecao = ((_COMBINACOES & incluir) == incluir) & ((_COMBINACOES & excluir) == 0) & (_COMBINACOES != 0)
+            self.consultas[chave] = int(self.contagens[selecao].sum())
+        return self.consultas[chave]
+
+    def selecionar(self, incluir: int, excluir: int) -> ConjuntoIds:
+        mascaras = self.mascaras.astype(np.int64)
+        selecao = ((mascaras & incluir) == incluir) & ((mascaras & excluir) == 0)
+        return ConjuntoIds(self.ids[selecao])
+
+
+class IndiceIdentidades:
+    """
+    Índice de CPFs e telefones por fonte (base e status do Kolmeya, ver FONTES).
+
+    Cada identificador guarda uma máscara de bits com as fontes em que aparece (ver
+    FONTES). Depois de registradas as fontes, perguntas como "quantos estão em A e B mas
+    não em C" são respondidas pela contagem de cada combinação de bits, sem percorrer
+    os identificadores de novo; o resultado de cada pergunta fica guardado até a próxima
+    mudança em alguma fonte.
+
+    Registrar uma fonte com o mesmo conteúdo já registrado não refaz nada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._camadas = {tipo: _Camada() for tipo in TIPOS}
+
+    def registrar(self, fonte: str, cpfs: Optional[Conjunto] = None, telefones: Optional[Conjunto] = None):
+        """Registra (ou substitui) os CPFs e/ou telefones de uma fonte."""
+        _mascara([fonte])
+        for tipo, valores in (('cpf', cpfs), ('telefone', telefones)):
+            if valores is None:
+                continue
+            conjunto = como_conjunto(valores)
+            with self._lock:
+                alterado = self._camadas[tipo].registrar(fonte, conjunto)
+            if alterado:
+                logger.debug("Índice de identidades: %d %s(s) de '%s'", len(conjunto), tipo, fonte)
+
+    def fontes(self, tipo: str = 'cpf') -> List[str]:
+        """Fontes já registradas para o tipo, na ordem de FONTES."""
+        with self._lock:
+            registradas = self._camadas[tipo].assinaturas
+            return [fonte for fonte in FONTES if fonte in registradas]
+
+    def contar(self, incluir: Iterable[str] = (), excluir: Iterable[str] = (), tipo: str = 'cpf') -> int:
+        """
+        Quantidade de identificadores presentes em todas as fontes de `incluir` e em
+        nenhuma de `excluir` (sem `incluir`: presentes em qualquer fonte).
+        """
+        incluir, excluir = _mascara(incluir), _mascara(excluir)
+        with self._lock:
+            return self._camadas[tipo].contar(incluir, excluir)
+
+    def conjunto(self, incluir: Iterable[str] = (), excluir: Iterable[str] = (), tipo: str = 'cpf') -> ConjuntoIds:
+        """Os identificadores de contar(incluir, excluir), para exibir ou consultar."""
+        incluir, excluir = _mascara(incluir), _mascara(excluir)
+        with self._lock:
+            return self._camadas[tipo].selecionar(incluir, excluir)
+
+    def fontes_de(self, identificador, tipo: str = 'cpf') -> List[str]:
+        """Fontes em que o CPF/telefone (texto de dígitos ou int) aparece."""
+        codigo = como_conjunto([identificador]).valores
+        with self._lock:
+            camada = self._camadas[tipo]
+            if not len(codigo) or not len(camada.ids):
+                return []
+            posicao = int(np.searchsorted(camada.ids, codigo[0]))
+            if posicao >= len(camada.ids) or camada.ids[posicao] != codigo[0]:
+                return []
+            mascara = int(camada.mascaras[posicao])
+        return [fonte for fonte in FONTES if mascara & _BITS[fonte]]
+
+    def tamanho(self, tipo: str = 'cpf') -> int:
+        with self._lock:
+            return len(self._camadas[tipo].ids)
+
+
+_indices: "OrderedDict[Hashable, IndiceIdentidades]" = OrderedDict()
+_lock_indices = threading.Lock()
+
+
+def obter_indice_identidades(chave: Hashable) -> IndiceIdentidades:
+    """
+    Índice identificado por chave (ex.: hash da base, período e centro de custo),
+    compartilhado pelas sessões e mantido enquanto estiver entre os INDICE_IDENTIDADES_MAX
+    mais recentes.
+    """
+    with _lock_indices:
+        indice = _indices.get(chave)
+        if indice is None:
+            indice = _indices[chave] = IndiceIdentidades()
+            while len(_indices) > INDICE_IDENTIDADES_MAX:
+                _indices.popitem(last=False)
+        _indices.move_to_end(chave)
+        return indice
+
+
+def limpar_indices_identidades():
+    with _lock_indices:
+        _indices.clear()
@@ -0,0 +1,210 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from http_client import http_post
+from rate_limiter import TokenBucket
+from log_dashboard import obter_logger, ResumoExecucao
+
+# Endpoint de acessos (encurtador) do Kolmeya
+KOLMEYA_ACESSOS_URL = "https://kolmeya.com.br/api/v1/sms/accesses"
+
+# Máximo de acessos por página aceito pela API
+LIMITE_ACESSOS_API = 5000
+
+# Páginas buscadas em paralelo e cota de requisições (podem ser sobrescritas por variáveis de ambiente)
+ACESSOS_MAX_WORKERS = int(os.getenv('KOLMEYA_ACESSOS_WORKERS', '4'))
+KOLMEYA_ACESSOS_REQUISICOES_POR_SEGUNDO = float(os.getenv('KOLMEYA_ACESSOS_REQUISICOES_POR_SEGUNDO', '5'))
+
+# Campos usados para identificar um acesso quando a API não devolve 'id'
+CAMPOS_CHAVE_ACESSO = ('job_id', 'fullphone', 'cpf', 'accessed_at', 'tenant_segment_id')
+
+# Limitador único do processo para o endpoint de acessos
+limitador_acessos = TokenBucket(KOLMEYA_ACESSOS_REQUISICOES_POR_SEGUNDO)
+
+logger = obter_logger('kolmeya')
+
+
+def interpretar_pagina_acessos(data) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Acessos e totalAccesses de uma resposta, nos formatos já vistos na API.
+
+    Formato documentado: {"accesses": [...], "totalAccesses": N}. Também aceita lista de
+    objetos com 'accesses' ou lista direta de acessos (sem total conhecido).
+    """
+    if isinstance(data, dict) and 'accesses' in data:
+        acessos = data['accesses'] or []
+        return acessos, data.get('totalAccesses')
+
+    if isinstance(data, list):
+        if data and isinstance(data[0], dict) and 'accesses' in data[0]:
+            acessos, total = [], 0
+            for item in data:
+                if isinstance(item, dict) and isinstance(item.get('accesses'), list):
+                    acessos.extend(item['accesses'])
+                    total += item.get('totalAccesses', 0) or 0
+            return acessos, total or None
+        return data, None
+
+    raise ValueError(f"Estrutura de resposta de acessos inesperada: {type(data).__name__}")
+
+
+def chave_acesso(acesso: Dict) -> Tuple:
+    """Chave de deduplicação de um acesso."""
+    if acesso.get('id') is not None:
+        return ('id', str(acesso['id']))
+    return tuple(str(acesso.get(campo, '')) for campo in CAMPOS_CHAVE_ACESSO)
+
+
+def _buscar_pagina(url: str, headers: Dict, payload: Dict, pagina: int,
+                   limitador: TokenBucket, timeout: float) -> Tuple[List[Dict], Optional[int]]:
+    limitador.adquirir()
+    resp = http_post(url, headers=headers, json=dict(payload, page=pagina), timeout=timeout)
+    resp.raise_for_status()
+    return interpretar_pagina_acessos(resp.json())
+
+
+def _montar_consulta(start_at: str, end_at: str, token: str, tenant_segment_id: Optional[int],
+                     is_robot: Optional[int], limite: int) -> Tuple[Dict, Dict]:
+    """Cabeçalhos e payload da consulta de acessos (sem a página)."""
+    headers = {
+        "Accept": "application/json",
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+    payload = {"start_at": start_at, "end_at": end_at, "limit": limite}
+    if tenant_segment_id is not None:
+        payload["tenant_segment_id"] = tenant_segment_id
+    if is_robot is not None:
+        payload["is_robot"] = is_robot
+    return headers, payload
+
+
+def total_acessos_kolmeya(start_at: str, end_at: str, token: str,
+                          tenant_segment_id: Optional[int] = None,
+                          is_robot: Optional[int] = None,
+                          url: str = KOLMEYA_ACESSOS_URL,
+                          timeout: float = 15) -> Optional[int]:
+    """
+    totalAccesses do período, consultando uma página de um único acesso.
+
+    A API só filtra por dia; o total serve para saber se chegaram acessos novos sem
+    baixar o dia de novo. None se a resposta não traz o total.
+    """
+    headers, payload = _montar_consulta(start_at, end_at, token, tenant_segment_id, is_robot, 1)
+    _, total = _buscar_pagina(url, headers, payload, 1, limitador_acessos, timeout)
+    return total
+
+
+def iterar_paginas_acessos(start_at: str, end_at: str, token: str,
+                           tenant_segment_id: Optional[int] = None,
+                           is_robot: Optional[int] = None,
+                           limite: int = LIMITE_ACESSOS_API,
+                           max_workers: int = ACESSOS_MAX_WORKERS,
+                           limitador: TokenBucket = limitador_acessos,
+                           url: str = KOLMEYA_ACESSOS_URL,
+                           timeout: float = 60) -> Iterator[Tuple[int, List[Dict], Optional[int]]]:
+    """
+    Entrega as páginas de acessos do período conforme chegam, já sem acessos repetidos.
+
+    A primeira página traz totalAccesses; as demais são buscadas em paralelo, dentro da
+    cota do limitador. Sem total conhecido, as páginas seguem uma a uma até vir uma
+    página incompleta.
+
+    Args:
+        start_at: Data inicial (YYYY-MM-DD)
+        end_at: Data final (YYYY-MM-DD)
+        token: Token do Kolmeya
+        tenant_segment_id: Centro de custo (0 = todos; None = não enviado)
+        is_robot: Filtro de robôs (0 = não robô, 1 = robô; None = não enviado)
+        limite: Acessos por página (no máximo 5.000)
+
+    Yields:
+        Tuplas (número da página, acessos novos da página, totalAccesses informado)
+    """
+    limite = min(limite, LIMITE_ACESSOS_API)
+    headers, payload = _montar_consulta(start_at, end_at, token, tenant_segment_id, is_robot, limite)
+
+    vistos = set()
+
+    def novos(acessos: List[Dict]) -> List[Dict]:
+        resultado = []
+        for acesso in acessos:
+            if not isinstance(acesso, dict):
+                continue
+            chave = chave_acesso(acesso)
+            if chave not in vistos:
+                vistos.add(chave)
+                resultado.append(acesso)
+        return resultado
+
+    acessos, total = _buscar_pagina(url, headers, payload, 1, limitador, timeout)
+    yield 1, novos(acessos), total
+    if len(acessos) < limite:
+        return
+
+    ultima_pagina = 1
+    if total:
+        paginas = math.ceil(total / limite)
+        ultima_completa = False
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futuros = {
+                executor.submit(_buscar_pagina, url, headers, payload, pagina, limitador, timeout): pagina
+                for pagina in range(2, paginas + 1)
+            }
+            try:
+                for futuro in as_completed(futuros):
+                    pagina = futuros[futuro]
+                    acessos, _ = futuro.result()
+                    yield pagina, novos(acessos), total
+                    if pagina == paginas:
+                        ultima_completa = len(acessos) >= limite
+            except BaseException:
+                for restante in futuros:
+                    restante.cancel()
+                raise
+        ultima_pagina = paginas
+        if paginas > 1 and not ultima_completa:
+            return
+
+    # Total desconhecido, ou acessos novos chegaram depois da primeira página: seguir em sequência
+    pagina = ultima_pagina + 1
+    while True:
+        acessos, _ = _buscar_pagina(url, headers, payload, pagina, limitador, timeout)
+        if not acessos:
+            return
+        yield pagina, novos(acessos), total
+        if len(acessos) < limite:
+            return
+        pagina += 1
+
+
+def buscar_acessos_kolmeya(start_at: str, end_at: str, token: str,
+                           tenant_segment_id: Optional[int] = None,
+                           is_robot: Optional[int] = None,
+                           limite: int = LIMITE_ACESSOS_API,
+                           max_workers: int = ACESSOS_MAX_WORKERS,
+                           url: str = KOLMEYA_ACESSOS_URL,
+                           timeout: float = 60) -> Tuple[List[Dict], int]:
+    """
+    Todos os acessos do período, em ordem de página, sem o corte de 5.000 por requisição.
+
+    Returns:
+        Tupla (acessos únicos, totalAccesses informado pela API ou quantidade obtida)
+    """
+    por_pagina: Dict[int, List[Dict]] = {}
+    total_api = None
+
+    with ResumoExecucao(logger, 'buscar_acessos_kolmeya') as resumo:
+        for pagina, acessos, total in iterar_paginas_acessos(
+                start_at, end_at, token, tenant_segment_id, is_robot, limite, max_workers, url=url, timeout=timeout):
+            por_pagina[pagina] = acessos
+            total_api = total if total is not None else total_api
+
+        todos = [acesso for pagina in sorted(por_pagina) for acesso in por_pagina[pagina]]
+        resumo.contar('paginas', len(por_pagina))
+        resumo.contar('acessos', len(todos))
+        resumo.contar('total_api', total_api or 0)
+
+    return todos, total_api if total_api is not None else len(todos)
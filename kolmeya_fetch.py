@@ -0,0 +1,251 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from http_client import http_post
+from centros_custo import valor_centro_custo
+from log_dashboard import obter_logger
+
+# Decodificação do JSON em fluxo (opcional): sem ijson, a resposta é lida inteira e depois projetada
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+# Endpoint de status de SMS do Kolmeya
+KOLMEYA_STATUS_URL = "https://kolmeya.com.br/api/v1/sms/reports/statuses"
+
+# Formato de data aceito pela API (precisão de minuto, fim inclusivo)
+FORMATO_DATA_API = '%Y-%m-%d %H:%M'
+
+# Máximo de mensagens devolvidas por requisição; uma janela que atinge o limite foi truncada
+LIMITE_STATUS_API = 30000
+
+# Número máximo de janelas consultadas em paralelo
+STATUS_MAX_WORKERS = int(os.getenv('KOLMEYA_STATUS_WORKERS', '4'))
+
+PASSO_MINIMO = timedelta(minutes=1)
+
+# Campos usados para identificar uma mensagem quando a API não devolve 'id'. O status fica de
+# fora: ele muda com os relatórios de entrega e a mensagem buscada de novo precisa da mesma chave
+CAMPOS_CHAVE_MENSAGEM = ('job', 'lote', 'telefone', 'cpf', 'enviada_em')
+
+# Campos mantidos de cada mensagem quando a resposta é projetada (chave de deduplicação incluída)
+CAMPOS_PROJETADOS_STATUS = ('id', 'job', 'lote', 'cpf', 'telefone', 'status', 'centro_custo', 'enviada_em')
+
+Janela = Tuple[datetime, datetime]
+
+logger = obter_logger('kolmeya')
+
+# Registrado uma vez por processo (na importação), não a cada consulta
+if not HAS_IJSON:
+    logger.warning("ijson não instalado: as respostas de status do Kolmeya serão lidas inteiras antes de projetadas")
+
+
+def planejar_janelas(inicio: datetime, fim: datetime, dias_por_janela: int = 1) -> List[Janela]:
+    """
+    Divide o período em janelas contíguas e sem sobreposição, alinhadas ao dia.
+
+    Cada janela vai de HH:MM até 23:59 do último dia (ou até o fim do período);
+    a próxima começa no minuto seguinte.
+    """
+    janelas = []
+    atual = inicio.replace(second=0, microsecond=0)
+    fim = fim.replace(second=0, microsecond=0)
+
+    while atual <= fim:
+        ultimo_dia = atual.date() + timedelta(days=dias_por_janela - 1)
+        fim_janela = min(datetime.combine(ultimo_dia, time(23, 59)), fim)
+        janelas.append((atual, fim_janela))
+        atual = fim_janela + PASSO_MINIMO
+
+    return janelas
+
+
+def dividir_janela(janela: Janela) -> Optional[Tuple[Janela, Janela]]:
+    """Divide a janela ao meio (em minutos); retorna None se ela já tem um único minuto."""
+    inicio, fim = janela
+    minutos = int((fim - inicio).total_seconds() // 60)
+    if minutos < 1:
+        return None
+
+    meio = inicio + timedelta(minutes=minutos // 2)
+    return (inicio, meio), (meio + PASSO_MINIMO, fim)
+
+
+def chave_mensagem(msg: Dict) -> Tuple:
+    """Chave de deduplicação de uma mensagem de status."""
+    if msg.get('id') is not None:
+        return ('id', str(msg['id']))
+    return tuple(str(msg.get(campo, '')) for campo in CAMPOS_CHAVE_MENSAGEM)
+
+
+def projetar_mensagem(msg: Dict, campos: Sequence[str]) -> Dict:
+    """
+    Só os campos pedidos da mensagem.
+
+    Com 'centro_custo' entre os campos, ele recebe o centro de custo pelo mesmo critério
+    do filtro (primeiro campo preenchido de CAMPOS_CENTRO_CUSTO), que pode vir de outro campo.
+    """
+    projetada = {campo: msg[campo] for campo in campos if campo in msg}
+    if 'centro_custo' in campos:
+        centro_custo = valor_centro_custo(msg)
+        if centro_custo is not None:
+            projetada['centro_custo'] = centro_custo
+    return projetada
+
+
+def _ler_mensagens(resp: requests.Response, campos: Optional[Sequence[str]]) -> List[Dict]:
+    """
+    Mensagens da resposta; com campos, cada uma é projetada assim que decodificada.
+
+    Com ijson a lista 'messages' é lida do fluxo da resposta, um item por vez: o corpo
+    inteiro nunca fica em memória, só as mensagens já projetadas.
+    """
+    if campos and HAS_IJSON:
+        resp.raw.decode_content = True
+        return [projetar_mensagem(msg, campos)
+                for msg in ijson.items(resp.raw, 'messages.item', use_float=True) if isinstance(msg, dict)]
+
+    mensagens = resp.json().get("messages", []) or []
+    if campos:
+        mensagens = [projetar_mensagem(msg, campos) for msg in mensagens if isinstance(msg, dict)]
+    return mensagens
+
+
+def _buscar_janela(url: str, headers: Dict, janela: Janela, limite: int,
+                   payload_extra: Optional[Dict], timeout: float,
+                   campos: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Faz uma única requisição de status para a janela."""
+    payload = {
+        "start_at": janela[0].strftime(FORMATO_DATA_API),
+        "end_at": janela[1].strftime(FORMATO_DATA_API),
+        "limit": limite
+    }
+    if payload_extra:
+        payload.update(payload_extra)
+
+    with http_post(url, headers=headers, json=payload, timeout=timeout, stream=bool(campos)) as resp:
+        resp.raise_for_status()
+        return _ler_mensagens(resp, campos)
+
+
+def buscar_status_kolmeya(start_at: str, end_at: str, token: str,
+                          limite: int = LIMITE_STATUS_API,
+                          payload_extra: Optional[Dict] = None,
+                          max_workers: int = STATUS_MAX_WORKERS,
+                          url: str = KOLMEYA_STATUS_URL,
+                          timeout: float = 60,
+                          ignorar_erros: bool = False,
+                          progresso: Optional[Callable[[int, int], None]] = None,
+                          falhas: Optional[List[Janela]] = None,
+                          campos: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    Busca todas as mensagens de status do período, sem o truncamento de 30.000 por requisição.
+
+    O período é dividido em janelas diárias consultadas em paralelo; somente as janelas
+    que atingem o limite são divididas ao meio e consultadas novamente. O resultado é
+    deduplicado pela chave da mensagem e segue a ordem cronológica das janelas.
+
+    Args:
+        start_at: Data inicial (YYYY-MM-DD HH:MM)
+        end_at: Data final (YYYY-MM-DD HH:MM)
+        token: Token do Kolmeya
+        limite: Limite por requisição (no máximo 30.000)
+        payload_extra: Campos adicionais enviados em todas as requisições
+        max_workers: Número máximo de requisições simultâneas
+        url: Endpoint de status
+        timeout: Timeout de leitura de cada requisição
+        ignorar_erros: Se True, janelas com erro são descartadas em vez de interromper a busca
+        progresso: Callback (janelas_concluidas, janelas_planejadas), chamado na thread do chamador
+        falhas: Lista que recebe as janelas ignoradas por erro (com ignorar_erros=True)
+        campos: Campos mantidos de cada mensagem (ex.: CAMPOS_PROJETADOS_STATUS; None = mensagem inteira)
+
+    Returns:
+        Lista de mensagens únicas do período
+    """
+    inicio = datetime.strptime(start_at, FORMATO_DATA_API)
+    fim = datetime.strptime(end_at, FORMATO_DATA_API)
+    if fim < inicio:
+        return []
+
+    limite = min(limite, LIMITE_STATUS_API)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+
+    janelas = planejar_janelas(inicio, fim)
+    resultados: Dict[Janela, List[Dict]] = {}
+    total_planejadas = len(janelas)
+    concluidas = 0
+    divididas = 0
+    truncadas = 0
+
+    print(f"🔍 Kolmeya status: {len(janelas)} janela(s) planejada(s) de {start_at} a {end_at} ({max_workers} em paralelo)")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pendentes = {
+            executor.submit(_buscar_janela, url, headers, janela, limite, payload_extra, timeout, campos): janela
+            for janela in janelas
+        }
+
+        while pendentes:
+            finalizados, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+
+            for futuro in finalizados:
+                janela = pendentes.pop(futuro)
+                concluidas += 1
+
+                try:
+                    mensagens = futuro.result()
+                except requests.exceptions.RequestException as e:
+                    if not ignorar_erros:
+                        for restante in pendentes:
+                            restante.cancel()
+                        raise
+                    print(f"   ⚠️ Janela {janela[0].strftime(FORMATO_DATA_API)} - {janela[1].strftime(FORMATO_DATA_API)} ignorada: {e}")
+                    if falhas is not None:
+                        falhas.append(janela)
+                    mensagens = []
+
+                if len(mensagens) >= limite:
+                    metades = dividir_janela(janela)
+                    if metades:
+                        # Janela truncada: descartar e buscar as duas metades
+                        divididas += 1
+                        total_planejadas += 2
+                        for metade in metades:
+                            futuro_metade = executor.submit(_buscar_janela, url, headers, metade, limite, payload_extra, timeout, campos)
+                            pendentes[futuro_metade] = metade
+                        mensagens = None
+                    else:
+                        truncadas += 1
+                        print(f"   ⚠️ Janela de um minuto atingiu o limite ({limite}): {janela[0].strftime(FORMATO_DATA_API)}")
+
+                if mensagens is not None:
+                    resultados[janela] = mensagens
+
+                if progresso:
+                    progresso(concluidas, total_planejadas)
+
+    # Juntar em ordem cronológica e remover duplicatas
+    todas = []
+    vistas = set()
+    for janela in sorted(resultados):
+        for msg in resultados[janela]:
+            if not isinstance(msg, dict):
+                continue
+            chave = chave_mensagem(msg)
+            if chave in vistas:
+                continue
+            vistas.add(chave)
+            todas.append(msg)
+
+    print(f"✅ Kolmeya status: {len(todas)} mensagens únicas em {len(resultados)} janela(s) ({divididas} divididas, {truncadas} truncadas)")
+    return todas
@@ -0,0 +1,387 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from kolmeya_fetch import (
+    buscar_status_kolmeya, chave_mensagem, KOLMEYA_STATUS_URL, FORMATO_DATA_API,
+    LIMITE_STATUS_API, STATUS_MAX_WORKERS
+)
+from datas_vetorizadas import datas_do_campo
+
+# Arquivo do armazenamento local de status (pode ser sobrescrito por variável de ambiente)
+KOLMEYA_STORE_DB = os.getenv('KOLMEYA_STORE_DB', 'kolmeya_sms.db')
+
+# Tempo após a meia-noite até a passada final que fecha o dia anterior (o dia inteiro é buscado
+# de novo, trazendo os relatórios de entrega atrasados das mensagens já guardadas)
+KOLMEYA_STORE_MARGEM_FECHAMENTO_MIN = float(os.getenv('KOLMEYA_STORE_MARGEM_FECHAMENTO_MIN', '120'))
+
+# Tamanho máximo das mensagens guardadas; acima dele os dias fechados lidos há mais tempo são apagados
+KOLMEYA_STORE_MAX_MB = float(os.getenv('KOLMEYA_STORE_MAX_MB', '512'))
+
+FUSO_BRASIL = timezone(timedelta(hours=-3))
+
+# Trecho do período buscado de uma vez: (início, fim, dias cobertos)
+Trecho = Tuple[datetime, datetime, List[date]]
+
+
+def agora_brasil() -> datetime:
+    """Horário atual no Brasil, sem tzinfo (mesma base das datas da API)."""
+    return datetime.now(FUSO_BRASIL).replace(tzinfo=None, second=0, microsecond=0)
+
+
+def identificar_conta(token: str, url: str = KOLMEYA_STATUS_URL, payload_extra: Optional[Dict] = None,
+                      campos: Optional[Sequence[str]] = None) -> str:
+    """Chave da conta/consulta: mensagens de tokens, filtros ou projeções diferentes não se misturam."""
+    chave = [token, url, payload_extra or {}]
+    if campos:
+        chave.append(list(campos))
+    base = json.dumps(chave, sort_keys=True, default=str)
+    return hashlib.sha256(base.encode()).hexdigest()[:24]
+
+
+class KolmeyaStatusStore:
+    """
+    Armazena as mensagens de status do Kolmeya em SQLite, particionadas por dia.
+
+    O tamanho das mensagens guardadas é limitado por KOLMEYA_STORE_MAX_MB, apagando
+    primeiro os dias fechados lidos há mais tempo (buscados de novo se voltarem a ser pedidos).
+    """
+
+    def __init__(self, db_path: str = None, max_bytes: int = None):
+        """Inicializa o armazenamento ao lado do dashboard.db."""
+        self.db_path = db_path or KOLMEYA_STORE_DB
+        self.max_bytes = max_bytes if max_bytes is not None else int(KOLMEYA_STORE_MAX_MB * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._init_sqlite()
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_sqlite(self):
+        """Cria as tabelas do armazenamento."""
+        conn = self._conectar()
+        cursor = conn.cursor()
+
+        # Uma linha por mensagem; enviada_em em YYYY-MM-DD HH:MM para ordenar e filtrar como texto
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS mensagens_sms_kolmeya (
+            conta TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            enviada_em TEXT NOT NULL,
+            dados TEXT NOT NULL,
+            PRIMARY KEY (conta, chave)
+        )
+        """)
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_mensagens_sms_kolmeya_periodo
+        ON mensagens_sms_kolmeya (conta, enviada_em)
+        """)
+
+        # Situação de cada dia: fechado = buscado por completo depois de encerrado; tamanho (bytes
+        # das mensagens) e lido_em alimentam o limite de tamanho
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dias_sms_kolmeya (
+            conta TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            fechado INTEGER DEFAULT 0,
+            atualizado_em REAL NOT NULL,
+            tamanho INTEGER DEFAULT 0,
+            lido_em REAL,
+            PRIMARY KEY (conta, dia)
+        )
+        """)
+        # Arquivos criados antes do limite de tamanho não têm as duas últimas colunas
+        cursor.execute("PRAGMA table_info(dias_sms_kolmeya)")
+        colunas = {linha[1] for linha in cursor.fetchall()}
+        if 'tamanho' not in colunas:
+            cursor.execute("ALTER TABLE dias_sms_kolmeya ADD COLUMN tamanho INTEGER DEFAULT 0")
+        if 'lido_em' not in colunas:
+            cursor.execute("ALTER TABLE dias_sms_kolmeya ADD COLUMN lido_em REAL")
+
+        conn.commit()
+        conn.close()
+
+    def dias_fechados(self, conta: str, dias: List[date]) -> Set[date]:
+        """Dias do período que já estão completos no armazenamento."""
+        if not dias:
+            return set()
+        conn = self._conectar()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT dia FROM dias_sms_kolmeya
+            WHERE conta = ? AND fechado = 1 AND dia BETWEEN ? AND ?
+        """, (conta, min(dias).isoformat(), max(dias).isoformat()))
+        fechados = {date.fromisoformat(dia) for (dia,) in cursor.fetchall()}
+        conn.close()
+        return fechados
+
+    def marca_dagua(self, conta: str, dia: date) -> Optional[datetime]:
+        """Maior enviada_em guardada no dia, ou None se o dia nunca foi buscado."""
+        conn = self._conectar()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT MAX(enviada_em) FROM mensagens_sms_kolmeya
+            WHERE conta = ? AND enviada_em BETWEEN ? AND ?
+        """, (conta, f"{dia.isoformat()} 00:00", f"{dia.isoformat()} 23:59"))
+        maior = cursor.fetchone()[0]
+        cursor.execute("SELECT 1 FROM dias_sms_kolmeya WHERE conta = ? AND dia = ?", (conta, dia.isoformat()))
+        registrado = cursor.fetchone() is not None
+        conn.close()
+
+        if maior:
+            return datetime.strptime(maior, FORMATO_DATA_API)
+        if registrado:
+            # Dia já buscado e ainda sem mensagens: a cauda começa no início do dia
+            return datetime.combine(dia, datetime.min.time())
+        return None
+
+    def salvar(self, conta: str, mensagens: List[Dict], dia_padrao: date,
+               dias_buscados: List[date], dias_fechados: List[date],
+               dias_inteiros: Sequence[date] = ()):
+        """
+        Grava as mensagens (atualizando as já existentes pela chave) e a situação dos dias.
+
+        Os dias de dias_inteiros foram buscados desde o início: as mensagens guardadas
+        deles são trocadas pelas novas. Mensagens sem enviada_em reconhecível ficam no dia_padrao.
+        """
+        datas = datas_do_campo(mensagens, 'enviada_em', fuso=None)
+        enviadas = datas.dt.strftime(FORMATO_DATA_API).tolist()
+        agora = time.time()
+
+        linhas = []
+        for msg, enviada_em in zip(mensagens, enviadas):
+            if not isinstance(enviada_em, str):
+                enviada_em = datetime.combine(dia_padrao, datetime.min.time()).strftime(FORMATO_DATA_API)
+            linhas.append((
+                conta,
+                json.dumps(chave_mensagem(msg), default=str),
+                enviada_em[:10],
+                enviada_em,
+                json.dumps(msg, ensure_ascii=False, default=str)
+            ))
+
+        fechados = set(dias_fechados)
+        with self._lock:
+            conn = self._conectar()
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM mensagens_sms_kolmeya WHERE conta = ? AND dia = ?",
+                               [(conta, dia.isoformat()) for dia in dias_inteiros])
+            cursor.executemany("""
+                INSERT INTO mensagens_sms_kolmeya (conta, chave, dia, enviada_em, dados)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(conta, chave) DO UPDATE SET
+                    dia = excluded.dia, enviada_em = excluded.enviada_em, dados = excluded.dados
+            """, linhas)
+            cursor.executemany("""
+                INSERT INTO dias_sms_kolmeya (conta, dia, fechado, atualizado_em)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(conta, dia) DO UPDATE SET
+                    fechado = excluded.fechado, atualizado_em = excluded.atualizado_em
+            """, [(conta, dia.isoformat(), int(dia in fechados), agora) for dia in dias_buscados])
+            alterados = {linha[2] for linha in linhas} | {dia.isoformat() for dia in dias_buscados}
+            cursor.executemany("""
+                UPDATE dias_sms_kolmeya SET tamanho = (
+                    SELECT COALESCE(SUM(LENGTH(chave) + LENGTH(dados)), 0) FROM mensagens_sms_kolmeya
+                    WHERE conta = ? AND enviada_em BETWEEN ? AND ?
+                ) WHERE conta = ? AND dia = ?
+            """, [(conta, f"{dia} 00:00", f"{dia} 23:59", conta, dia) for dia in alterados])
+            conn.commit()
+            conn.close()
+
+    def ler(self, conta: str, inicio: datetime, fim: datetime) -> List[Dict]:
+        """Mensagens guardadas com enviada_em em [inicio, fim], em ordem cronológica (renova lido_em dos dias)."""
+        conn = self._conectar()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT dados FROM mensagens_sms_kolmeya
+            WHERE conta = ? AND enviada_em BETWEEN ? AND ?
+            ORDER BY enviada_em, rowid
+        """, (conta, inicio.strftime(FORMATO_DATA_API), fim.strftime(FORMATO_DATA_API)))
+        mensagens = [json.loads(dados) for (dados,) in cursor.fetchall()]
+        with self._lock:
+            cursor.execute("UPDATE dias_sms_kolmeya SET lido_em = ? WHERE conta = ? AND dia BETWEEN ? AND ?",
+                           (time.time(), conta, inicio.date().isoformat(), fim.date().isoformat()))
+            conn.commit()
+        conn.close()
+        return mensagens
+
+    def aplicar_limite(self):
+        """Apaga os dias fechados lidos há mais tempo até as mensagens guardadas caberem em max_bytes."""
+        with self._lock:
+            conn = self._conectar()
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(SUM(tamanho), 0) FROM dias_sms_kolmeya")
+            total = cursor.fetchone()[0]
+            if total > self.max_bytes:
+                cursor.execute("""
+                    SELECT conta, dia, tamanho FROM dias_sms_kolmeya
+                    WHERE fechado = 1 ORDER BY COALESCE(lido_em, atualizado_em)
+                """)
+                apagar = []
+                for conta, dia, tamanho in cursor.fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    apagar.append((conta, dia))
+                    total -= tamanho
+                cursor.executemany("DELETE FROM mensagens_sms_kolmeya WHERE conta = ? AND enviada_em BETWEEN ? AND ?",
+                                   [(conta, f"{dia} 00:00", f"{dia} 23:59") for conta, dia in apagar])
+                cursor.executemany("DELETE FROM dias_sms_kolmeya WHERE conta = ? AND dia = ?", apagar)
+                conn.commit()
+            conn.close()
+
+    def limpar(self, conta: str = None):
+        """Remove as mensagens guardadas (de uma conta ou de todas)."""
+        with self._lock:
+            conn = self._conectar()
+            cursor = conn.cursor()
+            if conta:
+                cursor.execute("DELETE FROM mensagens_sms_kolmeya WHERE conta = ?", (conta,))
+                cursor.execute("DELETE FROM dias_sms_kolmeya WHERE conta = ?", (conta,))
+            else:
+                cursor.execute("DELETE FROM mensagens_sms_kolmeya")
+                cursor.execute("DELETE FROM dias_sms_kolmeya")
+            conn.commit()
+            conn.close()
+
+
+_store_padrao: Optional[KolmeyaStatusStore] = None
+_lock_store = threading.Lock()
+
+
+def obter_store_kolmeya() -> KolmeyaStatusStore:
+    """Armazenamento compartilhado pelo processo (todas as sessões do Streamlit)."""
+    global _store_padrao
+    with _lock_store:
+        if _store_padrao is None:
+            _store_padrao = KolmeyaStatusStore()
+        return _store_padrao
+
+
+def fechamento_dia(dia: date) -> datetime:
+    """Horário (Brasil, sem tzinfo) a partir do qual o dia é considerado fechado."""
+    fim_do_dia = datetime.combine(dia + timedelta(days=1), datetime.min.time())
+    return fim_do_dia + timedelta(minutes=KOLMEYA_STORE_MARGEM_FECHAMENTO_MIN)
+
+
+def dia_fechado(dia: date, agora: datetime) -> bool:
+    """Dia encerrado há mais de KOLMEYA_STORE_MARGEM_FECHAMENTO_MIN (não recebe mais mensagens nem status)."""
+    return agora >= fechamento_dia(dia)
+
+
+def planejar_trechos(store: KolmeyaStatusStore, conta: str, dias: List[date], agora: datetime) -> List[Trecho]:
+    """
+    Trechos a buscar para completar os dias ainda abertos.
+
+    Dias nunca buscados e consecutivos viram um único trecho (dia inteiro); dias já
+    buscados e ainda abertos viram um trecho só com a cauda após a maior enviada_em
+    guardada. Um dia já buscado que passou do fechamento é buscado inteiro mais uma vez
+    (a passada final, que atualiza o status das mensagens antigas) antes de ser fechado.
+    """
+    trechos: List[Trecho] = []
+    ultimo_dia_inteiro = False
+    fechados = store.dias_fechados(conta, dias)
+
+    for dia in dias:
+        if dia in fechados:
+            ultimo_dia_inteiro = False
+            continue
+        inicio = datetime.combine(dia, datetime.min.time())
+        fim = min(inicio + timedelta(hours=23, minutes=59), agora)
+        marca = store.marca_dagua(conta, dia) if not dia_fechado(dia, agora) else None
+
+        if marca is not None:
+            # A cauda inclui o minuto da marca: mensagens do mesmo minuto podem ter chegado depois
+            trechos.append((marca, fim, [dia]))
+            ultimo_dia_inteiro = False
+        elif ultimo_dia_inteiro and trechos[-1][2][-1] == dia - timedelta(days=1):
+            trechos[-1] = (trechos[-1][0], fim, trechos[-1][2] + [dia])
+        else:
+            trechos.append((inicio, fim, [dia]))
+            ultimo_dia_inteiro = True
+
+    return trechos
+
+
+def sincronizar_status_kolmeya(start_at: str, end_at: str, token: str,
+                               limite: int = LIMITE_STATUS_API,
+                               payload_extra: Optional[Dict] = None,
+                               max_workers: int = STATUS_MAX_WORKERS,
+                               url: str = KOLMEYA_STATUS_URL,
+                               timeout: float = 60,
+                               ignorar_erros: bool = False,
+                               progresso: Optional[Callable[[int, int], None]] = None,
+                               store: Optional[KolmeyaStatusStore] = None,
+                               campos: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    Mesmo contrato de buscar_status_kolmeya, servido pelo armazenamento local.
+
+    Dias fechados já guardados não são buscados de novo; para os demais só é buscada a
+    cauda após a última enviada_em guardada, e o dia é buscado inteiro uma última vez
+    depois do fechamento (ver planejar_trechos). Erros interrompem a busca como em
+    buscar_status_kolmeya (os trechos anteriores ficam gravados); com ignorar_erros=True,
+    dias com janelas que falharam não são gravados nem marcados como fechados.
+    """
+    store = store or obter_store_kolmeya()
+    conta = identificar_conta(token, url, payload_extra, campos)
+
+    inicio = datetime.strptime(start_at, FORMATO_DATA_API)
+    fim = datetime.strptime(end_at, FORMATO_DATA_API)
+    if fim < inicio:
+        return []
+
+    agora = agora_brasil()
+    ultimo_dia = min(fim, agora).date()
+    dias = [inicio.date() + timedelta(days=i) for i in range((ultimo_dia - inicio.date()).days + 1)]
+
+    trechos = planejar_trechos(store, conta, dias, agora)
+    buscadas = 0
+
+    for inicio_trecho, fim_trecho, dias_trecho in trechos:
+        falhas = []
+        mensagens = buscar_status_kolmeya(
+            inicio_trecho.strftime(FORMATO_DATA_API),
+            fim_trecho.strftime(FORMATO_DATA_API),
+            token,
+            limite=limite,
+            payload_extra=payload_extra,
+            max_workers=max_workers,
+            url=url,
+            timeout=timeout,
+            ignorar_erros=ignorar_erros,
+            progresso=progresso,
+            falhas=falhas,
+            campos=campos
+        )
+
+        dias_com_falha = set()
+        for janela_ini, janela_fim in falhas:
+            dia = janela_ini.date()
+            while dia <= janela_fim.date():
+                dias_com_falha.add(dia)
+                dia += timedelta(days=1)
+        if dias_com_falha:
+            descartar = {dia.strftime('%d/%m/%Y') for dia in dias_com_falha}
+            mensagens = [msg for msg in mensagens if str(msg.get('enviada_em', ''))[:10] not in descartar]
+
+        dias_ok = [dia for dia in dias_trecho if dia not in dias_com_falha]
+        dias_fechados = [
+            dia for dia in dias_ok
+            if dia_fechado(dia, agora) and fim_trecho >= datetime.combine(dia, datetime.min.time()) + timedelta(hours=23, minutes=59)
+        ]
+        # Dias buscados desde a meia-noite: o trecho substitui o que estava guardado
+        dias_inteiros = [dia for dia in dias_ok if inicio_trecho <= datetime.combine(dia, datetime.min.time())]
+        store.salvar(conta, mensagens, dias_trecho[0], dias_ok, dias_fechados, dias_inteiros)
+        buscadas += len(mensagens)
+
+    print(f"💾 Kolmeya status local: {len(dias)} dia(s), {len(trechos)} trecho(s) buscado(s), {buscadas} mensagens recebidas")
+
+    mensagens = store.ler(conta, inicio, fim)
+    if trechos:
+        store.aplicar_limite()
+    return mensagens
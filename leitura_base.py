@@ -0,0 +1,203 @@
+import csv
+import io
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from extracao_vetorizada import PALAVRAS_CPF, PALAVRAS_DATA, PALAVRAS_TELEFONE
+from log_dashboard import obter_logger
+from perfil_base import PALAVRAS_DATA_CANAL, PALAVRAS_DATA_CANAL_PRIORIDADE, PALAVRAS_STATUS, PALAVRAS_UTM
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Bytes do início do arquivo usados para detectar codificação, separador e cabeçalho
+LEITURA_AMOSTRA_BYTES = int(os.getenv('LEITURA_AMOSTRA_BYTES', '65536'))
+
+# Ler só as colunas usadas pelo perfil da base (CPF, telefone, data, UTM, status); '0' lê todas
+LEITURA_APENAS_PAPEIS = os.getenv('LEITURA_APENAS_PAPEIS', '1') == '1'
+
+# Separadores testados, em ordem de preferência no empate (';' é o padrão das exportações em português)
+SEPARADORES = (';', ',', '\t', '|')
+
+# Colunas que o perfil da base procura pelo nome
+PALAVRAS_PAPEIS = (PALAVRAS_CPF + PALAVRAS_TELEFONE + PALAVRAS_DATA + PALAVRAS_UTM + PALAVRAS_STATUS
+                   + PALAVRAS_DATA_CANAL_PRIORIDADE + PALAVRAS_DATA_CANAL)
+
+logger = obter_logger('base')
+
+
+def detectar_codificacao(amostra: bytes) -> str:
+    """Codificação do arquivo pelo BOM ou pela amostra: utf-8, senão cp1252 (Excel em português), senão latin-1."""
+    if amostra.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if amostra.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+    for codificacao in ('utf-8', 'cp1252'):
+        try:
+            amostra.decode(codificacao)
+            return codificacao
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def detectar_formato(texto: str) -> Tuple[str, int, List[str]]:
+    """
+    Separador, linha do cabeçalho e nomes das colunas a partir das primeiras linhas.
+
+    O separador escolhido é o que divide mais linhas na mesma quantidade de campos (pelo
+    menos 2); o cabeçalho é a primeira linha com essa quantidade, o que pula títulos e
+    linhas em branco antes dele. Sem separador reconhecido, usa ',' e a primeira linha.
+    """
+    melhor: Optional[Tuple[Tuple[int, int], str, int, List[str]]] = None
+    for separador in SEPARADORES:
+        leitor = csv.reader(io.StringIO(texto), delimiter=separador)
+        linhas = []
+        while True:
+            inicio = leitor.line_num
+            try:
+                campos = next(leitor)
+            except (StopIteration, csv.Error):
+                break
+            linhas.append((inicio, campos))
+        contagens = Counter(len(campos) for _, campos in linhas if campos)
+        if not contagens:
+            continue
+        quantidade, frequencia = contagens.most_common(1)[0]
+        if quantidade < 2:
+            continue
+        pontuacao = (frequencia, quantidade)
+        if melhor is None or pontuacao > melhor[0]:
+            inicio, cabecalho = next((i, c) for i, c in linhas if len(c) == quantidade)
+            melhor = (pontuacao, separador, inicio, cabecalho)
+
+    if melhor is None:
+        primeira = texto.splitlines()[0] if texto else ''
+        return ',', 0, next(csv.reader([primeira]), [])
+    _, separador, linha_cabecalho, cabecalho = melhor
+    return separador, linha_cabecalho, cabecalho
+
+
+def colunas_de_papel(cabecalho: List[str]) -> Optional[List[int]]:
+    """
+    Posições das colunas usadas pelo perfil da base, ou None para ler todas.
+
+    Sem coluna de CPF nem de telefone o perfil procura em todas as colunas, então todas são lidas.
+    """
+    nomes = [str(nome).strip().lower() for nome in cabecalho]
+
+    def posicoes(palavras):
+        return [i for i, nome in enumerate(nomes) if any(palavra in nome for palavra in palavras)]
+
+    if not posicoes(PALAVRAS_CPF) and not posicoes(PALAVRAS_TELEFONE):
+        return None
+    selecionadas = posicoes(PALAVRAS_PAPEIS)
+    return selecionadas if len(selecionadas) < len(nomes) else None
+
+
+def _ler_csv(conteudo: bytes, motor: str, separador: str, codificacao: str,
+             linha_cabecalho: int, colunas: Optional[List[int]]) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(conteudo), dtype=str, sep=separador, encoding=codificacao,
+                       skiprows=linha_cabecalho, usecols=colunas, engine=motor)
+
+
+def ler_csv_base(conteudo: bytes) -> pd.DataFrame:
+    """
+    Base em CSV lida em uma única passada.
+
+    Codificação, separador e cabeçalho vêm dos primeiros LEITURA_AMOSTRA_BYTES; com
+    LEITURA_APENAS_PAPEIS só as colunas usadas pelo perfil são convertidas. Usa o
+    pyarrow quando instalado (senão o motor C do pandas). Se a leitura falhar por causa
+    de um caractere fora da amostra ou de uma linha que o pyarrow não aceita, lê de novo
+    com latin-1 ou com o motor C.
+    """
+    amostra = conteudo[:LEITURA_AMOSTRA_BYTES]
+    if len(conteudo) > len(amostra) and b'\n' in amostra:
+        # A última linha da amostra pode estar cortada (inclusive no meio de um caractere)
+        amostra = amostra[:amostra.rfind(b'\n') + 1]
+    codificacao = detectar_codificacao(amostra)
+    separador, linha_cabecalho, cabecalho = detectar_formato(amostra.decode(codificacao, errors='replace'))
+    colunas = colunas_de_papel(cabecalho) if LEITURA_APENAS_PAPEIS else None
+    motor = 'pyarrow' if HAS_PYARROW else 'c'
+
+    inicio = time.perf_counter()
+    try:
+        df = _ler_csv(conteudo, motor, separador, codificacao, linha_cabecalho, colunas)
+    except UnicodeDecodeError:
+        logger.warning("Base não está em %s além da amostra; lendo de novo como latin-1", codificacao)
+        codificacao = 'latin-1'
+        df = _ler_csv(conteudo, motor, separador, codificacao, linha_cabecalho, colunas)
+    except Exception as e:
+        if motor == 'c':
+            raise
+        logger.warning("pyarrow não leu a base (%s); lendo de novo com o motor C", e)
+        motor = 'c'
+        df = _ler_csv(conteudo, motor, separador, codificacao, linha_cabecalho, colunas)
+
+    _registrar_leitura(df, time.perf_counter() - inicio, len(conteudo), {
+        'formato': 'csv',
+        'motor': motor,
+        'separador': separador,
+        'codificacao': codificacao,
+        'linha_cabecalho': linha_cabecalho,
+        'colunas_lidas': len(df.columns),
+        'colunas_arquivo': len(cabecalho),
+    })
+    return df
+
+
+def ler_excel_base(conteudo: bytes) -> pd.DataFrame:
+    """Base em Excel (primeira planilha), com o tempo de leitura registrado como no CSV."""
+    inicio = time.perf_counter()
+    df = pd.read_excel(io.BytesIO(conteudo), dtype=str)
+    _registrar_leitura(df, time.perf_counter() - inicio, len(conteudo), {
+        'formato': 'excel',
+        'motor': 'openpyxl',
+        'colunas_lidas': len(df.columns),
+        'colunas_arquivo': len(df.columns),
+    })
+    return df
+
+
+def ler_arquivo_base(nome: str, conteudo: bytes) -> pd.DataFrame:
+    """Base enviada (CSV ou Excel, pela extensão); o resumo da leitura fica em df.attrs['leitura']."""
+    if nome.lower().endswith('.csv'):
+        return ler_csv_base(conteudo)
+    return ler_excel_base(conteudo)
+
+
+def _registrar_leitura(df: pd.DataFrame, segundos: float, tamanho: int, detalhes: Dict):
+    leitura = dict(detalhes)
+    leitura['linhas'] = len(df)
+    leitura['bytes'] = tamanho
+    leitura['segundos'] = round(segundos, 3)
+    leitura['linhas_por_segundo'] = int(len(df) / segundos) if segundos > 0 else len(df)
+    df.attrs['leitura'] = leitura
+    logger.info("Base lida (%s, %s): %d linhas, %d/%d colunas, %.1f MB em %.2fs (%d linhas/s)%s",
+                leitura['formato'], leitura['motor'], leitura['linhas'], leitura['colunas_lidas'],
+                leitura['colunas_arquivo'], tamanho / 1024 / 1024, segundos, leitura['linhas_por_segundo'],
+                f" sep={leitura['separador']!r} {leitura['codificacao']} cabeçalho na linha {leitura['linha_cabecalho'] + 1}"
+                if leitura['formato'] == 'csv' else '')
+
+
+def resumo_leitura(df: pd.DataFrame) -> str:
+    """Resumo da leitura da base para exibição (vazio se a base não veio de ler_arquivo_base ou do cache)."""
+    leitura = df.attrs.get('leitura')
+    if not leitura:
+        return ''
+    linhas = f"{leitura['linhas']:,}".replace(',', '.')
+    por_segundo = f"{leitura['linhas_por_segundo']:,}".replace(',', '.')
+    resumo = f"{linhas} linhas em {leitura['segundos']:.2f}s ({por_segundo} linhas/s, {leitura['motor']})"
+    if leitura['colunas_lidas'] < leitura['colunas_arquivo']:
+        resumo += f" · {leitura['colunas_lidas']} de {leitura['colunas_arquivo']} colunas"
+    if leitura.get('cache'):
+        # Base reaberta do cache em disco (cache_bases.py); o resto é da primeira leitura
+        resumo = f"{linhas} linhas do cache em {leitura['segundos_cache']:.2f}s · primeira leitura: {resumo}"
+    return resumo
@@ -0,0 +1,104 @@
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Nível dos logs do dashboard (DEBUG, INFO, WARNING, ERROR) e itens registrados por laço em DEBUG
+DASHBOARD_LOG_NIVEL = os.getenv('DASHBOARD_LOG_NIVEL', 'INFO').upper()
+DASHBOARD_LOG_AMOSTRA = int(os.getenv('DASHBOARD_LOG_AMOSTRA', '5'))
+
+FORMATO_LOG = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+_lock_config = threading.Lock()
+
+
+def configurar_logs(nivel: str = DASHBOARD_LOG_NIVEL) -> logging.Logger:
+    """Configura o logger 'dashboard' uma única vez por processo (o Streamlit reexecuta o script)."""
+    logger = logging.getLogger('dashboard')
+    with _lock_config:
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter(FORMATO_LOG))
+            logger.addHandler(handler)
+            logger.propagate = False
+        logger.setLevel(getattr(logging, nivel, logging.INFO))
+    return logger
+
+
+def obter_logger(nome: str) -> logging.Logger:
+    """Logger filho de 'dashboard' (ex.: obter_logger('kolmeya') -> dashboard.kolmeya)."""
+    configurar_logs()
+    return logging.getLogger(f'dashboard.{nome}')
+
+
+class Amostra:
+    """
+    Registra só os primeiros itens de um laço.
+
+    Com o nível desligado, registrar() não formata nada: a mensagem usa argumentos
+    no estilo do logging (%s), formatados apenas quando o registro é emitido.
+    """
+
+    def __init__(self, logger: logging.Logger, limite: int = DASHBOARD_LOG_AMOSTRA, nivel: int = logging.DEBUG):
+        self.logger = logger
+        self.nivel = nivel
+        self.restantes = limite if logger.isEnabledFor(nivel) else 0
+
+    def registrar(self, mensagem: str, *args):
+        if self.restantes > 0:
+            self.restantes -= 1
+            self.logger.log(self.nivel, mensagem, *args)
+
+
+class ResumoExecucao:
+    """
+    Contadores e tempos de uma execução, registrados em uma única linha ao final.
+
+    Uso:
+        with ResumoExecucao(logger, 'extrair_cpfs_kolmeya') as resumo:
+            resumo.contar('mensagens', len(messages))
+            with resumo.etapa('limpeza'):
+                ...
+    """
+
+    def __init__(self, logger: logging.Logger, nome: str, nivel: int = logging.INFO):
+        self.logger = logger
+        self.nome = nome
+        self.nivel = nivel
+        self.contagens: Dict[str, int] = {}
+        self.tempos: Dict[str, float] = {}
+        self._inicio: Optional[float] = None
+
+    def __enter__(self) -> 'ResumoExecucao':
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, rastreio):
+        if tipo is not None:
+            self.contar('erros')
+        self.registrar()
+        return False
+
+    def contar(self, chave: str, quantidade: int = 1):
+        self.contagens[chave] = self.contagens.get(chave, 0) + quantidade
+
+    @contextmanager
+    def etapa(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[nome] = self.tempos.get(nome, 0.0) + time.perf_counter() - inicio
+
+    def registrar(self):
+        """Emite a linha de resumo (contagens, tempos das etapas e tempo total)."""
+        if not self.logger.isEnabledFor(self.nivel):
+            return
+        total = time.perf_counter() - self._inicio if self._inicio is not None else 0.0
+        contagens = ' '.join(f'{chave}={valor}' for chave, valor in self.contagens.items())
+        tempos = ' '.join(f'{chave}={valor:.2f}s' for chave, valor in self.tempos.items())
+        self.logger.log(self.nivel, '%s: %s%s total=%.2fs', self.nome, contagens,
+                        f' | {tempos} |' if tempos else ' |', total)
@@ -0,0 +1,312 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from conjuntos_ids import ConjuntoIds
+from cpf_vetorizado import cpfs_texto
+from extracao_vetorizada import (
+    PALAVRAS_CPF, PALAVRAS_DATA, PALAVRAS_TELEFONE,
+    detectar_colunas, como_texto, codificar_telefones_coluna, codigos_cpf_por_linha, resumir_cpfs,
+    parsear_datas_coluna, parsear_datas_canal_coluna
+)
+
+# Palavras-chave das colunas usadas na classificação por canal e status
+PALAVRAS_UTM = ['utm', 'source', 'origem', 'fonte']
+PALAVRAS_STATUS = ['status', 'categoria', 'tipo', 'segmento']
+PALAVRAS_DATA_CANAL_PRIORIDADE = ['data criacao', 'data_criacao', 'criacao', 'created', 'data_created']
+PALAVRAS_DATA_CANAL = ['data', 'date', 'timestamp', 'hora', 'time']
+
+# Valor da coluna UTM de cada canal (comparado sem diferenciar maiúsculas)
+CANAIS = {
+    'URA': 'URA',
+    'WHATSAPP_MKT': 'WHATSAPP_MKT',
+    'ad': 'AD',
+}
+
+# Prefixo do status -> grupo exibido no dashboard
+GRUPOS_STATUS = [('INSS', 'Novo'), ('FGTS', 'FGTS'), ('CLT', 'CLT')]
+GRUPOS = ['Novo', 'FGTS', 'CLT', 'Outros']
+
+# Quantidade de perfis mantidos em memória (um por upload)
+MAX_PERFIS = 4
+
+# Colunas reconhecidas gravadas junto com os vetores do perfil (ver PerfilBase.vetores)
+_COLUNAS_PERFIL = ('colunas_utm', 'colunas_status', 'colunas_telefone', 'colunas_cpf',
+                   'colunas_data', 'colunas_data_canal')
+
+
+def calcular_hash_conteudo(conteudo: bytes) -> str:
+    """Hash do conteúdo do arquivo enviado, usado como chave do perfil."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _hash_dataframe(df: pd.DataFrame) -> str:
+    """Hash do DataFrame quando ele não traz o hash do upload em df.attrs."""
+    valores = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    colunas = '|'.join(str(col) for col in df.columns).encode()
+    return hashlib.sha256(valores.tobytes() + colunas).hexdigest()
+
+
+class PerfilBase:
+    """
+    Perfil da base carregada, calculado em uma única passada por coluna.
+
+    Guarda, por linha: canal (URA, WHATSAPP_MKT, ad), grupo de status (Novo/FGTS/CLT/Outros),
+    CPF normalizado (com e sem validação), telefones normalizados e as datas já convertidas.
+    CPFs e telefones ficam em int64 (negativo = sem valor); os conjuntos devolvidos são
+    ConjuntoIds. Os extratores do dashboard são filtros sobre esse perfil.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.total = len(df)
+
+        self.colunas_utm = detectar_colunas(df, PALAVRAS_UTM)
+        self.colunas_status = detectar_colunas(df, PALAVRAS_STATUS)
+        self.colunas_telefone = detectar_colunas(df, PALAVRAS_TELEFONE) or df.columns.tolist()
+        self.colunas_cpf = detectar_colunas(df, PALAVRAS_CPF) or df.columns.tolist()
+        self.colunas_data = detectar_colunas(df, PALAVRAS_DATA)
+
+        prioridade = detectar_colunas(df, PALAVRAS_DATA_CANAL_PRIORIDADE)
+        demais = [col for col in detectar_colunas(df, PALAVRAS_DATA_CANAL) if col not in prioridade]
+        self.colunas_data_canal = prioridade + demais
+
+        self._classificar_canais()
+        self._classificar_status()
+
+        # CPF da extração geral (aceita dígito verificador inválido) e CPF validado dos canais
+        self.cpf, self.cpf_invalidos = codigos_cpf_por_linha(df, self.colunas_cpf)
+        self.cpf_valido, _ = codigos_cpf_por_linha(df, self.colunas_cpf, exigir_validacao=True)
+
+        self.telefones = {col: codificar_telefones_coluna(df[col]) for col in self.colunas_telefone}
+        self.datas = {col: parsear_datas_coluna(df[col]) for col in self.colunas_data}
+        self.datas_canal = {col: parsear_datas_canal_coluna(df[col]) for col in self.colunas_data_canal}
+
+    def _classificar_canais(self):
+        """Marca as linhas de cada canal (qualquer coluna UTM com o valor do canal)."""
+        self.canais = {nome: np.zeros(self.total, dtype=bool) for nome in CANAIS}
+        canal = pd.Series(None, index=self.df.index, dtype=object)
+
+        for col in self.colunas_utm:
+            texto = como_texto(self.df[col]).str.strip().str.upper()
+            for nome, valor in CANAIS.items():
+                mascara = (texto == valor).to_numpy(dtype=bool)
+                self.canais[nome] |= mascara
+                canal[mascara & canal.isna().to_numpy()] = nome
+
+        self.canal = canal
+
+    def _classificar_status(self):
+        """Grupo de status da primeira coluna de status reconhecida; FGTS em qualquer coluna."""
+        status = pd.Series('Outros', index=self.df.index, dtype=object)
+        definido = np.zeros(self.total, dtype=bool)
+        self.tem_fgts = np.zeros(self.total, dtype=bool)
+
+        for col in self.colunas_status:
+            texto = como_texto(self.df[col]).str.strip().str.upper()
+            for prefixo, grupo in GRUPOS_STATUS:
+                mascara = texto.str.startswith(prefixo).to_numpy(dtype=bool)
+                novos = mascara & ~definido
+                status[novos] = grupo
+                definido |= novos
+                if prefixo == 'FGTS':
+                    self.tem_fgts |= mascara
+
+        self.status = status
+
+    @staticmethod
+    def _intervalo(data_ini, data_fim) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        return (pd.Timestamp(datetime.combine(data_ini, datetime.min.time())),
+                pd.Timestamp(datetime.combine(data_fim, datetime.max.time())))
+
+    def mascara_periodo(self, data_ini, data_fim) -> np.ndarray:
+        """Linhas com alguma coluna de data no período (regra da extração de telefones/CPFs)."""
+        if not (data_ini and data_fim and self.colunas_data):
+            return np.ones(self.total, dtype=bool)
+
+        inicio, fim = self._intervalo(data_ini, data_fim)
+        mascara = np.zeros(self.total, dtype=bool)
+        for datas in self.datas.values():
+            mascara |= ((datas >= inicio) & (datas <= fim)).to_numpy()
+        return mascara
+
+    def mascara_periodo_canal(self, data_ini, data_fim) -> Tuple[np.ndarray, pd.Series]:
+        """
+        Linhas no período pela regra dos canais e a primeira data encontrada no período.
+
+        Sem período ou sem colunas de data, todas as linhas valem e a data fica vazia (NaT).
+        """
+        data_encontrada = pd.Series(pd.NaT, index=self.df.index, dtype='datetime64[ns]')
+        if not (data_ini and data_fim and self.colunas_data_canal):
+            return np.ones(self.total, dtype=bool), data_encontrada
+
+        inicio, fim = self._intervalo(data_ini, data_fim)
+        for col in self.colunas_data_canal:
+            datas = self.datas_canal[col]
+            no_periodo = (datas >= inicio) & (datas <= fim) & data_encontrada.isna()
+            data_encontrada[no_periodo] = datas[no_periodo]
+        return data_encontrada.notna().to_numpy(), data_encontrada
+
+    def telefones_no_periodo(self, data_ini=None, data_fim=None) -> ConjuntoIds:
+        """Mesmo resultado de extrair_telefones_vetorizado."""
+        if not self.telefones:
+            return ConjuntoIds()
+        mascara = self.mascara_periodo(data_ini, data_fim)
+        return ConjuntoIds.de_codigos(np.concatenate([codigos[mascara] for codigos in self.telefones.values()]))
+
+    def cpfs_no_periodo(self, data_ini=None, data_fim=None) -> Tuple[ConjuntoIds, Dict[str, int]]:
+        """Mesmo resultado de extrair_cpfs_vetorizado."""
+        mascara = self.mascara_periodo(data_ini, data_fim)
+        return resumir_cpfs(self.cpf[mascara], self.cpf_invalidos[mascara])
+
+    def filtrar_canal(self, canal: str, data_ini=None, data_fim=None, apenas_fgts: bool = False,
+                      regra_data_canal: bool = True) -> Tuple[np.ndarray, pd.Series]:
+        """
+        Linhas do canal no período (e só FGTS, se pedido).
+
+        Args:
+            canal: 'URA', 'WHATSAPP_MKT' ou 'ad'
+            regra_data_canal: True usa as colunas/formatos de data dos canais (URA, WhatsApp);
+                False usa a regra geral (AD)
+
+        Returns:
+            Tupla (máscara das linhas aceitas, primeira data no período de cada linha)
+        """
+        mascara = self.canais[canal].copy()
+        if regra_data_canal:
+            no_periodo, data_encontrada = self.mascara_periodo_canal(data_ini, data_fim)
+        else:
+            no_periodo = self.mascara_periodo(data_ini, data_fim)
+            data_encontrada = pd.Series(pd.NaT, index=self.df.index, dtype='datetime64[ns]')
+        mascara &= no_periodo
+        if apenas_fgts:
+            mascara &= self.tem_fgts
+        return mascara, data_encontrada
+
+    def resumir_canal(self, mascara: np.ndarray) -> Tuple[int, Dict[str, int], Dict[str, ConjuntoIds]]:
+        """Total, contagem por grupo de status e CPFs validados por grupo das linhas selecionadas."""
+        status = self.status[mascara]
+        cpfs = self.cpf_valido[mascara]
+
+        contagem = status.value_counts()
+        por_status = {grupo: int(contagem.get(grupo, 0)) for grupo in GRUPOS}
+        cpfs_por_status = {
+            grupo: ConjuntoIds.de_codigos(cpfs[(status == grupo).to_numpy()])
+            for grupo in GRUPOS
+        }
+        return int(mascara.sum()), por_status, cpfs_por_status
+
+    def vetores(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Vetores do perfil e metadados (nomes das colunas reconhecidas) para gravar em disco.
+
+        O perfil é refeito sem reprocessar a base por de_vetores (ver cache_bases.py).
+        """
+        vetores = {
+            'cpf': self.cpf,
+            'cpf_invalidos': self.cpf_invalidos,
+            'cpf_valido': self.cpf_valido,
+            'canais': np.stack([self.canais[nome] for nome in CANAIS]),
+            'canal': pd.Categorical(self.canal, categories=list(CANAIS)).codes,
+            'status': pd.Categorical(self.status, categories=GRUPOS).codes,
+            'tem_fgts': self.tem_fgts,
+        }
+        for i, codigos in enumerate(self.telefones.values()):
+            vetores[f'telefone_{i}'] = codigos
+        for i, datas in enumerate(self.datas.values()):
+            vetores[f'data_{i}'] = datas.to_numpy()
+        for i, datas in enumerate(self.datas_canal.values()):
+            vetores[f'data_canal_{i}'] = datas.to_numpy()
+        metadados = {nome: list(getattr(self, nome)) for nome in _COLUNAS_PERFIL}
+        return vetores, metadados
+
+    @classmethod
+    def de_vetores(cls, df: pd.DataFrame, vetores, metadados: Dict) -> 'PerfilBase':
+        """Perfil de uma base já perfilada, a partir do que vetores() devolveu."""
+        perfil = cls.__new__(cls)
+        perfil.df = df
+        perfil.total = len(df)
+        for nome in _COLUNAS_PERFIL:
+            setattr(perfil, nome, metadados[nome])
+
+        perfil.canais = {nome: vetores['canais'][i] for i, nome in enumerate(CANAIS)}
+        # Código -1 (sem canal) cai no None do final da lista
+        perfil.canal = pd.Series(np.array(list(CANAIS) + [None], dtype=object)[vetores['canal']],
+                                 index=df.index, dtype=object)
+        perfil.status = pd.Series(np.array(GRUPOS, dtype=object)[vetores['status']], index=df.index, dtype=object)
+        perfil.tem_fgts = vetores['tem_fgts']
+
+        perfil.cpf = vetores['cpf']
+        perfil.cpf_invalidos = vetores['cpf_invalidos']
+        perfil.cpf_valido = vetores['cpf_valido']
+        perfil.telefones = {col: vetores[f'telefone_{i}'] for i, col in enumerate(perfil.colunas_telefone)}
+        perfil.datas = {col: pd.Series(vetores[f'data_{i}'], index=df.index)
+                        for i, col in enumerate(perfil.colunas_data)}
+        perfil.datas_canal = {col: pd.Series(vetores[f'data_canal_{i}'], index=df.index)
+                              for i, col in enumerate(perfil.colunas_data_canal)}
+        return perfil
+
+    def registros_canal(self, mascara: np.ndarray, data_encontrada: pd.Series) -> List[Dict]:
+        """Registros completos das linhas selecionadas, no formato usado pelo dashboard."""
+        selecionados = self.df[mascara]
+        registros = []
+        for idx, dados, cpf, status, data in zip(
+            selecionados.index,
+            selecionados.to_dict('records'),
+            cpfs_texto(self.cpf_valido[mascara]).tolist(),
+            self.status[mascara].tolist(),
+            data_encontrada[mascara].tolist()
+        ):
+            registros.append({
+                'linha': idx + 1,  # +1 para linha humana (não índice)
+                'cpf': cpf if isinstance(cpf, str) else None,
+                'status': status,
+                'data_encontrada': data.strftime('%d/%m/%Y %H:%M') if pd.notna(data) else 'N/A',
+                'dados_completos': dados
+            })
+        return registros
+
+
+_perfis: "OrderedDict[str, PerfilBase]" = OrderedDict()
+_lock_perfis = threading.Lock()
+
+
+def chave_base(df: pd.DataFrame) -> str:
+    """
+    Hash que identifica a base carregada.
+
+    ler_base grava o hash do upload em df.attrs['hash_conteudo']; sem ele, o hash é calculado a partir do DataFrame.
+    """
+    chave = df.attrs.get('hash_conteudo')
+    if not chave:
+        chave = df.attrs['hash_conteudo'] = _hash_dataframe(df)
+    return chave
+
+
+def obter_perfil_base(df: pd.DataFrame) -> PerfilBase:
+    """Perfil da base, memoizado pelo hash do conteúdo do upload (ver chave_base)."""
+    chave = chave_base(df)
+
+    with _lock_perfis:
+        perfil = _perfis.get(chave)
+        if perfil is not None:
+            _perfis.move_to_end(chave)
+            return perfil
+
+    perfil = PerfilBase(df)
+    guardar_perfil(chave, perfil)
+    return perfil
+
+
+def guardar_perfil(chave: str, perfil: PerfilBase):
+    """Guarda um perfil pronto (ex.: lido do cache em disco) para obter_perfil_base."""
+    with _lock_perfis:
+        _perfis[chave] = perfil
+        _perfis.move_to_end(chave)
+        while len(_perfis) > MAX_PERFIS:
+            _perfis.popitem(last=False)
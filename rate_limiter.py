@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) compartilhado entre threads.
+
+    Repõe `taxa` fichas por segundo até `capacidade`; cada requisição consome uma.
+    `pausar` bloqueia todas as threads por um período (ex.: após um 429 com Retry-After).
+    """
+
+    def __init__(self, taxa: float, capacidade: Optional[int] = None):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade if capacidade is not None else max(1, int(taxa)))
+        self._fichas = self.capacidade
+        self._ultimo = time.monotonic()
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _repor(self, agora: float):
+        decorrido = agora - self._ultimo
+        if decorrido > 0:
+            self._fichas = min(self.capacidade, self._fichas + decorrido * self.taxa)
+            self._ultimo = agora
+
+    def adquirir(self):
+        """Bloqueia até haver uma ficha disponível e a consome."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                if agora < self._pausado_ate:
+                    espera = self._pausado_ate - agora
+                else:
+                    self._repor(agora)
+                    if self._fichas >= 1:
+                        self._fichas -= 1
+                        return
+                    espera = (1 - self._fichas) / self.taxa
+            time.sleep(espera)
+
+    def pausar(self, segundos: float):
+        """Suspende a emissão de fichas por `segundos` e zera o saldo acumulado."""
+        with self._lock:
+            agora = time.monotonic()
+            self._pausado_ate = max(self._pausado_ate, agora + segundos)
+            self._fichas = 0.0
+            self._ultimo = self._pausado_ate
@@ -0,0 +1,316 @@
+import json
+from datetime import date, datetime
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from centros_custo import CENTROS_CUSTO, normalizar_centro_custo, resolver_centro_custo, valor_centro_custo, valores_aceitos
+from conjuntos_ids import ConjuntoIds
+from datas_vetorizadas import FUSO_HORARIO, datas_do_campo
+from cpf_vetorizado import normalizar_cpfs
+from extracao_vetorizada import limpar_telefones_coluna
+
+# Campos originais de cada tipo de registro (None = campo que o tipo não tem)
+CAMPOS_MENSAGEM = {'cpf': 'cpf', 'telefone': 'telefone', 'status': 'status',
+                   'centro_custo': 'centro_custo', 'data': 'enviada_em'}
+CAMPOS_ACESSO = {'cpf': 'cpf', 'telefone': 'fullphone', 'status': None,
+                 'centro_custo': 'tenant_segment_id', 'data': 'accessed_at'}
+
+# Códigos das colunas de CPF e telefone quando não há um número de 11 dígitos
+SEM_VALOR = -1
+VALOR_INVALIDO = -2
+
+# Códigos da coluna de datas (nanossegundos UTC): campo vazio e data que não converte
+SEM_DATA = np.iinfo(np.int64).min
+DATA_INVALIDA = SEM_DATA + 1
+
+# Código das colunas categóricas para valor ausente
+SEM_CATEGORIA = -1
+
+# Formato das datas nos dicionários reconstruídos (o mesmo devolvido pela API)
+FORMATO_DATA_REGISTRO = '%d/%m/%Y %H:%M:%S'
+
+
+def _codificar_numeros(valores: pd.Series, limpos: pd.Series, presentes: np.ndarray) -> np.ndarray:
+    """Números limpos (texto de 11 dígitos) como int64; SEM_VALOR/VALOR_INVALIDO onde não há número."""
+    codigos = np.full(len(valores), SEM_VALOR, dtype=np.int64)
+    validos = limpos.notna().to_numpy()
+    codigos[validos] = limpos[validos].astype(np.int64).to_numpy()
+    codigos[presentes & ~validos] = VALOR_INVALIDO
+    return codigos
+
+
+def _tipo_codigos(quantidade: int):
+    return np.int16 if quantidade < np.iinfo(np.int16).max else np.int32
+
+
+def _unir_categorias(colunas: List[Tuple[np.ndarray, List]]) -> Tuple[np.ndarray, List]:
+    """Concatena colunas categóricas com listas de categorias diferentes."""
+    categorias: List = []
+    posicoes: Dict = {}
+    codigos = []
+    for codigos_parte, categorias_parte in colunas:
+        # Última posição do mapa recebe SEM_CATEGORIA (código -1)
+        mapa = np.full(len(categorias_parte) + 1, SEM_CATEGORIA, dtype=np.int32)
+        for indice, categoria in enumerate(categorias_parte):
+            if categoria not in posicoes:
+                posicoes[categoria] = len(categorias)
+                categorias.append(categoria)
+            mapa[indice] = posicoes[categoria]
+        codigos.append(mapa[codigos_parte])
+    return np.concatenate(codigos).astype(_tipo_codigos(len(categorias))), categorias
+
+
+def _codificar_categorias(valores: List) -> Tuple[np.ndarray, List]:
+    codigos, categorias = pd.factorize(pd.Series(valores, dtype=object))
+    return codigos.astype(_tipo_codigos(len(categorias))), list(categorias)
+
+
+class RegistrosKolmeya:
+    """
+    Mensagens ou acessos do Kolmeya guardados em colunas.
+
+    CPF e telefone viram int64 (11 dígitos já limpos), status e centro de custo viram
+    códigos de categoria e a data vira int64 (nanossegundos UTC). Só os campos usados
+    pelo dashboard são mantidos; iterar devolve dicionários com os nomes originais.
+    """
+
+    __slots__ = ('cpf', 'telefone', 'status', 'categorias_status', 'centro_custo',
+                 'categorias_centro_custo', 'data', 'campos')
+
+    def __init__(self, cpf: np.ndarray, telefone: np.ndarray, status: np.ndarray, categorias_status: List,
+                 centro_custo: np.ndarray, categorias_centro_custo: List, data: np.ndarray,
+                 campos: Dict[str, Optional[str]]):
+        self.cpf = cpf
+        self.telefone = telefone
+        self.status = status
+        self.categorias_status = categorias_status
+        self.centro_custo = centro_custo
+        self.categorias_centro_custo = categorias_centro_custo
+        self.data = data
+        self.campos = campos
+
+    @classmethod
+    def de_registros(cls, registros: List[Dict], campos: Dict[str, Optional[str]],
+                     extrair_centro_custo: Optional[Callable[[Dict], Optional[str]]] = None,
+                     fuso: Optional[str] = FUSO_HORARIO) -> 'RegistrosKolmeya':
+        """
+        Converte registros da API (itens que não são dicionários são descartados).
+
+        extrair_centro_custo substitui a leitura direta do campo de centro de custo.
+        """
+        registros = [registro for registro in registros or [] if isinstance(registro, dict)]
+
+        cpfs = pd.Series([registro.get(campos['cpf']) for registro in registros], dtype=object)
+        cpf_presente = np.fromiter((bool(cpf) and cpf != 0 for cpf in cpfs), dtype=bool, count=len(cpfs))
+        cpf = normalizar_cpfs(cpfs.where(cpf_presente, ''))
+        cpf[cpf_presente & (cpf < 0)] = VALOR_INVALIDO
+
+        telefones = pd.Series([registro.get(campos['telefone']) for registro in registros], dtype=object)
+        telefone = _codificar_numeros(telefones, limpar_telefones_coluna(telefones), telefones.notna().to_numpy())
+
+        campo_status = campos['status']
+        status, categorias_status = _codificar_categorias(
+            [registro.get(campo_status) for registro in registros] if campo_status else [None] * len(registros))
+
+        if extrair_centro_custo:
+            centros = [extrair_centro_custo(registro) for registro in registros]
+        else:
+            centros = [registro.get(campos['centro_custo']) or None for registro in registros]
+        centro_custo, categorias_centro_custo = _codificar_categorias(centros)
+
+        tem_data = np.fromiter((bool(registro.get(campos['data'])) for registro in registros),
+                               dtype=bool, count=len(registros))
+        data = pd.DatetimeIndex(datas_do_campo(registros, campos['data'], fuso)).asi8.copy()
+        data[tem_data & (data == SEM_DATA)] = DATA_INVALIDA
+
+        return cls(cpf, telefone, status, categorias_status, centro_custo, categorias_centro_custo, data, campos)
+
+    @classmethod
+    def de_mensagens(cls, messages: List[Dict]) -> 'RegistrosKolmeya':
+        # Centro de custo pelo mesmo critério do filtro (primeiro campo preenchido)
+        return cls.de_registros(messages, CAMPOS_MENSAGEM, valor_centro_custo)
+
+    @classmethod
+    def de_acessos(cls, acessos: List[Dict]) -> 'RegistrosKolmeya':
+        return cls.de_registros(acessos, CAMPOS_ACESSO)
+
+    @classmethod
+    def vazio(cls, campos: Dict[str, Optional[str]] = CAMPOS_MENSAGEM) -> 'RegistrosKolmeya':
+        return cls.de_registros([], campos)
+
+    @classmethod
+    def concatenar(cls, partes: List['RegistrosKolmeya'],
+                   campos: Dict[str, Optional[str]] = CAMPOS_MENSAGEM) -> 'RegistrosKolmeya':
+        """Junta partes na ordem dada, unificando as categorias de status e centro de custo."""
+        partes = [parte for parte in partes if len(parte)]
+        if not partes:
+            return cls.vazio(campos)
+        if len(partes) == 1:
+            return partes[0]
+
+        status, categorias_status = _unir_categorias([(p.status, p.categorias_status) for p in partes])
+        centro_custo, categorias_centro_custo = _unir_categorias(
+            [(p.centro_custo, p.categorias_centro_custo) for p in partes])
+        return cls(np.concatenate([p.cpf for p in partes]), np.concatenate([p.telefone for p in partes]),
+                   status, categorias_status, centro_custo, categorias_centro_custo,
+                   np.concatenate([p.data for p in partes]), partes[0].campos)
+
+    def salvar(self, arquivo: BinaryIO):
+        """Grava as colunas em formato .npz compactado (categorias e campos em JSON)."""
+        metadados = {'campos': self.campos, 'categorias_status': self.categorias_status,
+                     'categorias_centro_custo': self.categorias_centro_custo}
+        np.savez_compressed(arquivo, cpf=self.cpf, telefone=self.telefone, status=self.status,
+                            centro_custo=self.centro_custo, data=self.data,
+                            metadados=np.array(json.dumps(metadados, default=str)))
+
+    @classmethod
+    def carregar(cls, arquivo) -> 'RegistrosKolmeya':
+        """Lê um arquivo gravado por salvar()."""
+        with np.load(arquivo, allow_pickle=False) as colunas:
+            metadados = json.loads(str(colunas['metadados']))
+            return cls(colunas['cpf'], colunas['telefone'], colunas['status'], metadados['categorias_status'],
+                       colunas['centro_custo'], metadados['categorias_centro_custo'], colunas['data'],
+                       metadados['campos'])
+
+    def __len__(self) -> int:
+        return len(self.cpf)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória das colunas (sem as listas de categorias)."""
+        return sum(coluna.nbytes for coluna in (self.cpf, self.telefone, self.status, self.centro_custo, self.data))
+
+    def filtrar(self, mascara: np.ndarray) -> 'RegistrosKolmeya':
+        """Registros onde a máscara é True, na ordem original."""
+        return RegistrosKolmeya(self.cpf[mascara], self.telefone[mascara], self.status[mascara],
+                                self.categorias_status, self.centro_custo[mascara],
+                                self.categorias_centro_custo, self.data[mascara], self.campos)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return self.filtrar(np.arange(len(self))[indice])
+        return self.registro(int(np.arange(len(self))[indice]))
+
+    def __iter__(self) -> Iterator[Dict]:
+        for indice in range(len(self)):
+            yield self.registro(indice)
+
+    def registro(self, indice: int) -> Dict:
+        """Registro como dicionário, com os nomes de campo da API (compatibilidade com código que itera)."""
+        registro = {}
+        for nome, coluna in (('cpf', self.cpf), ('telefone', self.telefone)):
+            valor = int(coluna[indice])
+            registro[self.campos[nome]] = f'{valor:011d}' if valor >= 0 else None
+        if self.campos['status']:
+            registro[self.campos['status']] = self._categoria(self.status, self.categorias_status, indice)
+        registro[self.campos['centro_custo']] = self._categoria(self.centro_custo, self.categorias_centro_custo, indice)
+        data = int(self.data[indice])
+        registro[self.campos['data']] = (
+            pd.Timestamp(data, tz='UTC').tz_convert(FUSO_HORARIO).strftime(FORMATO_DATA_REGISTRO)
+            if data > DATA_INVALIDA else None
+        )
+        return registro
+
+    @staticmethod
+    def _categoria(codigos: np.ndarray, categorias: List, indice: int):
+        codigo = int(codigos[indice])
+        return categorias[codigo] if codigo != SEM_CATEGORIA else None
+
+    # Consultas usadas pelos extratores e painéis
+
+    def cpfs(self) -> ConjuntoIds:
+        """CPFs únicos com 11 dígitos (int64; textos só ao exibir)."""
+        return ConjuntoIds.de_codigos(self.cpf)
+
+    def telefones(self) -> ConjuntoIds:
+        """Telefones únicos com 11 dígitos (int64; textos só ao exibir)."""
+        return ConjuntoIds.de_codigos(self.telefone)
+
+    def contagem_cpfs(self) -> Dict[str, int]:
+        """Registros com CPF de 11 dígitos, com CPF em formato inválido e sem CPF."""
+        return {
+            'cpfs_validos': int((self.cpf >= 0).sum()),
+            'cpfs_invalidos': int((self.cpf == VALOR_INVALIDO).sum()),
+            'sem_cpf': int((self.cpf == SEM_VALOR).sum()),
+        }
+
+    def contar_status(self, status) -> int:
+        if status not in self.categorias_status:
+            return 0
+        return int((self.status == self.categorias_status.index(status)).sum())
+
+    def mascaras_data(self, inicio: pd.Timestamp, fim: pd.Timestamp) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Máscaras (tem data no campo, data convertida, data em [inicio, fim]).
+
+        inicio e fim vêm de limites_periodo (no mesmo fuso usado na conversão).
+        """
+        tem_data = self.data != SEM_DATA
+        convertida = self.data > DATA_INVALIDA
+        no_periodo = convertida & (self.data >= inicio.value) & (self.data <= fim.value)
+        return tem_data, convertida, no_periodo
+
+    def ultima_data(self, ate: Optional[datetime] = None) -> Optional[datetime]:
+        """Maior data convertida (até `ate`, se dado), no fuso do dashboard e sem tzinfo."""
+        datas = self.data[self.data > DATA_INVALIDA]
+        if ate is not None:
+            datas = datas[datas <= pd.Timestamp(ate).tz_localize(FUSO_HORARIO).value]
+        if not len(datas):
+            return None
+        return pd.Timestamp(int(datas.max()), tz='UTC').tz_convert(FUSO_HORARIO).tz_localize(None).to_pydatetime()
+
+    def anteriores_a(self, momento: datetime) -> 'RegistrosKolmeya':
+        """Registros com data antes de `momento` (horário do dashboard), incluindo os sem data."""
+        mascara = self.data < pd.Timestamp(momento).tz_localize(FUSO_HORARIO).value
+        return self if mascara.all() else self.filtrar(mascara)
+
+    def dias(self) -> np.ndarray:
+        """Dia de cada registro no fuso do dashboard (datetime64[D]; NaT sem data convertida)."""
+        dias = np.full(len(self), np.datetime64('NaT'), dtype='datetime64[D]')
+        convertidas = self.data > DATA_INVALIDA
+        if convertidas.any():
+            locais = pd.DatetimeIndex(self.data[convertidas], tz='UTC').tz_convert(FUSO_HORARIO).tz_localize(None)
+            dias[convertidas] = locais.to_numpy().astype('datetime64[D]')
+        return dias
+
+    def separar_por_dia(self, dias: List[date]) -> Dict[date, 'RegistrosKolmeya']:
+        """
+        Registros de cada dia da lista. Registros sem data, ou com data fora da lista,
+        ficam no primeiro dia (vieram da mesma consulta).
+        """
+        dia_registro = self.dias()
+        sobra = np.ones(len(self), dtype=bool)
+        partes = {}
+        for dia in dias:
+            mascara = dia_registro == np.datetime64(dia, 'D')
+            sobra &= ~mascara
+            partes[dia] = mascara
+        if dias:
+            partes[dias[0]] = partes[dias[0]] | sobra
+        return {dia: self.filtrar(mascara) for dia, mascara in partes.items()}
+
+    def mascara_centro_custo(self, tenant_segment_id) -> np.ndarray:
+        """Mesma regra de filtrar_por_centro_custo: aceitos pelo filtro ou sem centro de custo."""
+        aceitos = valores_aceitos(tenant_segment_id)
+        aceitas = np.array([normalizar_centro_custo(categoria) in aceitos
+                            for categoria in self.categorias_centro_custo] + [True], dtype=bool)
+        # Código SEM_CATEGORIA (-1) aponta para a última posição (True)
+        return aceitas[self.centro_custo]
+
+    def particionar_por_centro_custo(self) -> Dict[Optional[int], 'RegistrosKolmeya']:
+        """
+        Registros separados por centro de custo (chaves None = TODOS e os IDs de CENTROS_CUSTO).
+
+        Cada partição traz o mesmo que filtrar_por_centro_custo(mensagens, ID), inclusive
+        os registros sem centro de custo.
+        """
+        ids = np.array([resolver_centro_custo(categoria) or 0 for categoria in self.categorias_centro_custo]
+                       + [SEM_CATEGORIA], dtype=np.int64)[self.centro_custo]
+        sem_centro = ids == SEM_CATEGORIA
+        particoes: Dict[Optional[int], RegistrosKolmeya] = {
+            id_centro: self.filtrar((ids == id_centro) | sem_centro) for id_centro in CENTROS_CUSTO
+        }
+        particoes[None] = self
+        return particoes
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from http_client import http_post
+from log_dashboard import obter_logger
+
+# Endpoint de saldo do Kolmeya
+KOLMEYA_SALDO_URL = "https://kolmeya.com.br/api/v1/sms/balance"
+
+# Idade (segundos) a partir da qual o saldo é atualizado em segundo plano
+KOLMEYA_SALDO_TTL = float(os.getenv('KOLMEYA_SALDO_TTL', '60'))
+
+# Timeout de leitura da consulta de saldo
+KOLMEYA_SALDO_TIMEOUT = float(os.getenv('KOLMEYA_SALDO_TIMEOUT', '15'))
+
+logger = obter_logger('kolmeya')
+
+
+def consultar_saldo_kolmeya(token: str, url: str = KOLMEYA_SALDO_URL, timeout: float = KOLMEYA_SALDO_TIMEOUT) -> float:
+    """Saldo atual da conta; erros HTTP ou resposta sem 'balance' levantam exceção."""
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+    resp = http_post(url, headers=headers, timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    logger.debug("Resposta do saldo: %s", data)
+    if not isinstance(data, dict) or 'balance' not in data:
+        raise ValueError(f"Campo 'balance' não encontrado na resposta do saldo: {data!r:.200}")
+    return float(data['balance'] or 0.0)
+
+
+class LeituraSaldo:
+    """Último saldo conhecido, quando foi obtido e o erro da última tentativa (se houve)."""
+
+    def __init__(self, valor: Optional[float], obtido_em: Optional[float], erro: Optional[Exception] = None,
+                 atualizando: bool = False):
+        self.valor = valor
+        self.obtido_em = obtido_em
+        self.erro = erro
+        self.atualizando = atualizando
+
+    @property
+    def idade(self) -> Optional[float]:
+        """Segundos desde a obtenção do valor (None se ainda não há valor)."""
+        return None if self.obtido_em is None else time.time() - self.obtido_em
+
+
+class ProvedorSaldo:
+    """
+    Saldo compartilhado por todas as sessões, servido da memória.
+
+    Um valor com mais de ttl segundos continua sendo entregue enquanto uma única
+    atualização roda em segundo plano (stale-while-revalidate): vários usuários na
+    página custam uma consulta ao Kolmeya por intervalo, e não uma por rerun.
+    """
+
+    def __init__(self, buscar: Callable[[], float], ttl: float = KOLMEYA_SALDO_TTL):
+        self._buscar = buscar
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._valor: Optional[float] = None
+        self._obtido_em: Optional[float] = None
+        self._erro: Optional[Exception] = None
+        self._tentativa_em: Optional[float] = None
+        self._atualizacao: Optional[threading.Thread] = None
+
+    def _atualizar(self):
+        try:
+            valor = self._buscar()
+            with self._lock:
+                self._valor, self._obtido_em, self._erro = valor, time.time(), None
+        except Exception as e:
+            logger.warning("Falha ao atualizar o saldo do Kolmeya: %s", e)
+            with self._lock:
+                self._erro = e
+
+    def _disparar_atualizacao(self) -> threading.Thread:
+        """Inicia a atualização, se nenhuma estiver em andamento (chamar com o lock)."""
+        if self._atualizacao is None or not self._atualizacao.is_alive():
+            self._tentativa_em = time.time()
+            self._atualizacao = threading.Thread(target=self._atualizar, name='saldo-kolmeya', daemon=True)
+            self._atualizacao.start()
+        return self._atualizacao
+
+    def obter(self, espera: float = 0.0) -> LeituraSaldo:
+        """
+        Leitura imediata do saldo, disparando a atualização se ele estiver velho.
+
+        Args:
+            espera: Segundos a esperar pela primeira consulta quando ainda não há valor
+        """
+        with self._lock:
+            # Conta a partir da última tentativa: com o Kolmeya fora do ar, no máximo uma consulta por ttl
+            vencido = self._tentativa_em is None or time.time() - self._tentativa_em > self.ttl
+            atualizacao = self._disparar_atualizacao() if vencido else None
+            sem_valor = self._valor is None
+
+        if sem_valor and atualizacao is not None and espera > 0:
+            atualizacao.join(espera)
+
+        with self._lock:
+            em_andamento = self._atualizacao is not None and self._atualizacao.is_alive()
+            return LeituraSaldo(self._valor, self._obtido_em, self._erro, em_andamento)
+
+
+_provedores: Dict[str, ProvedorSaldo] = {}
+_lock_provedores = threading.Lock()
+
+
+def obter_provedor_saldo(token: str) -> ProvedorSaldo:
+    """Provedor de saldo do token, criado na primeira chamada e compartilhado pelo processo."""
+    with _lock_provedores:
+        provedor = _provedores.get(token)
+        if provedor is None:
+            provedor = ProvedorSaldo(lambda: consultar_saldo_kolmeya(token))
+            _provedores[token] = provedor
+        return provedor
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from centros_custo import resolver_centro_custo
+from coalescencia import Coalescedor
+from kolmeya_store import agora_brasil
+from log_dashboard import obter_logger
+from registros_kolmeya import RegistrosKolmeya
+
+# Validade (segundos) do status de um período que inclui o dia de hoje; períodos fechados valem até sair do cache
+STATUS_PERIODO_TTL_HOJE = float(os.getenv('STATUS_PERIODO_TTL_HOJE', '120'))
+
+# Períodos mantidos em memória
+STATUS_PERIODO_MAX = int(os.getenv('STATUS_PERIODO_MAX', '4'))
+
+logger = obter_logger('kolmeya')
+
+
+class StatusParticionado:
+    """Status de SMS de um período, baixado uma vez, guardado em colunas e separado por centro de custo."""
+
+    def __init__(self, messages, ttl: Optional[float] = None,
+                 particoes: Optional[Dict[Optional[int], RegistrosKolmeya]] = None):
+        if particoes is None:
+            if not isinstance(messages, RegistrosKolmeya):
+                messages = RegistrosKolmeya.de_mensagens(messages)
+            particoes = messages.particionar_por_centro_custo()
+        self.particoes = particoes
+        self.obtido_em = time.time()
+        self.ttl = ttl
+
+    @property
+    def expirado(self) -> bool:
+        return self.ttl is not None and time.time() - self.obtido_em > self.ttl
+
+    def mensagens(self, tenant_segment_id=None) -> RegistrosKolmeya:
+        """Mensagens do centro de custo (None = TODOS), sem nova consulta à API."""
+        if not tenant_segment_id:
+            return self.particoes[None]
+        id_centro = resolver_centro_custo(tenant_segment_id)
+        if id_centro in self.particoes:
+            return self.particoes[id_centro]
+        todas = self.particoes[None]
+        return todas.filtrar(todas.mascara_centro_custo(tenant_segment_id))
+
+    def com_novos(self, novos: RegistrosKolmeya, desde: datetime) -> 'StatusParticionado':
+        """
+        Status com os registros a partir de `desde` trocados por `novos` (a partir de `desde`).
+
+        Só as partições que perderam ou ganharam registros são refeitas; as demais são
+        reaproveitadas como estão.
+        """
+        particoes_novos = novos.particionar_por_centro_custo()
+        particoes = {}
+        for id_centro, particao in self.particoes.items():
+            anteriores = particao.anteriores_a(desde)
+            if len(particoes_novos[id_centro]):
+                anteriores = RegistrosKolmeya.concatenar([anteriores, particoes_novos[id_centro]], particao.campos)
+            particoes[id_centro] = anteriores
+        return StatusParticionado(None, ttl=self.ttl, particoes=particoes)
+
+    def atualizado(self, buscar_desde: Callable[[datetime], RegistrosKolmeya]) -> 'StatusParticionado':
+        """
+        Status atualizado só com o que chegou depois da última mensagem conhecida.
+
+        O minuto da última mensagem é buscado de novo (pode ter recebido outras depois da
+        leitura anterior); buscar_desde(desde) devolve os registros de desde até agora.
+        """
+        agora = agora_brasil()
+        ultima = self.particoes[None].ultima_data(ate=agora)
+        desde = (ultima or agora).replace(second=0, microsecond=0)
+        novos = buscar_desde(desde)
+        status = self.com_novos(novos, desde)
+        logger.info("Status atualizado desde %s: %d registro(s) novo(s), %d no período",
+                    desde.strftime('%d/%m %H:%M'), len(novos), len(status.particoes[None]))
+        return status
+
+
+_periodos: "OrderedDict[Tuple, StatusParticionado]" = OrderedDict()
+_lock_periodos = threading.Lock()
+
+# Sessões que pedem o mesmo período ao mesmo tempo dividem um único carregamento
+_carregamentos = Coalescedor('status_periodo', ttl=0)
+
+
+def obter_status_particionado(chave: Tuple, carregar: Callable[[], object],
+                              inclui_hoje: bool = False,
+                              buscar_desde: Optional[Callable[[datetime], RegistrosKolmeya]] = None
+                              ) -> StatusParticionado:
+    """
+    Status do período identificado por chave, carregado por carregar() só na primeira vez
+    (lista de mensagens ou RegistrosKolmeya).
+
+    Trocar o centro de custo reaproveita o mesmo período; com inclui_hoje o período é
+    recarregado depois de STATUS_PERIODO_TTL_HOJE. Respostas vazias não ficam guardadas.
+    Pedidos simultâneos do mesmo período (qualquer centro de custo) esperam o mesmo carregamento.
+
+    Com buscar_desde, um período expirado não é recarregado inteiro: só entram as mensagens
+    a partir da última já conhecida (ver StatusParticionado.atualizado). Se essa busca
+    falhar, o status anterior continua sendo entregue.
+    """
+    with _lock_periodos:
+        status = _periodos.get(chave)
+        if status is not None and not status.expirado:
+            _periodos.move_to_end(chave)
+            logger.debug("Status do período %s reaproveitado (%.0fs)", chave, time.time() - status.obtido_em)
+            return status
+
+    anterior = status if buscar_desde is not None else None
+    if anterior is not None:
+        try:
+            status = _carregamentos.executar(chave, lambda: anterior.atualizado(buscar_desde))
+        except Exception as e:
+            logger.warning("Falha ao atualizar o status do período, mantendo o anterior: %s", e)
+            return anterior
+    else:
+        status = _carregamentos.executar(
+            chave, lambda: StatusParticionado(carregar(), ttl=STATUS_PERIODO_TTL_HOJE if inclui_hoje else None))
+    if not len(status.particoes[None]):
+        return status
+
+    with _lock_periodos:
+        _periodos[chave] = status
+        _periodos.move_to_end(chave)
+        while len(_periodos) > STATUS_PERIODO_MAX:
+            _periodos.popitem(last=False)
+    return status
+
+
+def limpar_status_particionado():
+    with _lock_periodos:
+        _periodos.clear()